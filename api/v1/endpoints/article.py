@@ -1,31 +1,137 @@
-from typing import List
+from typing import Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from schemas.article_schemas import ArticleVO, ListArticleVO, ArticleUpdate
-from schemas.base import APIRes
+from core.database import DbSession
+from core.responses import model_response
+from core.routing import TimedRoute
+from schemas.article_schemas import ArticleVO, ListArticleVO, ArticleUpdate, ArticleCreate, BulkImportResult
+from schemas.base import APIRes, PageRes, PageParams, CursorParams
 from schemas.sys_user_schemas import UserVo
-from services import article_service
+from services import article_service, article_export
 from services.sys_user_service import get_current_active_user
 
 router = APIRouter(
     prefix="/api/v1/article",
     tags=["article"],
     responses={404: {"description": "article not found"}},
+    route_class=TimedRoute,
 )
 
+# 列表接口的响应类型：接口直接构造该类型的实例，由 model_response 一次序列化输出
+ArticlePageRes = APIRes[PageRes[ListArticleVO]]
+
 '''
 无需登录就可以查看所有的文章的标题、作者、创建时间、修改时间、内容只展示20个字
+使用游标分页：首页不传 cursor，之后每次把返回的 meta.next_cursor 传回来
 '''
 @router.get("/",
             summary="获取文章列表（公开，无需登录）",
-            response_model=APIRes[List[ListArticleVO]])
-async def get_articles():
-    articles = await article_service.get_article_list()
-    return APIRes(data=articles)
+            response_model=ArticlePageRes)
+async def get_articles(params: CursorParams = Depends()):
+    articles = await article_service.get_article_list(params)
+    return model_response(ArticlePageRes(data=articles))
+
+'''
+偏移分页获取文章列表，带总数和页码，深分页代价高，只给登录后的后台小列表使用
+'''
+@router.get("/page",
+            summary="分页获取文章列表（偏移分页，需登录）",
+            response_model=ArticlePageRes)
+async def get_articles_by_page(params: PageParams = Depends(),
+                               current_user: UserVo = Depends(get_current_active_user)):
+    articles = await article_service.get_article_page(params)
+    return model_response(ArticlePageRes(data=articles))
+
+'''
+获取某个作者的文章列表（公开，无需登录），游标分页
+'''
+@router.get("/author/{author_id}",
+            summary="获取作者的文章列表（公开，无需登录）",
+            response_model=ArticlePageRes)
+async def get_author_articles(author_id: int, params: CursorParams = Depends()):
+    articles = await article_service.get_article_list(params, author_id=author_id)
+    return model_response(ArticlePageRes(data=articles))
+
+'''
+获取当前登录用户自己的文章列表，游标分页
+'''
+@router.get("/mine",
+            summary="获取我的文章列表（需登录）",
+            response_model=ArticlePageRes)
+async def get_my_articles(params: CursorParams = Depends(),
+                          current_user: UserVo = Depends(get_current_active_user)):
+    articles = await article_service.get_article_list(params, author_id=current_user.id)
+    return model_response(ArticlePageRes(data=articles))
+
+'''
+全文检索文章标题和内容（公开，无需登录），结果按相关度排序
+'''
+@router.get("/search",
+            summary="搜索文章（公开，无需登录）",
+            response_model=ArticlePageRes)
+async def search_articles(db: DbSession,
+                          q: str = Query(..., min_length=1, max_length=100),
+                          params: PageParams = Depends()):
+    articles = await article_service.search_articles(q, params, db)
+    return model_response(ArticlePageRes(data=articles))
+
+'''
+导出全部文章（需登录），NDJSON 或 CSV 流式输出，可选 gzip 压缩
+边查边写，不在内存中缓存整个结果集
+响应在接口返回之后才开始输出，导出使用自己的会话，不用请求级会话
+'''
+@router.get("/export",
+            summary="导出全部文章（流式，需登录）",
+            response_class=StreamingResponse)
+async def export_articles(format: Literal["ndjson", "csv"] = "ndjson",
+                          gzip: bool = False,
+                          current_user: UserVo = Depends(get_current_active_user)):
+    filename = article_export.export_filename(format, gzip)
+    return StreamingResponse(
+        article_export.export_articles(format, gzip),
+        media_type="application/gzip" if gzip else article_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+'''
+批量导入文章（需登录），作者为当前用户
+请求体为 ArticleCreate 的 JSON 数组（application/json），
+或每行一个 ArticleCreate 的 NDJSON 流（application/x-ndjson，边读边导入）
+每块单独一个事务提交，不使用请求级会话
+'''
+@router.post("/bulk",
+             summary="批量导入文章（需登录）",
+             response_model=APIRes[BulkImportResult],
+             openapi_extra={"requestBody": {"content": {
+                 "application/json": {"schema": {"type": "array", "items": ArticleCreate.model_json_schema()}},
+                 "application/x-ndjson": {"schema": {"type": "string"}},
+             }, "required": True}})
+async def bulk_create_articles(request: Request,
+                               current_user: UserVo = Depends(get_current_active_user)):
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type:
+        items = article_service.iter_ndjson(request.stream())
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请求体不是合法的 JSON")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请求体必须是 JSON 数组")
+
+        async def iter_payload():
+            for item in payload:
+                yield item
+        items = iter_payload()
+
+    res = await article_service.bulk_create_articles(items, current_user.id)
+    return APIRes(data=res, message="bulk import finished")
 
 '''
 修改文章，只有作者才能修改自己的文章，修改时同时更新修改时间
+ 请求体需带上读取文章时拿到的 version，期间被别人修改过则返回 409
  current_user: UserVo = Depends(get_current_active_user) 表示从token里面获取用户信息
  
  Depends 本质上就是：在调用你的接口方法之前，先执行另一个函数，把返回值塞进参数里
@@ -33,6 +139,24 @@ async def get_articles():
 @router.post("/edit/{article_id}", response_model=APIRes[bool])
 async def edit_article(article_id: int,
                        article: ArticleUpdate,
+                       db: DbSession,
                        current_user: UserVo = Depends(get_current_active_user)):
-    res = await article_service.edit_article(article_id, article, current_user)
+    res = await article_service.edit_article(article_id, article, current_user, db)
     return APIRes(data=res, message="edit article successfully")
+
+
+'''
+文章详情（公开，无需登录）
+响应带弱 ETag（文章 id + 版本号，浏览量变化不影响），客户端/CDN 用 If-None-Match 回源校验时，未修改直接返回 304
+注意：路径参数路由放在最后，避免吞掉 /page 等固定路径
+'''
+@router.get("/{article_id}",
+            summary="获取文章详情（公开，无需登录）",
+            response_model=APIRes[ArticleVO],
+            responses={304: {"description": "article not modified"}})
+async def get_article(article_id: int, if_none_match: str | None = Header(None)):
+    etag, body = await article_service.get_article_detail(article_id, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Response
+
+from core import metrics
+from core.dependencies import require_monitor_access
+from core.logger import dropped_records
+from core.middleware import latency_summary
+from dao.article_cache import detail_cache
+from core.routing import TimedRoute
+from schemas.base import APIRes
+from services.sys_user_cache import get_user_cache_stats
+from utils.auth import get_token_cache_stats
+
+router = APIRouter(tags=["monitor"], route_class=TimedRoute)
+
+
+def _cache_stats(field: str):
+    return lambda: {
+        ("user",): get_user_cache_stats()[field],
+        ("token",): get_token_cache_stats()[field],
+        ("article_detail",): detail_cache.stats()[field],
+    }
+
+
+metrics.CallbackMetric("local_cache_hits_total", "Process-local cache hits", "counter", ("cache",),
+                       _cache_stats("hits"))
+metrics.CallbackMetric("local_cache_misses_total", "Process-local cache misses", "counter", ("cache",),
+                       _cache_stats("misses"))
+metrics.CallbackMetric("local_cache_evictions_total", "Process-local cache LRU evictions", "counter", ("cache",),
+                       _cache_stats("evictions"))
+metrics.CallbackMetric("local_cache_size", "Process-local cache entries", "gauge", ("cache",),
+                       _cache_stats("size"))
+metrics.CallbackMetric("log_records_dropped_total", "Log records dropped by the logging pipeline", "counter",
+                       ("reason",), lambda: {(reason,): count for reason, count in dropped_records.items()})
+
+
+'''
+Prometheus 抓取接口：连接池、SQL、Redis、本地缓存等指标，文本格式输出
+每个 worker 进程单独统计，不在 OpenAPI 文档中展示
+仅供内部使用：需要 MONITOR_TOKEN，未配置时只允许本机访问
+'''
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_monitor_access)])
+async def get_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+'''
+各路由的耗时分位数（毫秒）：p50 / p95 / p99 / max，按 p99 倒序
+数据来自请求耗时中间件，当前 worker 进程启动以来的全部请求
+与 /metrics 相同，仅供内部访问
+'''
+@router.get("/debug/latency", include_in_schema=False, response_model=APIRes[list],
+            dependencies=[Depends(require_monitor_access)])
+async def get_latency():
+    return APIRes(data=latency_summary())
@@ -1,50 +1,90 @@
-from fastapi import APIRouter
-from core.redis import get_redis
+from fastapi import APIRouter, Query
+from core.redis import RedisClient
+from core.routing import TimedRoute
+from schemas.redis_schemas import RedisKeys, RedisMSet
 
-router = APIRouter(prefix="/redis", tags=["redis"])
+router = APIRouter(prefix="/redis", tags=["redis"], route_class=TimedRoute)
 
 @router.get("/set/{key}/{value}")
-async def set_key_value(key: str, value: str):
+async def set_key_value(key: str, value: str, redis_conn: RedisClient):
     """设置键值对到Redis"""
-    async with get_redis() as redis_conn:
-        try:
-            await redis_conn.set(key, value)
-            return {"message": f"Successfully set {key} = {value}"}
-        except Exception as e:
-            return {"error": f"Failed to set key-value: {str(e)}"}
+    try:
+        await redis_conn.set(key, value)
+        return {"message": f"Successfully set {key} = {value}"}
+    except Exception as e:
+        return {"error": f"Failed to set key-value: {str(e)}"}
 
 @router.get("/get/{key}")
-async def get_key_value(key: str):
+async def get_key_value(key: str, redis_conn: RedisClient):
     """从Redis获取指定键的值"""
-    async with get_redis() as redis_conn:
-        try:
-            value = await redis_conn.get(key)
-            if value is None:
-                return {"message": f"Key '{key}' not found"}
-            return {"key": key, "value": value}
-        except Exception as e:
-            return {"error": f"Failed to get key: {str(e)}"}
+    try:
+        value = await redis_conn.get(key)
+        if value is None:
+            return {"message": f"Key '{key}' not found"}
+        return {"key": key, "value": value}
+    except Exception as e:
+        return {"error": f"Failed to get key: {str(e)}"}
 
 @router.delete("/delete/{key}")
-async def delete_key(key: str):
+async def delete_key(key: str, redis_conn: RedisClient):
     """从Redis删除指定键"""
-    async with get_redis() as redis_conn:
-        try:
-            result = await redis_conn.delete(key)
-            if result:
-                return {"message": f"Successfully deleted key '{key}'"}
-            else:
-                return {"message": f"Key '{key}' not found"}
-        except Exception as e:
-            return {"error": f"Failed to delete key: {str(e)}"}
-
-# 大坑：keys 命令在生产环境中慎用，因为它会阻塞 Redis 服务器
-@router.get("/keys")
-async def list_keys(pattern: str = "*"):
-    """列出匹配模式的所有键"""
-    async with get_redis() as redis_conn:
-        try:
-            keys = await redis_conn.keys(pattern)
-            return {"keys": keys}
-        except Exception as e:
-            return {"error": f"Failed to list keys: {str(e)}"}
\ No newline at end of file
+    try:
+        result = await redis_conn.delete(key)
+        if result:
+            return {"message": f"Successfully deleted key '{key}'"}
+        else:
+            return {"message": f"Key '{key}' not found"}
+    except Exception as e:
+        return {"error": f"Failed to delete key: {str(e)}"}
+
+# 不使用 KEYS：它一次遍历整个键空间，期间阻塞 Redis 服务器
+# SCAN 每次只遍历一小段，返回的 cursor 传回来继续遍历，cursor 为 0 表示结束
+# 注意：count 只是每次遍历的槽位数提示，一页返回的键数可能多于或少于 count，也可能为空
+@router.get("/scan")
+async def scan_keys(
+    redis_conn: RedisClient,
+    cursor: int = Query(0, ge=0),
+    count: int = Query(100, ge=1, le=1000),
+    match: str = "*",
+):
+    """按游标分页列出匹配模式的键"""
+    try:
+        next_cursor, keys = await redis_conn.scan(cursor=cursor, match=match, count=count)
+        return {"cursor": next_cursor, "keys": keys}
+    except Exception as e:
+        return {"error": f"Failed to scan keys: {str(e)}"}
+
+# 批量接口：N 个键只需一次网络往返
+@router.post("/mget")
+async def mget_keys(body: RedisKeys, redis_conn: RedisClient):
+    """批量获取键值，不存在的键值为 null"""
+    try:
+        values = await redis_conn.mget(body.keys)
+        return {"items": dict(zip(body.keys, values))}
+    except Exception as e:
+        return {"error": f"Failed to get keys: {str(e)}"}
+
+@router.post("/mset")
+async def mset_keys(body: RedisMSet, redis_conn: RedisClient):
+    """批量设置键值，可选统一的过期时间"""
+    try:
+        if body.ex is None:
+            await redis_conn.mset(body.items)
+        else:
+            # MSET 不支持过期时间，改用非事务 pipeline 批量 SET，仍然只有一次往返
+            async with redis_conn.pipeline(transaction=False) as pipe:
+                for key, value in body.items.items():
+                    pipe.set(key, value, ex=body.ex)
+                await pipe.execute()
+        return {"message": f"Successfully set {len(body.items)} keys"}
+    except Exception as e:
+        return {"error": f"Failed to set keys: {str(e)}"}
+
+@router.post("/mdelete")
+async def mdelete_keys(body: RedisKeys, redis_conn: RedisClient):
+    """批量删除键，返回实际删除的数量"""
+    try:
+        deleted = await redis_conn.delete(*body.keys)
+        return {"deleted": deleted}
+    except Exception as e:
+        return {"error": f"Failed to delete keys: {str(e)}"}
@@ -1,21 +1,26 @@
 from datetime import timedelta
+from typing import Mapping
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from core.config import config
+from core.database import DbSession
+from core.routing import TimedRoute
 from schemas.base import APIRes
 from schemas.sys_user_schemas import Token, UserVo, UserCreate
-from services.sys_user_service import authenticate_user, get_current_active_user, create_user, get_user_by_username
+from services.sys_user_service import authenticate_user, get_current_active_user, create_user, \
+    get_current_token_claims, logout, login_rate_limit, is_username_available
 from utils.auth import create_access_token
 
 router = APIRouter(
     prefix="/api/v1/users",
     tags=["users"],
     responses={404: {"description": "User not found"}},
+    route_class=TimedRoute,
 )
 
-@router.post("/token")
+@router.post("/token", dependencies=[Depends(login_rate_limit)])
 async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
 ):
@@ -30,7 +35,7 @@ async def login_for_access_token(
         Token: 包含访问令牌和令牌类型的响应
     """
 
-    # 认证用户
+    # 认证用户，不使用请求级会话：密码校验耗时较长，查完用户就先归还连接
     user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -46,6 +51,22 @@ async def login_for_access_token(
     )
     return {"access_token":access_token, "token_type": "bearer"}
 
+@router.post("/logout", response_model=APIRes[bool])
+async def logout_user(
+        claims: Mapping = Depends(get_current_token_claims)
+):
+    """
+    注销当前令牌，令牌在剩余有效期内不能再使用
+
+    Args:
+        claims: 当前令牌的 claims
+
+    Returns:
+        APIRes[bool]: 注销成功返回True
+    """
+    await logout(claims)
+    return APIRes(data=True, message="Logged out successfully")
+
 @router.get("/", response_model=APIRes[UserVo])
 async def read_users_me(
         current_user: UserVo = Depends(get_current_active_user)
@@ -63,25 +84,34 @@ async def read_users_me(
 
 
 @router.post("/register", response_model=APIRes[bool])
-async def register_user(user: UserCreate):
+async def register_user(user: UserCreate, db: DbSession):
     """
     注册新用户
 
     Args:
         user: 用户注册信息
+        db: 请求级数据库会话
 
     Returns:
         bool: 注册成功返回True，否则返回False
     """
 
-    # 检查用户名是否已存在
-    existing_user = await get_user_by_username(user.username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-
-    # 创建新用户
-    res = await create_user(user) is not None
+    # 直接插入，用户名重复由唯一索引拦截并返回400
+    res = await create_user(user, db) is not None
     return APIRes(data=res, message="User registered successfully")
+
+
+@router.get("/available", response_model=APIRes[bool])
+async def check_username_available(db: DbSession, username: str = Query(..., min_length=1, max_length=50)):
+    """
+    检查用户名是否可以注册，供注册表单实时校验
+
+    Args:
+        db: 请求级数据库会话
+        username: 待检查的用户名
+
+    Returns:
+        APIRes[bool]: 可用返回True
+    """
+    available = await is_username_available(username, db)
+    return APIRes(data=available, message="Username is available" if available else "Username already registered")
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from statistics import median
+
+'''
+基准测试公共部分：默认使用临时目录下的 SQLite 文件，可以通过 DATABASE_URL 指向 MySQL；
+需要 Redis 的脚本使用 fakeredis，不依赖外部服务
+必须在导入项目模块之前导入本模块，DATABASE_URL 等配置在导入 core.config 时读取
+'''
+
+if "DATABASE_URL" not in os.environ:
+    _DB_PATH = os.path.join(tempfile.mkdtemp(prefix="blog-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_PATH}"
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# 导出等全表查询必然超过慢查询阈值，基准测试中不记录慢查询日志
+os.environ.setdefault("DB_SLOW_QUERY_MS", "600000")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import BigInteger, DefaultClause, insert, text  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+from core.database import Base, engine  # noqa: E402
+from models.article import Article  # noqa: E402
+import models.sys_user  # noqa: E402,F401
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+
+# 与 tests/conftest.py 相同：SQLite 下 BIGINT 主键换成 INTEGER，去掉 ON UPDATE
+@compiles(BigInteger, "sqlite")
+def _bigint_as_integer(type_, compiler, **kw):
+    return "INTEGER"
+
+
+if IS_SQLITE:
+    for _table in Base.metadata.tables.values():
+        for _column in _table.columns:
+            _default = _column.server_default
+            if isinstance(_default, DefaultClause) and "ON UPDATE" in str(_default.arg):
+                _column.server_default = DefaultClause(text("CURRENT_TIMESTAMP"))
+
+
+async def reset_tables() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+# 生成正文用的常用字和标点
+_CHARSET = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经，，。 "
+
+
+async def seed_articles(count: int, body_size: int, chunk: int = 500) -> None:
+    """
+    插入 count 篇正文长度为 body_size 字符的文章，作者统一为 1（SQLite 默认不检查外键）
+    正文从一段固定种子生成的随机文本中按不同偏移截取，压缩率接近真实文本而不是重复字符
+    """
+    rng = random.Random(0)
+    pool = "".join(rng.choices(_CHARSET, k=1 << 20))
+    for start in range(0, count, chunk):
+        rows = []
+        for i in range(start, min(start + chunk, count)):
+            offset = rng.randrange(len(pool) - body_size) if body_size < len(pool) else 0
+            rows.append({"title": f"标题 {i}", "content": pool[offset:offset + body_size], "author_id": 1})
+        async with engine.begin() as conn:
+            await conn.execute(insert(Article), rows)
+
+
+def use_fake_redis():
+    """把各模块引用的 redis_client 替换为同一个 fakeredis 实例"""
+    import fakeredis
+
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    for name, module in list(sys.modules.items()):
+        if name.split(".")[0] in ("core", "dao", "services", "api", "utils") \
+                and getattr(module, "redis_client", None) is not None:
+            module.redis_client = client
+    return client
+
+
+async def measure(func, repeat: int) -> float:
+    """执行 repeat 次异步函数，返回单次耗时的中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return median(samples)
+
+
+async def peak_memory(func) -> float:
+    """执行一次异步函数，返回 Python 堆内存峰值（MB），单独测量避免 tracemalloc 影响耗时"""
+    tracemalloc.start()
+    try:
+        await func()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(main) -> None:
+    async def _main():
+        try:
+            await main()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_main())
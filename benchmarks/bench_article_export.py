@@ -0,0 +1,92 @@
+'''
+文章导出基准：流式导出的吞吐量和内存占用
+
+- 一次性：get_all_articles 取出全部 ORM 对象，整体序列化成一个 JSON 数组（改动前的做法）
+- 流式：services.article_export.export_articles，NDJSON / CSV，可选 gzip
+每种方式在独立子进程中执行，分别报告 行/秒、输出大小、tracemalloc 堆峰值和进程 RSS 峰值
+
+用法：python benchmarks/bench_article_export.py [--rows 20000] [--body-kb 4]
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import _common
+from _common import peak_memory, reset_tables, run, seed_articles
+
+from dao import article_dao
+from services.article_export import EXPORT_FIELDS, export_articles
+
+MODES = ("buffered", "ndjson", "ndjson+gzip", "csv", "csv+gzip")
+
+
+async def buffered_export() -> int:
+    articles = await article_dao.get_all_articles()
+    body = json.dumps(
+        [{field: getattr(a, field) for field in EXPORT_FIELDS} for a in articles],
+        default=str, ensure_ascii=False,
+    ).encode("utf-8")
+    return len(body)
+
+
+async def streaming_export(mode: str) -> int:
+    fmt, _, gz = mode.partition("+")
+    written = 0
+    async for chunk in export_articles(fmt, compress=bool(gz)):
+        written += len(chunk)
+    return written
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss 在 execve 后会继承父进程的值，Linux 下改读本进程的 VmHWM
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux 下 ru_maxrss 的单位是 KB，macOS 下是字节
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 / 1024 if sys.platform == "darwin" else maxrss / 1024
+
+
+async def run_mode(mode: str, rows: int) -> None:
+    export = buffered_export if mode == "buffered" else lambda: streaming_export(mode)
+    start = time.perf_counter()
+    written = await export()
+    elapsed = time.perf_counter() - start
+    peak = await peak_memory(export)
+    rss = peak_rss_mb()
+    print(f"{mode:<12} {rows / elapsed:>10.0f} {written / 1024 / 1024:>10.1f} {peak:>12.1f} {rss:>10.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--body-kb", type=int, default=4)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        await run_mode(args.mode, args.rows)
+        return
+
+    await reset_tables()
+    await seed_articles(args.rows, args.body_kb * 1024)
+    print(f"{_common.engine.dialect.name}, {args.rows} 篇文章，正文 {args.body_kb}KB")
+    print(f"{'方式':<10} {'行/秒':>9} {'输出(MB)':>8} {'堆峰值(MB)':>9} {'RSS(MB)':>10}", flush=True)
+    # 子进程沿用同一个 DATABASE_URL，RSS 峰值互不影响
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--rows", str(args.rows), "--mode", mode],
+            env=os.environ, check=True,
+        )
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,71 @@
+'''
+文章列表查询基准：对比整行读取和投影列读取
+
+- 整行：select(Article) 取出含完整正文的 ORM 对象，在 Python 中截取摘要（改动前的做法）
+- 投影：article_dao.get_articles_by_cursor 只取列表需要的列，摘要在数据库端截取
+每种方式分别测量单次耗时中位数和 Python 堆内存峰值
+
+用法：python benchmarks/bench_article_list_projection.py [--rows 2000] [--body-kb 20] [--page-size 20 100]
+'''
+import argparse
+
+import _common
+from _common import measure, peak_memory, reset_tables, run, seed_articles
+
+from sqlalchemy import select
+
+from core.database import use_db
+from dao import article_dao
+from models.article import Article
+from schemas.article_schemas import ListArticleVO
+from services.article_service import to_list_vo, to_summary
+
+
+async def full_row_list(page_size: int):
+    async with use_db() as db:
+        result = await db.execute(
+            select(Article)
+            .where(Article.deleted == False)
+            .order_by(Article.create_time.desc(), Article.id.desc())
+            .limit(page_size + 1)
+        )
+        return [
+            ListArticleVO(
+                id=a.id,
+                title=a.title,
+                author_id=a.author_id,
+                summary=to_summary(a.content),
+                create_time=a.create_time,
+                update_time=a.update_time,
+                view_count=a.view_count,
+            )
+            for a in result.scalars().all()
+        ]
+
+
+async def projected_list(page_size: int):
+    return to_list_vo(await article_dao.get_articles_by_cursor(page_size))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--body-kb", type=int, default=20)
+    parser.add_argument("--page-size", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    await reset_tables()
+    await seed_articles(args.rows, args.body_kb * 1024)
+    print(f"{_common.engine.dialect.name}, {args.rows} 篇文章，正文 {args.body_kb}KB")
+    print(f"{'page_size':>9} {'方式':<6} {'耗时(ms)':>10} {'内存峰值(MB)':>14}")
+    for page_size in args.page_size:
+        for name, func in (("整行", full_row_list), ("投影", projected_list)):
+            await func(page_size)  # 预热连接池和语句缓存
+            latency = await measure(lambda: func(page_size), args.repeat)
+            peak = await peak_memory(lambda: func(page_size))
+            print(f"{page_size:>9} {name:<6} {latency:>10.2f} {peak:>14.2f}")
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,84 @@
+'''
+单请求鉴权路径基准：get_current_token_claims + get_current_user
+
+- 冷：每次清空 Token 缓存（重新做 JWT 签名校验）和用户缓存（查数据库），接近改动前每个请求的开销
+- Redis：Token 缓存命中，用户快照进程内未命中、从 Redis 取（其他 worker 已加载过）
+- 热：Token 缓存命中、注销检查只查布隆过滤器、用户快照命中进程内缓存
+Redis 使用 fakeredis，真实部署中冷路径和 Redis 路径还要再加上网络往返
+
+用法：python benchmarks/bench_auth_path.py [--repeat 2000]
+'''
+import argparse
+from datetime import timedelta
+
+import _common
+from _common import reset_tables, run, use_fake_redis
+
+import jwt
+
+from core.config import config
+from core.database import AsyncSessionLocal, get_db
+from models.sys_user import SysUser
+from services import token_revocation
+from services.sys_user_cache import user_cache
+from services.sys_user_service import get_current_token_claims, get_current_user
+from utils import auth
+from utils.auth import create_access_token
+
+
+async def _create_user() -> int:
+    async with get_db() as db:
+        user = SysUser(username="bench", password="x", nickname="bench", status=True, deleted=False)
+        db.add(user)
+        await db.flush()
+        return user.id
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    redis = use_fake_redis()
+    await reset_tables()
+    user_id = await _create_user()
+    token = create_access_token({"sub": str(user_id)}, timedelta(minutes=30))
+    await token_revocation.sync_revocations()
+
+    async def request():
+        async with AsyncSessionLocal() as db:
+            claims = await get_current_token_claims(token)
+            return await get_current_user(claims, db)
+
+    async def cold():
+        auth._token_cache.clear()
+        user_cache.l1.clear()
+        # 清空 Redis 让用户快照回源数据库；布隆过滤器已同步过，清空后注销检查不受影响
+        await redis.flushdb()
+        return await request()
+
+    async def from_redis():
+        user_cache.l1.clear()
+        return await request()
+
+    print(f"{_common.engine.dialect.name}, {args.repeat} 次")
+    print(f"{'路径':<8} {'单次(µs)':>10}")
+    for name, func in (("冷", cold), ("Redis", from_redis), ("热", request)):
+        await func()
+        elapsed = await _common.measure(func, args.repeat)
+        print(f"{name:<8} {elapsed * 1000:>10.1f}")
+
+    # 单独对比 JWT 解码本身：每次签名校验 vs 命中 Token 缓存
+    jwt_only = await _common.measure(
+        lambda: _async(jwt.decode, token, config.SECRET_KEY, algorithms=[config.ALGORITHM]), args.repeat)
+    cached = await _common.measure(lambda: _async(auth.decode_token_claims, token), args.repeat)
+    print(f"{'jwt.decode':<8} {jwt_only * 1000:>10.1f}")
+    print(f"{'Token缓存':<8} {cached * 1000:>10.1f}")
+
+
+async def _async(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,85 @@
+'''
+列表接口响应序列化基准：默认流程 vs 快速响应（FAST_JSON_RESPONSE）
+
+与 api/v1/endpoints/article.py 的列表接口相同：response_model 为 APIRes[PageRes[ListArticleVO]]，
+接口返回 model_response(...)；数据在内存中预先构造好，只测量 FastAPI 处理响应的开销
+- 默认：FastAPI 按 response_model 重新校验、转成 dict、再用标准库 json 编码
+- 快速：默认响应类为 FastJSONResponse，model_response 直接用 pydantic-core 序列化一次
+通过 httpx 的 ASGITransport 在进程内请求，不经过网络
+
+用法：python benchmarks/bench_list_response.py [--rows 100 1000 10000]
+'''
+import argparse
+import time
+from datetime import datetime
+from statistics import median
+
+import _common  # noqa: F401
+from _common import run
+
+import httpx
+from fastapi import FastAPI
+
+from core.config import config
+from core.responses import FastJSONResponse, model_response
+from schemas.article_schemas import ListArticleVO
+from schemas.base import APIRes, PageMeta, PageRes
+
+ArticlePageRes = APIRes[PageRes[ListArticleVO]]
+
+
+def make_page(rows: int) -> PageRes[ListArticleVO]:
+    now = datetime.now()
+    return PageRes[ListArticleVO](
+        items=[
+            ListArticleVO(id=i, title=f"标题 {i}", author_id=1, summary="内容" * 10 + "...",
+                          create_time=now, update_time=now, view_count=i)
+            for i in range(rows)
+        ],
+        meta=PageMeta(page_size=rows),
+    )
+
+
+def make_app(page: PageRes[ListArticleVO], fast: bool) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse) if fast else FastAPI()
+
+    @app.get("/articles", response_model=ArticlePageRes)
+    async def get_articles():
+        return model_response(ArticlePageRes(data=page))
+
+    return app
+
+
+async def measure_app(app: FastAPI, fast: bool, repeat: int) -> tuple[float, bytes]:
+    # model_response 在调用时读取开关
+    config.FAST_JSON_RESPONSE = fast
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get("/articles")).content
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.get("/articles")
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+    return median(samples), body
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'行数':>6} {'默认(ms)':>10} {'快速(ms)':>10} {'倍数':>6}")
+    for rows in args.rows:
+        page = make_page(rows)
+        repeat = max(5, 3000 // rows)
+        default, default_body = await measure_app(make_app(page, fast=False), False, repeat)
+        fast, fast_body = await measure_app(make_app(page, fast=True), True, repeat)
+        # 两种方式输出的 JSON 内容必须一致
+        assert httpx.Response(200, content=default_body).json() == httpx.Response(200, content=fast_body).json()
+        print(f"{rows:>6} {default:>10.2f} {fast:>10.2f} {default / fast:>6.1f}")
+
+
+if __name__ == "__main__":
+    run(main)
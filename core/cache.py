@@ -0,0 +1,372 @@
+import asyncio
+import functools
+import inspect
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Sequence, Type
+
+from pydantic import BaseModel
+
+from . import metrics
+from .config import config
+from .local_cache import TTLCache
+from .logger import app_logger
+from .redis import redis_client, redis_binary_client, subscribe, publish
+
+'''
+两级读穿缓存：进程内 L1（TTLCache） + Redis L2
+
+- 读取顺序 L1 -> L2 -> loader，同一个 key 同时只有一个协程回源（单飞），其余协程等它的结果；
+  回源在独立的任务中执行，loader 必须自己开数据库会话（use_db(None)），不能使用调用方的会话
+- loader 返回 None 表示数据不存在，按 CACHE_NEGATIVE_TTL 短暂缓存，防止不存在的 key 反复打到数据库
+- 写入 Redis 的过期时间按 CACHE_TTL_JITTER 随机浮动，避免同一批缓存同时过期
+- 按标签失效：每个标签在 Redis 里有一个版本号，缓存值记录写入时的版本号，读取时版本号不一致视为未命中；
+  失效只需 INCR 版本号，不需要找出并删除具体的 key。同时通过发布订阅通知所有 worker，
+  各自删除该标签下的 L1 条目，并记下失效时间，失效前开始、失效后才完成的加载结果不再写入 L1
+- Redis 不可用时只用 L1 和 loader，缓存只是加速，不影响正确性
+
+用法：
+    user_cache = TwoTierCache("user", ttl=300, model=UserSnapshot)
+
+    @user_cache.cached(key="{user_id}", tags=("user:{user_id}",))
+    async def get_user(user_id: int) -> UserSnapshot | None: ...
+
+    await user_cache.invalidate(f"user:{user_id}")
+'''
+
+INVALIDATE_CHANNEL = "cache:invalidate"
+
+# 标签版本号在 Redis 中的保留时间（秒），缓存值的过期时间不会超过它，
+# 否则版本号过期归零后，版本号为 0 时写入的旧值会重新变得有效
+_TAG_VERSION_TTL = 7 * 24 * 3600
+
+_MISSING = object()
+
+CACHE_REQUESTS = metrics.Counter(
+    "cache_requests_total", "Two-tier cache lookups by result (l1_hit, l2_hit, miss)", ("cache", "result")
+)
+
+
+class Serializer(ABC):
+    """Redis 中缓存值的序列化方式，binary 为 True 时使用不解码响应的客户端"""
+
+    name = ""
+    binary = False
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes | str:
+        """序列化为写入 Redis 的值"""
+
+    @abstractmethod
+    def loads(self, data: bytes | str) -> Any:
+        """反序列化 Redis 中读出的值"""
+
+
+class JsonSerializer(Serializer):
+    name = "json"
+
+    def dumps(self, value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+    """orjson 的输出是合法的 UTF-8，可以和其他缓存共用解码响应的客户端"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value)
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._orjson.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    name = "msgpack"
+    binary = True
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS: Dict[str, Type[Serializer]] = {
+    JsonSerializer.name: JsonSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+    按名称创建序列化器；配置的序列化方式依赖的包未安装时直接报错，
+    不静默退回 json，否则同一个 Redis 里会混用不同格式，各 worker 互相读不出对方写的缓存
+
+    Args:
+        name: json / orjson / msgpack
+    """
+    serializer_class = SERIALIZERS.get(name)
+    if serializer_class is None:
+        raise ValueError(f"未知的缓存序列化方式: {name}")
+    try:
+        return serializer_class()
+    except ImportError as e:
+        raise RuntimeError(f"缓存序列化方式 {name} 需要安装对应的包（见 requirements.txt）: {e}") from e
+
+
+# 启动时（导入本模块时）校验 CACHE_SERIALIZER，配置错误或缺少依赖时应用直接启动失败
+get_serializer(config.CACHE_SERIALIZER)
+
+
+class SingleFlight:
+    """
+    进程内单飞：同一个 key 同时只有一次加载，其余调用方等待同一个结果
+
+    加载在独立的任务中执行，发起加载的调用方被取消（如客户端断开）不会中断加载，
+    也不会把 CancelledError 传给其他等待者
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已取消时避免 "Task exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+
+def _jitter(ttl: float) -> float:
+    return ttl * random.uniform(1 - config.CACHE_TTL_JITTER, 1 + config.CACHE_TTL_JITTER)
+
+
+# 名称 -> 缓存实例，用于处理其他 worker 发来的失效消息
+_caches: Dict[str, "TwoTierCache"] = {}
+
+
+class TwoTierCache:
+    """进程内 L1 + Redis L2 的读穿缓存，值需要能被序列化器处理（或通过 model 转换）"""
+
+    def __init__(self, name: str, ttl: float, *, l1_maxsize: int | None = None, l1_ttl: float | None = None,
+                 negative_ttl: float | None = None, model: Type[BaseModel] | None = None,
+                 serializer: Serializer | None = None):
+        """
+        Args:
+            name: 缓存名称，用作 Redis key 前缀、监控标签和失效消息的目标，进程内唯一
+            ttl: Redis 中的默认过期时间（秒）
+            l1_maxsize: 进程内最多缓存多少条，默认 CACHE_L1_MAX_SIZE
+            l1_ttl: 进程内过期时间（秒），默认 CACHE_L1_TTL
+            negative_ttl: 数据不存在时的缓存时间（秒），默认 CACHE_NEGATIVE_TTL
+            model: 值为 Pydantic 模型时传入，写 Redis 前 model_dump，读出后 model_validate；
+                   L1 中保存的是模型对象本身，应当是不可变的（frozen）
+            serializer: Redis 中的序列化方式，默认按 CACHE_SERIALIZER 创建
+        """
+        if name in _caches:
+            raise ValueError(f"缓存名称重复: {name}")
+        self.name = name
+        self.ttl = ttl
+        self.l1_ttl = config.CACHE_L1_TTL if l1_ttl is None else l1_ttl
+        self.negative_ttl = config.CACHE_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self.model = model
+        self.serializer = serializer or get_serializer(config.CACHE_SERIALIZER)
+        l1_maxsize = config.CACHE_L1_MAX_SIZE if l1_maxsize is None else l1_maxsize
+        # L1 条目：(开始加载的时间, 标签, 值)
+        self.l1 = TTLCache(maxsize=l1_maxsize, ttl=self.l1_ttl)
+        # 标签 -> 最近一次失效的时间，用于拦截失效时还在加载中的结果；
+        # 不按条数淘汰，保留到 L1 条目可能的最长存活时间（含随机浮动）之后再清理
+        self._invalidated: Dict[str, float] = {}
+        self._invalidated_ttl = self.l1_ttl * (1 + config.CACHE_TTL_JITTER)
+        self._flights = SingleFlight()
+        _caches[name] = self
+
+    @property
+    def _client(self):
+        return redis_binary_client if self.serializer.binary else redis_client
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.name}:k:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"cache:{self.name}:t:{tag}"
+
+    def _encode(self, value: Any) -> Any:
+        if self.model is not None and value is not None:
+            return value.model_dump(mode="json")
+        return value
+
+    def _decode(self, value: Any) -> Any:
+        if self.model is not None and value is not None:
+            return self.model.model_validate(value)
+        return value
+
+    def _l1_valid(self, started: float, tags: Sequence[str]) -> bool:
+        return all(self._invalidated.get(tag, 0.0) < started for tag in tags)
+
+    def _set_l1(self, key: str, started: float, tags: Sequence[str], value: Any) -> None:
+        if not self._l1_valid(started, tags):
+            return
+        ttl = min(self.l1_ttl, self.negative_ttl) if value is None else self.l1_ttl
+        self.l1.set(key, (started, tags, value), ttl=_jitter(ttl))
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]], *, tags: Iterable[str] = (),
+                  ttl: float | None = None) -> Any:
+        """
+        读取缓存，未命中时调用 loader 回源并写入两级缓存
+
+        Args:
+            key: 缓存 key（同一个缓存内唯一）
+            loader: 回源函数，返回 None 表示数据不存在；在独立的任务中执行，需要自己开数据库会话
+            tags: 该条缓存所属的标签，任一标签失效时该条缓存失效
+            ttl: 本次写入 Redis 的过期时间（秒），不传使用默认值
+
+        Returns:
+            Any: 缓存的值或 loader 的返回值
+        """
+        tags = tuple(tags)
+        entry = self.l1.get(key, _MISSING)
+        if entry is not _MISSING and self._l1_valid(entry[0], entry[1]):
+            CACHE_REQUESTS.labels(self.name, "l1_hit").inc()
+            return entry[2]
+        return await self._flights.do(key, lambda: self._load(key, loader, tags, ttl))
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], tags: Sequence[str],
+                    ttl: float | None) -> Any:
+        # 在读 Redis 和回源之前记下时间和版本号，加载期间发生的失效会让本次写入的缓存直接作废
+        started = time.monotonic()
+        redis_key = self._redis_key(key)
+        versions = None
+        try:
+            cached, *raw_versions = await self._client.mget([redis_key, *map(self._tag_key, tags)])
+            versions = [int(v) if v is not None else 0 for v in raw_versions]
+            if cached is not None:
+                stored_versions, value = self.serializer.loads(cached)
+                if stored_versions == versions:
+                    value = self._decode(value)
+                    CACHE_REQUESTS.labels(self.name, "l2_hit").inc()
+                    self._set_l1(key, started, tags, value)
+                    return value
+        except Exception as e:
+            app_logger.error(f"读取缓存 {self.name} 失败，回源: {e}")
+
+        CACHE_REQUESTS.labels(self.name, "miss").inc()
+        value = await loader()
+        self._set_l1(key, started, tags, value)
+        if versions is not None:
+            await self._store(redis_key, versions, value, ttl)
+        return value
+
+    async def _store(self, redis_key: str, versions: List[int], value: Any, ttl: float | None) -> None:
+        if value is None:
+            ttl = self.negative_ttl
+        elif ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        ttl = min(_jitter(ttl), _TAG_VERSION_TTL)
+        try:
+            data = self.serializer.dumps([versions, self._encode(value)])
+            await self._client.set(redis_key, data, px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            app_logger.error(f"写入缓存 {self.name} 失败: {e}")
+
+    def cached(self, key: str, tags: Sequence[str] = (), ttl: float | None = None):
+        """
+        装饰器：用被装饰函数的参数格式化 key 和标签，如 key="{user_id}"，tags=("user:{user_id}",)
+        被装饰的函数作为 loader，返回 None 表示数据不存在，它不应接收调用方的数据库会话
+
+        Args:
+            key: key 的格式化模板
+            tags: 标签的格式化模板
+            ttl: Redis 中的过期时间（秒），不传使用缓存的默认值
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = bound.arguments
+                return await self.get(
+                    key.format(**arguments),
+                    lambda: func(*args, **kwargs),
+                    tags=[tag.format(**arguments) for tag in tags],
+                    ttl=ttl,
+                )
+            return wrapper
+        return decorator
+
+    def _invalidate_local(self, tags: Iterable[str]) -> None:
+        now = time.monotonic()
+        tags = set(tags)
+        horizon = now - self._invalidated_ttl
+        for tag, invalidated_at in list(self._invalidated.items()):
+            if invalidated_at < horizon:
+                del self._invalidated[tag]
+        for tag in tags:
+            self._invalidated[tag] = now
+        self.l1.delete_where(lambda key, entry: not tags.isdisjoint(entry[1]))
+
+    async def invalidate(self, *tags: str) -> None:
+        """
+        使标签下的缓存失效：本进程立即生效，Redis 中递增标签版本号，并通知其他 worker
+
+        Args:
+            tags: 要失效的标签
+        """
+        if not tags:
+            return
+        self._invalidate_local(tags)
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                    pipe.expire(self._tag_key(tag), _TAG_VERSION_TTL)
+                await pipe.execute()
+        except Exception as e:
+            app_logger.error(f"缓存 {self.name} 标签失效失败: {e}")
+        await publish(INVALIDATE_CHANNEL, json.dumps({"cache": self.name, "tags": list(tags)}))
+
+    def stats(self) -> Dict[str, int]:
+        """进程内缓存的命中、未命中、淘汰次数等统计，供监控使用"""
+        return self.l1.stats()
+
+
+def _on_invalidate(message: str) -> None:
+    try:
+        payload = json.loads(message)
+        cache = _caches.get(payload["cache"])
+        if cache is not None:
+            cache._invalidate_local(payload["tags"])
+    except (ValueError, KeyError, TypeError):
+        app_logger.error(f"无效的缓存失效消息: {message!r}")
+
+
+subscribe(INVALIDATE_CHANNEL, _on_invalidate)
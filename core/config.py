@@ -3,7 +3,7 @@ from dotenv import load_dotenv
 
 
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 load_dotenv()  # 默认加载项目根目录下的 .env 文件
 
@@ -22,10 +22,21 @@ class Config:
     DB_NAME: str = os.getenv("DB_NAME", "fastapi_test")
     DB_CHARSET: str = os.getenv("DB_CHARSET", "utf8mb4")
     
-    # SQLAlchemy配置
-    SQLALCHEMY_DATABASE_URL: str = (
+    # SQLAlchemy配置，DATABASE_URL 可直接指定完整连接串（如本地用 sqlite+aiosqlite 测试）
+    SQLALCHEMY_DATABASE_URL: str = os.getenv(
+        "DATABASE_URL",
         f"mysql+asyncmy://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset={DB_CHARSET}"
     )
+
+    # 从库配置：多个连接串用逗号分隔，不配置时读写都走主库
+    DB_REPLICA_URLS: List[str] = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+    # 从库选择策略：least_connections（借出连接最少）或 round_robin（轮询）
+    DB_REPLICA_STRATEGY: str = os.getenv("DB_REPLICA_STRATEGY", "least_connections")
+    # 从库出错后摘除的时间（秒），以及后台健康检查的间隔（秒）
+    DB_REPLICA_EJECT_SECONDS: int = int(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+    DB_REPLICA_HEALTH_INTERVAL: int = int(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "5"))
+    # 用户提交写操作后多少秒内，该用户的请求都读主库，避开从库复制延迟
+    DB_READ_YOUR_WRITES_SECONDS: int = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
     
     # 数据库连接池配置
     DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
@@ -40,7 +51,93 @@ class Config:
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD")
     REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+    # 建立连接和单条命令的超时时间（秒），Redis 只是缓存，宁可快速失败回源数据库
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+    REDIS_COMMAND_TIMEOUT: float = float(os.getenv("REDIS_COMMAND_TIMEOUT", "1.0"))
+    # 熔断器：连续失败多少次后打开，打开后多少秒放行一次试探请求（半开）
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "5"))
+    REDIS_BREAKER_RESET_TIMEOUT: float = float(os.getenv("REDIS_BREAKER_RESET_TIMEOUT", "10"))
+    # 熔断期间后台 PING 探测的间隔（秒），探测成功立即关闭熔断器
+    REDIS_HEALTH_CHECK_INTERVAL: float = float(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "2"))
+
+    # 两级缓存配置（core/cache）：进程内 L1 + Redis L2
+    # Redis 中缓存值的序列化方式：json / orjson / msgpack（后两者依赖 requirements.txt 中的同名包，未安装时启动报错）
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "json")
+    # 进程内缓存的默认条数和过期时间（秒），其他 worker 的修改通过发布订阅通知，过期时间只是兜底
+    CACHE_L1_MAX_SIZE: int = int(os.getenv("CACHE_L1_MAX_SIZE", "10000"))
+    CACHE_L1_TTL: int = int(os.getenv("CACHE_L1_TTL", "5"))
+    # 过期时间随机浮动比例，避免同一批写入的缓存同时过期
+    CACHE_TTL_JITTER: float = float(os.getenv("CACHE_TTL_JITTER", "0.1"))
+    # 数据不存在（加载结果为 None）时缓存多久（秒），防止缓存穿透，0 表示不缓存
+    CACHE_NEGATIVE_TTL: int = int(os.getenv("CACHE_NEGATIVE_TTL", "10"))
+
+    # 用户缓存配置（进程内 + Redis），用于鉴权时按用户id查询用户
+    USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", "30"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    # Redis 中的过期时间保持较短：用户被禁用时虽然会主动失效，过期时间仍是失效消息丢失时的上限
+    USER_CACHE_REDIS_TTL: int = int(os.getenv("USER_CACHE_REDIS_TTL", "30"))
+
+    # 文章缓存配置
+    # 列表页逻辑过期时间（秒），过期后由一个协程重建，其余请求继续返回旧值
+    ARTICLE_LIST_CACHE_TTL: int = int(os.getenv("ARTICLE_LIST_CACHE_TTL", "60"))
+    # 逻辑过期后旧值还能保留多久（秒），超过后 Redis 物理删除
+    ARTICLE_LIST_CACHE_STALE_TTL: int = int(os.getenv("ARTICLE_LIST_CACHE_STALE_TTL", "300"))
+    # 文章详情缓存过期时间（秒）
+    ARTICLE_DETAIL_CACHE_TTL: int = int(os.getenv("ARTICLE_DETAIL_CACHE_TTL", "600"))
+    # 重建缓存的分布式锁超时时间（毫秒）
+    ARTICLE_CACHE_LOCK_TIMEOUT_MS: int = int(os.getenv("ARTICLE_CACHE_LOCK_TIMEOUT_MS", "3000"))
     
+    # 浏览量写回数据库的间隔（秒）
+    VIEW_FLUSH_INTERVAL: int = int(os.getenv("VIEW_FLUSH_INTERVAL", "60"))
+
+    # 导出配置：服务端游标每批拉取的行数
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # gzip 导出的压缩级别（1~9），级别越高越慢，默认 1 优先吞吐
+    EXPORT_GZIP_LEVEL: int = int(os.getenv("EXPORT_GZIP_LEVEL", "1"))
+
+    # 批量导入配置：每个分块的条数，每块单独校验并在一个事务里多行插入
+    ARTICLE_IMPORT_CHUNK_SIZE: int = int(os.getenv("ARTICLE_IMPORT_CHUNK_SIZE", "1000"))
+
+    # 搜索配置
+    # mysql: 使用 FULLTEXT 索引；memory: 进程内倒排索引（测试 / SQLite 使用）
+    SEARCH_BACKEND: str = os.getenv(
+        "SEARCH_BACKEND",
+        "mysql" if SQLALCHEMY_DATABASE_URL.startswith("mysql") else "memory"
+    )
+
+    # 密码哈希配置：Argon2 是 CPU 密集型，放到进程池里执行，不阻塞事件循环
+    # process: 进程池（创建失败时自动退回线程池）；thread: 线程池
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # 除正在执行的任务外最多排队多少个，超出直接返回 503
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
+    # 限流配置
+    # redis: 多进程共享的滑动窗口；memory: 进程内（测试使用）
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "redis")
+    # memory 后端最多记录多少个 key，超出后淘汰最久未访问的
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MEMORY_MAX_KEYS", "100000"))
+    # 登录接口限流，格式 "次数/秒数"
+    LOGIN_RATE_LIMIT_PER_IP: str = os.getenv("LOGIN_RATE_LIMIT_PER_IP", "20/60")
+    LOGIN_RATE_LIMIT_PER_USERNAME: str = os.getenv("LOGIN_RATE_LIMIT_PER_USERNAME", "5/60")
+
+    # 监控配置：/metrics 指标采集开关，以及慢查询日志阈值（毫秒）
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "yes")
+    DB_SLOW_QUERY_MS: int = int(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    # /metrics 和 /debug/latency 的访问令牌，请求头 Authorization: Bearer <令牌>；不设置时默认拒绝所有访问
+    MONITOR_TOKEN: str = os.getenv("MONITOR_TOKEN", "")
+    # 是否允许本机（127.0.0.1 / ::1）不带令牌访问监控接口，只用于本地开发；
+    # 部署在同机反向代理之后时所有外部请求都来自本机，不能开启
+    MONITOR_ALLOW_LOOPBACK: bool = os.getenv("MONITOR_ALLOW_LOOPBACK", "False").lower() in ("true", "1", "yes")
+    # 响应头是否带 Server-Timing（各阶段耗时）
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "True").lower() in ("true", "1", "yes")
+    # 访问日志采样比例（0~1），5xx 和超过 SLOW_REQUEST_MS 毫秒的请求总是记录
+    ACCESS_LOG_SAMPLE_RATE: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+    SLOW_REQUEST_MS: int = int(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+    # 快速 JSON 响应：默认响应类改用 orjson，列表接口的响应模型只序列化一次、不再按 response_model 重复校验
+    FAST_JSON_RESPONSE: bool = os.getenv("FAST_JSON_RESPONSE", "False").lower() in ("true", "1", "yes")
+
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO" if not DEBUG else "DEBUG")
     LOG_FILE: Optional[str] = os.getenv("LOG_FILE")
@@ -48,6 +145,14 @@ class Config:
         "LOG_FORMAT",
         "%(asctime)s - %(name)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s"
     )
+    # 输出 JSON 行（忽略 LOG_FORMAT），便于日志系统采集
+    LOG_JSON: bool = os.getenv("LOG_JSON", "False").lower() in ("true", "1", "yes")
+    # 日志队列长度，后台线程来不及写时超出的日志直接丢弃
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # 按 logger 限流，格式 "名称=条数/秒数"，逗号分隔，如 "sqlalchemy.engine=50/1"；ERROR 及以上不限流
+    LOG_RATE_LIMITS: str = os.getenv("LOG_RATE_LIMITS", "")
+    # 打印SQL语句（经日志队列输出），开发环境调试用
+    DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() in ("true", "1", "yes")
     
     # CORS配置
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "*").split(",")
@@ -62,6 +167,15 @@ class Config:
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     # 过期时间
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # 已验证 Token 的进程内缓存条数，缓存到 Token 的 exp 为止
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+    # 无效 Token 的缓存时间（秒），防止垃圾 Token 反复触发完整校验
+    TOKEN_CACHE_NEGATIVE_TTL: int = int(os.getenv("TOKEN_CACHE_NEGATIVE_TTL", "5"))
+    # 已注销 Token 本地布隆过滤器的容量，以及从 Redis 全量同步的间隔（秒）
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
+    TOKEN_REVOCATION_SYNC_INTERVAL: int = int(os.getenv("TOKEN_REVOCATION_SYNC_INTERVAL", "60"))
+    # 已占用用户名本地布隆过滤器的容量，用于注册时的用户名可用性检查
+    USERNAME_BLOOM_CAPACITY: int = int(os.getenv("USERNAME_BLOOM_CAPACITY", "1000000"))
 
 # 创建配置实例
 config = Config()
@@ -79,6 +193,11 @@ def get_config_dict() -> Dict[str, Any]:
             "pool_timeout": config.DB_POOL_TIMEOUT,
             "pool_recycle": config.DB_POOL_RECYCLE,
             "pool_pre_ping": config.DB_POOL_PRE_PING,
+            "replica_count": len(config.DB_REPLICA_URLS),
+            "replica_strategy": config.DB_REPLICA_STRATEGY,
+            "replica_eject_seconds": config.DB_REPLICA_EJECT_SECONDS,
+            "replica_health_interval": config.DB_REPLICA_HEALTH_INTERVAL,
+            "read_your_writes_seconds": config.DB_READ_YOUR_WRITES_SECONDS,
         },
         "redis": {
             "host": config.REDIS_HOST,
@@ -86,11 +205,74 @@ def get_config_dict() -> Dict[str, Any]:
             "db": config.REDIS_DB,
             "password": config.REDIS_PASSWORD,
             "max_connections": config.REDIS_MAX_CONNECTIONS,
+            "connect_timeout": config.REDIS_CONNECT_TIMEOUT,
+            "command_timeout": config.REDIS_COMMAND_TIMEOUT,
+            "breaker_failure_threshold": config.REDIS_BREAKER_FAILURE_THRESHOLD,
+            "breaker_reset_timeout": config.REDIS_BREAKER_RESET_TIMEOUT,
+            "health_check_interval": config.REDIS_HEALTH_CHECK_INTERVAL,
+        },
+        "cache": {
+            "serializer": config.CACHE_SERIALIZER,
+            "l1_max_size": config.CACHE_L1_MAX_SIZE,
+            "l1_ttl": config.CACHE_L1_TTL,
+            "ttl_jitter": config.CACHE_TTL_JITTER,
+            "negative_ttl": config.CACHE_NEGATIVE_TTL,
+        },
+        "user_cache": {
+            "ttl": config.USER_CACHE_TTL,
+            "max_size": config.USER_CACHE_MAX_SIZE,
+            "redis_ttl": config.USER_CACHE_REDIS_TTL,
+        },
+        "article_cache": {
+            "list_ttl": config.ARTICLE_LIST_CACHE_TTL,
+            "list_stale_ttl": config.ARTICLE_LIST_CACHE_STALE_TTL,
+            "detail_ttl": config.ARTICLE_DETAIL_CACHE_TTL,
+            "lock_timeout_ms": config.ARTICLE_CACHE_LOCK_TIMEOUT_MS,
+        },
+        "article_views": {
+            "flush_interval": config.VIEW_FLUSH_INTERVAL,
+        },
+        "export": {
+            "batch_size": config.EXPORT_BATCH_SIZE,
+            "gzip_level": config.EXPORT_GZIP_LEVEL,
+        },
+        "import": {
+            "chunk_size": config.ARTICLE_IMPORT_CHUNK_SIZE,
+        },
+        "search": {
+            "backend": config.SEARCH_BACKEND,
+        },
+        "password_hash": {
+            "executor": config.PASSWORD_HASH_EXECUTOR,
+            "workers": config.PASSWORD_HASH_WORKERS,
+            "queue_size": config.PASSWORD_HASH_QUEUE_SIZE,
+        },
+        "rate_limit": {
+            "backend": config.RATE_LIMIT_BACKEND,
+            "memory_max_keys": config.RATE_LIMIT_MEMORY_MAX_KEYS,
+            "login_per_ip": config.LOGIN_RATE_LIMIT_PER_IP,
+            "login_per_username": config.LOGIN_RATE_LIMIT_PER_USERNAME,
+        },
+        "metrics": {
+            "enabled": config.METRICS_ENABLED,
+            "db_slow_query_ms": config.DB_SLOW_QUERY_MS,
+            "monitor_token_set": bool(config.MONITOR_TOKEN),
+            "monitor_allow_loopback": config.MONITOR_ALLOW_LOOPBACK,
+            "server_timing_enabled": config.SERVER_TIMING_ENABLED,
+            "access_log_sample_rate": config.ACCESS_LOG_SAMPLE_RATE,
+            "slow_request_ms": config.SLOW_REQUEST_MS,
+        },
+        "response": {
+            "fast_json": config.FAST_JSON_RESPONSE,
         },
         "log": {
             "level": config.LOG_LEVEL,
             "file": config.LOG_FILE,
             "format": config.LOG_FORMAT,
+            "json": config.LOG_JSON,
+            "queue_size": config.LOG_QUEUE_SIZE,
+            "rate_limits": config.LOG_RATE_LIMITS,
+            "db_echo": config.DB_ECHO,
         },
         "cors": {
             "origins": config.CORS_ORIGINS,
@@ -102,5 +284,10 @@ def get_config_dict() -> Dict[str, Any]:
             "secret_key": config.SECRET_KEY,
             "algorithm": config.ALGORITHM,
             "access_token_expire_minutes": config.ACCESS_TOKEN_EXPIRE_MINUTES,
+            "token_cache_max_size": config.TOKEN_CACHE_MAX_SIZE,
+            "token_cache_negative_ttl": config.TOKEN_CACHE_NEGATIVE_TTL,
+            "token_revocation_bloom_capacity": config.TOKEN_REVOCATION_BLOOM_CAPACITY,
+            "token_revocation_sync_interval": config.TOKEN_REVOCATION_SYNC_INTERVAL,
+            "username_bloom_capacity": config.USERNAME_BLOOM_CAPACITY,
         }
     }
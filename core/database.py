@@ -1,27 +1,169 @@
+import re
+import time
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Annotated, AsyncIterator, Awaitable, Callable, Dict
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker, close_all_sessions
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker, close_all_sessions
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from . import metrics
 from .config import config
+from .db_routing import ReplicaSet, RoutingSession, on_session_committed, start_replica_probe, stop_replica_probe
 from .logger import app_logger
+from .middleware import request_stats
 
-# 创建异步引擎
-engine = create_async_engine(
-    config.SQLALCHEMY_DATABASE_URL,
-    echo=config.DEBUG,  # 打印SQL语句，开发环境下可以设置为True，便于调试
-    # 连接池配置
-    pool_size=config.DB_POOL_SIZE,  # 连接池大小
-    max_overflow=config.DB_MAX_OVERFLOW,  # 连接池溢出的最大连接数
-    pool_timeout=config.DB_POOL_TIMEOUT,  # 获取连接的超时时间（秒）
-    pool_recycle=config.DB_POOL_RECYCLE,  # 连接回收时间（秒），防止连接超时
-    pool_pre_ping=config.DB_POOL_PRE_PING  # 在使用连接前检查连接是否有效
+'''
+连接池和 SQL 监控（METRICS_ENABLED 关闭时不挂任何钩子）
+
+- 取连接等待时间：连接池子类在 _do_get 前后计时，取连接超时单独计数
+- 连接池占用：借出数、溢出数、空闲数在抓取 /metrics 时实时读取
+- SQL 耗时：按语句指纹（去掉多余空白，IN 列表和多行 VALUES 折叠为 (...)）分别统计
+- 超过 DB_SLOW_QUERY_MS 的语句写慢查询日志，只记录指纹不记录参数
+- 每条语句同时累加到当前请求的 RequestStats，由中间件汇总每个请求的 SQL 条数
+'''
+
+DB_POOL_CHECKOUT_SECONDS = metrics.Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a connection from the pool", ("engine",)
+)
+DB_POOL_TIMEOUTS = metrics.Counter(
+    "db_pool_checkout_timeouts_total", "Pool checkouts that hit DB_POOL_TIMEOUT", ("engine",)
+)
+DB_QUERY_SECONDS = metrics.Histogram(
+    "db_query_duration_seconds", "SQL statement duration by fingerprint", ("engine", "statement")
 )
+DB_QUERY_ERRORS = metrics.Counter(
+    "db_query_errors_total", "SQL statements that raised an error", ("engine",)
+)
+
+# 语句指纹的标签个数上限，超出后归入 other，防止标签无限增长
+_MAX_FINGERPRINTS = 500
+_OTHER_FINGERPRINT = "other"
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:%s|\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:%s|\?|%\(\w+\)s|:\w+))*\s*\)")
+_REPEATED_LIST_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_fingerprints: set = set()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """把 SQL 归一化为指纹，同一条查询不同参数个数的写法得到相同的指纹"""
+    text = _WHITESPACE_RE.sub(" ", statement).strip()
+    text = _PLACEHOLDER_LIST_RE.sub("(...)", text)
+    text = _REPEATED_LIST_RE.sub("(...)", text)
+    if text not in _fingerprints:
+        if len(_fingerprints) >= _MAX_FINGERPRINTS:
+            return _OTHER_FINGERPRINT
+        _fingerprints.add(text)
+    return text
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """记录取连接等待时间的连接池"""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_name).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() 会重建连接池，保留指标名
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+def _instrument_engine(async_engine: AsyncEngine, name: str) -> None:
+    sync_engine = async_engine.sync_engine
+    if isinstance(sync_engine.pool, InstrumentedPool):
+        sync_engine.pool.metrics_name = name
+    slow_query_seconds = config.DB_SLOW_QUERY_MS / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        statement_fingerprint = fingerprint(statement)
+        DB_QUERY_SECONDS.labels(name, statement_fingerprint).observe(elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+        if elapsed >= slow_query_seconds:
+            app_logger.warning(f"慢查询 {elapsed * 1000:.1f}ms [{name}] {statement_fingerprint}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        DB_QUERY_ERRORS.labels(name).inc()
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+def _create_engine(url: str, name: str):
+    async_engine = create_async_engine(
+        url,
+        # SQL 日志由 DB_ECHO 控制，在 core/logger 中接入日志队列；echo=True 会给 sqlalchemy.engine 加一个同步输出的处理器
+        echo=False,
+        # 连接池配置
+        pool_size=config.DB_POOL_SIZE,  # 连接池大小
+        max_overflow=config.DB_MAX_OVERFLOW,  # 连接池溢出的最大连接数
+        pool_timeout=config.DB_POOL_TIMEOUT,  # 获取连接的超时时间（秒）
+        pool_recycle=config.DB_POOL_RECYCLE,  # 连接回收时间（秒），防止连接超时
+        pool_pre_ping=config.DB_POOL_PRE_PING,  # 在使用连接前检查连接是否有效
+        **({"poolclass": InstrumentedPool} if config.METRICS_ENABLED else {}),
+    )
+    if config.METRICS_ENABLED:
+        _instrument_engine(async_engine, name)
+    _engines[name] = async_engine
+    return async_engine
+
+
+_engines: Dict[str, AsyncEngine] = {}
+
+# 创建异步引擎（主库）
+engine = _create_engine(config.SQLALCHEMY_DATABASE_URL, "primary")
 
-# 创建异步会话工厂
+# 从库，每个从库一个引擎和连接池，未配置时为空
+replica_set = ReplicaSet(
+    [_create_engine(url, f"replica-{i}") for i, url in enumerate(config.DB_REPLICA_URLS)],
+    strategy=config.DB_REPLICA_STRATEGY,
+)
+
+
+def _pool_stats(read) -> Callable[[], Dict[tuple, float]]:
+    return lambda: {(name, ): read(e.sync_engine.pool) for name, e in _engines.items()}
+
+
+metrics.CallbackMetric("db_pool_checked_out", "Connections currently checked out", "gauge", ("engine",),
+                       _pool_stats(lambda pool: pool.checkedout()))
+metrics.CallbackMetric("db_pool_idle", "Idle connections in the pool", "gauge", ("engine",),
+                       _pool_stats(lambda pool: pool.checkedin()))
+metrics.CallbackMetric("db_pool_overflow", "Connections opened beyond pool_size", "gauge", ("engine",),
+                       _pool_stats(lambda pool: max(0, pool.overflow())))
+RoutingSession.primary = engine
+RoutingSession.replica_set = replica_set
+
+# 创建异步会话工厂，只读查询由 RoutingSession 路由到从库
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
     future=True
 )
@@ -29,7 +171,30 @@ AsyncSessionLocal = async_sessionmaker(
 # 创建基础模型类
 Base = declarative_base()
 
-# 依赖函数：获取数据库会话
+_AFTER_COMMIT_KEY = "after_commit"
+
+
+def after_commit(db: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    注册提交成功后执行的回调，用于缓存失效等必须在数据落库之后做的事情
+    事务回滚时回调被丢弃
+
+    Args:
+        db: 当前会话
+        callback: 无参数的异步回调
+    """
+    db.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+async def _run_after_commit(session: AsyncSession) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        try:
+            await callback()
+        except Exception as e:
+            app_logger.error(f"提交后回调执行失败：{e}")
+
+
+# 获取数据库会话：正常结束时提交，异常时回滚
 @asynccontextmanager
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -37,10 +202,39 @@ async def get_db():
             yield session
             await session.commit()
         except Exception:
+            session.info.pop(_AFTER_COMMIT_KEY, None)
             await session.rollback()
             raise
         finally:
             await session.close()
+        await on_session_committed(session)
+        await _run_after_commit(session)
+
+
+'''
+DAO 使用的会话入口：调用方传入了请求级会话就直接复用（由请求结束时统一提交），
+没有传入时（脚本、后台任务）自己开一个会话并在结束时提交
+'''
+@asynccontextmanager
+async def use_db(db: AsyncSession | None = None) -> AsyncIterator[AsyncSession]:
+    if db is not None:
+        yield db
+        return
+    async with get_db() as session:
+        yield session
+
+
+'''
+FastAPI 依赖：每个请求一个会话，同一请求内的鉴权、查询、修改共用它，
+接口函数返回后、响应发送前统一提交一次（scope="function"），提交失败会以 500 返回给客户端
+会话在第一次执行 SQL 时才从连接池取连接，完全命中缓存的请求不占用连接
+'''
+async def get_session() -> AsyncIterator[AsyncSession]:
+    async with get_db() as session:
+        yield session
+
+
+DbSession = Annotated[AsyncSession, Depends(get_session, scope="function")]
 
 async def create_tables():
     """
@@ -55,13 +249,20 @@ async def create_tables():
         app_logger.error(f"数据库连接失败：{e}")
         raise e
 
+def start_db_health_check() -> None:
+    """启动从库健康检查，应用启动时调用"""
+    start_replica_probe(replica_set)
+
+
 async def shutdown_db():
     """关闭所有连接并释放引擎"""
     try:
+        await stop_replica_probe()
         # 1. 先关掉还在使用的会话
         await close_all_sessions()
         # 2. 再关掉引擎（连接池）
         await engine.dispose()
+        await replica_set.dispose()
         app_logger.info("数据库连接池已释放")
     except Exception as e:
         app_logger.error(f"关闭数据库连接失败：{e}")
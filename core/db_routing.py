@@ -0,0 +1,203 @@
+import asyncio
+import itertools
+import time
+from typing import List
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from .config import config
+from .local_cache import TTLCache
+from .logger import app_logger
+from .redis import subscribe, publish
+
+'''
+读写分离：写操作走主库，只读查询在健康的从库之间选择
+
+- 路由在 Session.get_bind 中完成：SELECT 走从库，INSERT/UPDATE/DELETE、SELECT ... FOR UPDATE、
+  原生 SQL 以及 flush 都走主库
+- 会话一旦写过主库，后续所有查询都固定走主库，同一请求内能读到自己刚写的数据
+- 会话第一次读从库时选定一个从库，之后的只读查询都用它（除非它被摘除），
+  同一请求内的多次查询看到的是同一个从库的数据，不会因复制进度不同而前后矛盾
+- 用户提交写操作后的 DB_READ_YOUR_WRITES_SECONDS 秒内，该用户的请求整体走主库，
+  避开从库复制延迟；写入记录通过 Redis 发布订阅同步到所有 worker
+- 从库执行出错（连接断开等）时被摘除一段时间，后台定期用 SELECT 1 探测，恢复后重新加入
+- 没有配置从库时所有查询都走主库，行为与单库完全一致
+'''
+
+# Session.info 中的标记
+_USE_PRIMARY_KEY = "db_use_primary"
+_WROTE_KEY = "db_wrote"
+_USER_KEY = "db_user_id"
+_REPLICA_KEY = "db_replica"
+
+RECENT_WRITER_CHANNEL = "db:recent_writer"
+
+_recent_writers = TTLCache(maxsize=config.USER_CACHE_MAX_SIZE, ttl=config.DB_READ_YOUR_WRITES_SECONDS)
+
+
+class Replica:
+    """一个从库：引擎、连接池以及摘除状态"""
+
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+    def in_use(self) -> int:
+        """当前借出的连接数，连接池不支持统计时返回0"""
+        checkedout = getattr(self.engine.sync_engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    def eject(self, reason) -> None:
+        if self.healthy:
+            app_logger.error(f"从库 {self.name} 被摘除 {config.DB_REPLICA_EJECT_SECONDS} 秒: {reason}")
+        self.ejected_until = time.monotonic() + config.DB_REPLICA_EJECT_SECONDS
+
+    def restore(self) -> None:
+        if not self.healthy:
+            app_logger.info(f"从库 {self.name} 恢复")
+        self.ejected_until = 0.0
+
+
+class ReplicaSet:
+    """从库集合，按配置的策略选择一个健康的从库"""
+
+    def __init__(self, engines: List[AsyncEngine], strategy: str = "least_connections"):
+        self.replicas = [Replica(f"replica-{i}", engine) for i, engine in enumerate(engines)]
+        self.strategy = strategy
+        self._round_robin = itertools.count()
+        for replica in self.replicas:
+            event.listen(replica.engine.sync_engine, "handle_error", self._make_error_handler(replica))
+
+    @staticmethod
+    def _make_error_handler(replica: Replica):
+        def on_error(context) -> None:
+            # 只摘除连接层面的故障，SQL 本身的错误（语法、约束等）与从库健康无关
+            if context.is_disconnect or context.connection is None:
+                replica.eject(context.original_exception)
+        return on_error
+
+    def choose(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.strategy == "round_robin":
+            return healthy[next(self._round_robin) % len(healthy)]
+        return min(healthy, key=Replica.in_use)
+
+    async def probe(self) -> None:
+        """对每个从库执行一次 SELECT 1，失败的摘除，成功的恢复"""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await conn.execute(select(1))
+                replica.restore()
+            except Exception as e:
+                replica.eject(e)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+class RoutingSession(Session):
+    """按语句类型在主库和从库之间路由的同步 Session，由 AsyncSession 包装使用"""
+
+    primary = None
+    replica_set: ReplicaSet | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica_set is None or not self.replica_set.replicas:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+        if self.info.get(_USE_PRIMARY_KEY):
+            return self.primary.sync_engine
+
+        if self._flushing or not _is_read_only(clause):
+            self.info[_USE_PRIMARY_KEY] = True
+            self.info[_WROTE_KEY] = True
+            return self.primary.sync_engine
+
+        replica = self.info.get(_REPLICA_KEY)
+        if replica is None or not replica.healthy:
+            replica = self.replica_set.choose()
+            if replica is None:
+                return self.primary.sync_engine
+            self.info[_REPLICA_KEY] = replica
+        return replica.engine.sync_engine
+
+
+def _is_read_only(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def use_primary(db: AsyncSession) -> None:
+    """让该会话后续的查询都走主库，用于必须读到最新数据的场景"""
+    db.info[_USE_PRIMARY_KEY] = True
+
+
+def bind_user(db: AsyncSession, user_id: int) -> None:
+    """
+    记录会话所属用户，用户刚提交过写操作时整个会话走主库
+
+    Args:
+        db: 当前会话
+        user_id: 当前用户ID
+    """
+    db.info[_USER_KEY] = user_id
+    if _recent_writers.get(user_id):
+        use_primary(db)
+
+
+async def on_session_committed(session: AsyncSession) -> None:
+    """会话提交后调用：写过主库的登录用户在一段时间内读主库"""
+    user_id = session.info.get(_USER_KEY)
+    if not session.info.get(_WROTE_KEY) or user_id is None:
+        return
+    _recent_writers.set(user_id, True)
+    await publish(RECENT_WRITER_CHANNEL, str(user_id))
+
+
+def _on_recent_writer(message: str) -> None:
+    try:
+        _recent_writers.set(int(message), True)
+    except ValueError:
+        app_logger.error(f"无效的写入用户消息: {message!r}")
+
+
+_probe_task: asyncio.Task | None = None
+
+
+async def _run_probe(replica_set: ReplicaSet) -> None:
+    # 启动后立即探测一次，尽早摘除不可用的从库
+    while True:
+        await replica_set.probe()
+        await asyncio.sleep(config.DB_REPLICA_HEALTH_INTERVAL)
+
+
+def start_replica_probe(replica_set: ReplicaSet) -> None:
+    """启动从库健康检查任务，没有配置从库时不启动"""
+    global _probe_task
+    if replica_set.replicas and _probe_task is None:
+        _probe_task = asyncio.create_task(_run_probe(replica_set))
+
+
+async def stop_replica_probe() -> None:
+    global _probe_task
+    if _probe_task is not None:
+        _probe_task.cancel()
+        try:
+            await _probe_task
+        except asyncio.CancelledError:
+            pass
+        _probe_task = None
+
+
+subscribe(RECENT_WRITER_CHANNEL, _on_recent_writer)
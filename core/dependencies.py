@@ -1,4 +1,8 @@
-from fastapi import Header, HTTPException
+import secrets
+
+from fastapi import Header, HTTPException, Request, status
+
+from .config import config
 
 # 读取自定义头部
 async def get_token_header(x_token: str = Header()):
@@ -8,4 +12,20 @@ async def get_token_header(x_token: str = Header()):
 
 async def get_query_token(token: str):
     if token != "jessica":
-        raise HTTPException(status_code=400, detail="No Jessica token provided")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail="No Jessica token provided")
+
+
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+# 监控接口的访问控制：默认拒绝；配置了 MONITOR_TOKEN 时校验 Bearer 令牌，
+# 显式开启 MONITOR_ALLOW_LOOPBACK 时本机请求不带令牌也放行
+async def require_monitor_access(request: Request, authorization: str | None = Header(None)):
+    if config.MONITOR_TOKEN:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() == "bearer" and secrets.compare_digest(token.encode(), config.MONITOR_TOKEN.encode()):
+            return
+    if config.MONITOR_ALLOW_LOOPBACK and request.client is not None and request.client.host in _LOOPBACK_HOSTS:
+        return
+    # 与不存在的路径一样返回 404，不暴露监控接口的存在
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
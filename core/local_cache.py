@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+'''
+进程内有界缓存：LRU 淘汰 + 条目级过期时间
+
+只在事件循环线程里使用，不做加锁；缓存的值应当是不可变对象，
+避免调用方拿到引用后修改影响其他请求
+'''
+
+_MISSING = object()
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存，记录命中、未命中、淘汰次数供监控使用"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Args:
+            maxsize: 最多缓存多少条，超出后淘汰最久未使用的
+            ttl: 默认过期时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expire_at, value = entry
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 本条的过期时间（秒），不传使用默认值，小于等于0时不缓存
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        return self._data.pop(key, _MISSING) is not _MISSING
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """删除 predicate(key, value) 为真的全部条目（包括已过期的），返回删除的条数"""
+        keys = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,24 +1,149 @@
+import atexit
+import functools
+import inspect
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import queue
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
 
 from .config import config
 
-# 创建日志记录器
-logger = logging.getLogger("app_logger")
-logger.setLevel(getattr(logging, config.LOG_LEVEL.upper(), logging.INFO))
+'''
+非阻塞日志管道
+
+- 记录日志的线程（事件循环）只把 LogRecord 放进有界队列，格式化和写控制台/文件（含文件轮转）
+  都在后台监听线程中完成；队列满时直接丢弃并计数，不阻塞请求
+- 每条日志带上当前请求的 request_id（由请求中间件设置），LOG_JSON=True 时输出 JSON 行
+- LOG_RATE_LIMITS 可以按 logger 名限制每秒条数（如 "sqlalchemy.engine=20/1"），ERROR 及以上不限流
+- SQL 日志由 DB_ECHO 控制，走同一条管道，不再使用 SQLAlchemy 自带的同步输出
+'''
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# 被丢弃的日志条数：队列已满 / 被限流
+dropped_records: Dict[str, int] = {"queue_full": 0, "rate_limited": 0}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行 JSON，便于日志系统按字段检索"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFormatter(logging.Formatter):
+    """文本格式：有 request_id 时追加在行首"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"[{request_id}] {line}" if request_id else line
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, limit: int, per_seconds: float):
+        self.rate = limit / per_seconds
+        self.capacity = float(limit)
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按 logger 名限流（令牌桶），名称匹配自身及子 logger（如 sqlalchemy.engine 匹配 sqlalchemy.engine.Engine）
+    ERROR 及以上不受限制
+    """
+
+    def __init__(self, limits: Dict[str, tuple[int, float]]):
+        super().__init__()
+        self.buckets = {name: _TokenBucket(limit, seconds) for name, (limit, seconds) in limits.items()}
+
+    def _bucket(self, name: str) -> Optional[_TokenBucket]:
+        while name:
+            bucket = self.buckets.get(name)
+            if bucket is not None:
+                return bucket
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        bucket = self._bucket(record.name)
+        if bucket is None or bucket.take():
+            return True
+        dropped_records["rate_limited"] += 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    只入队不格式化：在调用线程上只拼接 message 和取 request_id，
+    完整的格式化（时间、异常堆栈等）留给监听线程
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records["queue_full"] += 1
+
+
+def _parse_rate_limits(value: str) -> Dict[str, tuple[int, float]]:
+    # "app_logger=100/1,sqlalchemy.engine=20/1" -> {"app_logger": (100, 1.0), ...}
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, rate = item.split("=")
+        limit, seconds = rate.split("/")
+        limits[name.strip()] = (int(limit), float(seconds))
+    return limits
+
 
 # 定义日志格式
-formatter = logging.Formatter(config.LOG_FORMAT)
+formatter = JsonFormatter() if config.LOG_JSON else RequestIdFormatter(config.LOG_FORMAT)
 
-# 清除现有的处理器，避免重复添加
-logger.handlers.clear()
+# 实际输出日志的处理器，只在监听线程中执行
+output_handlers = []
 
 # 添加控制台处理器
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+output_handlers.append(console_handler)
 
 # 添加文件处理器（如果配置了日志文件）
 if config.LOG_FILE:
@@ -26,7 +151,7 @@ if config.LOG_FILE:
     log_dir = os.path.dirname(config.LOG_FILE)
     if log_dir and not os.path.exists(log_dir):
         os.makedirs(log_dir)
-    
+
     # 创建旋转文件处理器
     file_handler = RotatingFileHandler(
         config.LOG_FILE,
@@ -35,7 +160,42 @@ if config.LOG_FILE:
         encoding="utf-8"
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    output_handlers.append(file_handler)
+
+log_queue: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+# 限流在入队之前进行，被限流的日志不占队列
+_rate_limits = _parse_rate_limits(config.LOG_RATE_LIMITS)
+if _rate_limits:
+    queue_handler.addFilter(RateLimitFilter(_rate_limits))
+listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+listener.start()
+
+# 创建日志记录器
+logger = logging.getLogger("app_logger")
+logger.setLevel(getattr(logging, config.LOG_LEVEL.upper(), logging.INFO))
+
+# 清除现有的处理器，避免重复添加
+logger.handlers.clear()
+logger.addHandler(queue_handler)
+logger.propagate = False
+
+# SQL 日志：开启 DB_ECHO 时 sqlalchemy.engine 输出每条 SQL，同样只入队
+if config.DB_ECHO:
+    sql_logger = logging.getLogger("sqlalchemy.engine")
+    sql_logger.setLevel(logging.INFO)
+    sql_logger.handlers.clear()
+    sql_logger.addHandler(queue_handler)
+    sql_logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    """停止监听线程，写完队列中剩余的日志，应用退出时调用（重复调用无副作用）"""
+    if listener._thread is not None:
+        listener.stop()
+
+
+atexit.register(shutdown_logging)
 
 # 导出日志记录器
 app_logger = logger
@@ -44,7 +204,22 @@ app_logger = logger
 def log_function(func):
     """
     日志装饰器，用于记录函数调用和返回值
+    协程函数会被 await 之后再记录真正的返回值
     """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            logger.debug(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
+            try:
+                result = await func(*args, **kwargs)
+                logger.debug(f"{func.__name__} returned: {result}")
+                return result
+            except Exception as e:
+                logger.error(f"Error in {func.__name__}: {e}", exc_info=True)
+                raise
+        return async_wrapper
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         logger.debug(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
         try:
@@ -60,7 +235,7 @@ def log_function(func):
 def log_http_request(method: str, path: str, status_code: int, duration: float, client_ip: Optional[str] = None):
     """
     记录HTTP请求日志
-    
+
     Args:
         method: HTTP方法
         path: 请求路径
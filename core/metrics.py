@@ -0,0 +1,226 @@
+import bisect
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+'''
+进程内指标，输出 Prometheus 文本格式（text/plain; version=0.0.4）
+
+- Counter / Gauge / Histogram：labels(...) 返回带标签的子指标并缓存，热路径上只有一次字典查找和加法
+- CallbackMetric：抓取时才调用回调取值，用于连接池占用数、缓存命中数等已经在别处统计的数据
+- 每个 worker 进程各自统计，多进程部署时由 Prometheus 按实例分别抓取
+'''
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认的耗时分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        _registry.append(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """创建一个标签组合对应的子指标"""
+
+    @abstractmethod
+    def collect(self) -> Iterable[str]:
+        """输出该指标的样本行（不含 HELP / TYPE）"""
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """只增不减的计数"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> Iterable[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """可增可减的当前值"""
+
+    type_name = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """分桶统计，输出累计的 _bucket / _sum / _count"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def collect(self) -> Iterable[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (math.inf,), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CallbackMetric(_Metric):
+    """抓取时调用 callback 取值，callback 返回 {标签值元组: 数值}"""
+
+    def __init__(self, name: str, documentation: str, type_name: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[LabelValues, float]]):
+        super().__init__(name, documentation, labelnames)
+        self.type_name = type_name
+        self.callback = callback
+
+    def _new_child(self):
+        raise TypeError(f"{self.name} 的取值由 callback 提供，不支持 labels()")
+
+    def collect(self) -> Iterable[str]:
+        for values, value in self.callback().items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+class LatencyHistogram:
+    """
+    HDR 风格的耗时直方图：按 2 的幂分段、段内再等分 32 份，
+    任意耗时的相对误差不超过约 3%，内存固定（约 700 个计数），记录一次只是一次整数运算和加法
+    单位为微秒，超过 max_seconds 的值按 max_seconds 计
+    """
+
+    _SUB_BUCKET_BITS = 5
+    _SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+
+    def __init__(self, max_seconds: float = 60.0):
+        self._max_micros = int(max_seconds * 1_000_000)
+        self.counts = [0] * (self._index(self._max_micros) + 1)
+        self.total = 0
+        self.max_micros = 0
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        # 小于 2 * _SUB_BUCKETS 的值每微秒一个桶，之后每段的桶宽翻倍
+        if micros < 2 * cls._SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - cls._SUB_BUCKET_BITS - 1
+        return cls._SUB_BUCKETS * shift + (micros >> shift)
+
+    @classmethod
+    def _upper_bound(cls, index: int) -> int:
+        if index < 2 * cls._SUB_BUCKETS:
+            return index
+        shift = index // cls._SUB_BUCKETS - 1
+        top = index - cls._SUB_BUCKETS * shift
+        return ((top + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        micros = min(int(seconds * 1_000_000), self._max_micros)
+        self.counts[self._index(micros)] += 1
+        self.total += 1
+        if micros > self.max_micros:
+            self.max_micros = micros
+
+    def percentile(self, percent: float) -> float:
+        """返回第 percent 百分位的耗时（毫秒），没有数据时返回 0"""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max_micros) / 1000
+        return self.max_micros / 1000
+
+
+def render() -> str:
+    """把所有指标输出为 Prometheus 文本格式"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
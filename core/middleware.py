@@ -0,0 +1,178 @@
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import metrics
+from .config import config
+from .logger import log_http_request, request_id_var
+
+'''
+请求级统计和耗时
+
+- 中间件在每个请求开始时放入一个 RequestStats，数据库、Redis 的事件钩子往里累加，
+  鉴权依赖和 TimedRoute 记录 auth / serialize 阶段耗时
+- 响应头 Server-Timing 给出 db / redis / auth / serialize / total 各阶段耗时（毫秒），
+  浏览器开发者工具可以直接查看；各阶段可能重叠（如鉴权里也会查数据库）
+- 按 (方法, 路由模板) 记录 HDR 风格的耗时直方图，供 /debug/latency 查看分位数
+- 访问日志按 ACCESS_LOG_SAMPLE_RATE 采样，5xx 和超过 SLOW_REQUEST_MS 的请求总是记录
+- 请求 ID 取自请求头 X-Request-ID（没有时生成），写入日志上下文并通过响应头返回
+'''
+
+
+class RequestStats:
+    """单个请求内各阶段的调用次数和耗时（秒）"""
+
+    __slots__ = ("db_queries", "db_time", "redis_calls", "redis_time", "auth_time", "serialize_time",
+                 "endpoint_end")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.redis_calls = 0
+        self.redis_time = 0.0
+        self.auth_time = 0.0
+        self.serialize_time = 0.0
+        self.endpoint_end = 0.0
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join((
+            f'db;desc="{self.db_queries} queries";dur={self.db_time * 1000:.1f}',
+            f'redis;desc="{self.redis_calls} calls";dur={self.redis_time * 1000:.1f}',
+            f"auth;dur={self.auth_time * 1000:.1f}",
+            f"serialize;dur={self.serialize_time * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ))
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def timed_auth():
+    """统计鉴权阶段耗时，嵌套的鉴权依赖各自累加"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = request_stats.get()
+        if stats is not None:
+            stats.auth_time += time.perf_counter() - start
+
+
+REQUEST_DB_QUERIES = metrics.Histogram(
+    "http_request_db_queries",
+    "Number of SQL statements executed per request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_REDIS_CALLS = metrics.Histogram(
+    "http_request_redis_calls",
+    "Number of Redis round trips per request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds",
+    "Request duration by route template",
+    ("method", "route"),
+)
+
+# (方法, 路由模板) -> 耗时直方图
+_route_latency: Dict[Tuple[str, str], metrics.LatencyHistogram] = {}
+
+
+def route_template(scope: Scope) -> str:
+    """路由模板（如 /api/v1/article/{article_id}），未匹配到路由时返回 unmatched，避免原始路径撑爆标签"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def latency_summary() -> List[dict]:
+    """每个路由的请求数和 p50 / p95 / p99 / 最大耗时（毫秒），按 p99 倒序"""
+    summary = [
+        {
+            "method": method,
+            "route": route,
+            "count": histogram.total,
+            "p50": histogram.percentile(50),
+            "p95": histogram.percentile(95),
+            "p99": histogram.percentile(99),
+            "max": histogram.max_micros / 1000,
+        }
+        for (method, route), histogram in _route_latency.items()
+    ]
+    summary.sort(key=lambda item: item["p99"], reverse=True)
+    return summary
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+def _request_id(scope: Scope) -> str:
+    # 只接受长度合理的上游 ID，避免任意长度的请求头写进每条日志
+    for name, value in scope["headers"]:
+        if name == b"x-request-id" and 0 < len(value) <= 128:
+            return value.decode("latin-1")
+    return uuid.uuid4().hex
+
+
+def _should_log(status_code: int, duration: float) -> bool:
+    if status_code >= 500 or duration * 1000 >= config.SLOW_REQUEST_MS:
+        return True
+    return random.random() < config.ACCESS_LOG_SAMPLE_RATE
+
+
+class RequestTimingMiddleware:
+    """记录每个请求的耗时和各阶段统计"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        request_id = _request_id(scope)
+        request_id_token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                if config.SERVER_TIMING_ENABLED:
+                    headers.append("Server-Timing", stats.server_timing(time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            duration = time.perf_counter() - start
+            method = scope["method"]
+            route = route_template(scope)
+
+            histogram = _route_latency.get((method, route))
+            if histogram is None:
+                histogram = _route_latency[(method, route)] = metrics.LatencyHistogram()
+            histogram.record(duration)
+            REQUEST_SECONDS.labels(method, route).observe(duration)
+            REQUEST_DB_QUERIES.labels(route).observe(stats.db_queries)
+            REQUEST_REDIS_CALLS.labels(route).observe(stats.redis_calls)
+
+            if _should_log(status_code, duration):
+                client = scope.get("client")
+                log_http_request(method, scope["path"], status_code, duration, client[0] if client else None)
+            request_id_var.reset(request_id_token)
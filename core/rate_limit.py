@@ -0,0 +1,155 @@
+import hashlib
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, List, Sequence
+
+from fastapi import HTTPException, status
+
+from .config import config
+from .local_cache import TTLCache
+from .logger import app_logger
+from .redis import redis_client
+
+'''
+滑动窗口限流
+
+- RedisRateLimitBackend: 一段 Lua 脚本原子地检查并记录多个 key（如 IP + 用户名），
+  被拒绝的请求只花一次 Redis 往返，后续的密码校验等逻辑完全不会执行
+- InMemoryRateLimitBackend: 进程内实现，用于测试或单进程部署；
+  Redis 不可用时 check_rate_limit 临时改用它，每个 worker 各自计数，限流变宽松但不会完全失效
+限流规则写成 "次数/秒数"，如 "20/60" 表示 60 秒内最多 20 次
+'''
+
+# KEYS: 需要检查的 key；ARGV[1]: 当前毫秒时间戳，ARGV[2]: 本次请求的唯一id，
+# 之后每个 key 依次对应 (次数上限, 窗口毫秒数) 两个参数
+# 所有 key 都未超限才记录本次请求；返回需要等待的毫秒数，0 表示放行
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + i * 2])
+    local window = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, tonumber(ARGV[2 + i * 2]))
+end
+return 0
+"""
+
+
+class Rate:
+    """限流规则：window 秒内最多 limit 次"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        limit, window = value.split("/")
+        return cls(int(limit), int(window))
+
+
+class RateLimitBackend(ABC):
+    """限流后端基类"""
+
+    @abstractmethod
+    async def hit(self, keys: Sequence[str], rates: Sequence[Rate]) -> float:
+        """
+        检查并记录一次请求
+
+        Args:
+            keys: 限流 key，与 rates 一一对应
+            rates: 每个 key 的限流规则
+
+        Returns:
+            float: 需要等待的秒数，0 表示放行
+        """
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    def __init__(self):
+        self._script = redis_client.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, keys: Sequence[str], rates: Sequence[Rate]) -> float:
+        args: List = [int(time.time() * 1000), uuid.uuid4().hex]
+        for rate in rates:
+            args += [rate.limit, rate.window * 1000]
+        retry_after_ms = await self._script(keys=list(keys), args=args)
+        return int(retry_after_ms) / 1000
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int | None = None):
+        # key -> 窗口内的请求时间；最后一次请求后一个窗口内没有新请求时整条过期，key 的总数有上限
+        self._hits = TTLCache(maxsize=max_keys or config.RATE_LIMIT_MEMORY_MAX_KEYS, ttl=0)
+
+    async def hit(self, keys: Sequence[str], rates: Sequence[Rate]) -> float:
+        now = time.monotonic()
+        retry_after = 0.0
+        windows: List[Deque[float]] = []
+        for key, rate in zip(keys, rates):
+            hits = self._hits.get(key) or deque()
+            while hits and hits[0] <= now - rate.window:
+                hits.popleft()
+            if len(hits) >= rate.limit:
+                retry_after = max(retry_after, hits[0] + rate.window - now)
+            windows.append(hits)
+        if retry_after > 0:
+            return retry_after
+        for key, rate, hits in zip(keys, rates, windows):
+            hits.append(now)
+            self._hits.set(key, hits, ttl=rate.window)
+        return 0.0
+
+
+_BACKENDS = {
+    "redis": RedisRateLimitBackend,
+    "memory": InMemoryRateLimitBackend,
+}
+
+rate_limit_backend: RateLimitBackend = _BACKENDS[config.RATE_LIMIT_BACKEND]()
+# 主后端出错（Redis 不可用）时使用的进程内后端
+fallback_backend: RateLimitBackend = InMemoryRateLimitBackend()
+
+
+def make_key(scope: str, dimension: str, value: str) -> str:
+    # 用户名等外部输入做哈希，避免超长或特殊字符的 key
+    digest = hashlib.sha1(value.encode("utf-8")).hexdigest()
+    return f"ratelimit:{scope}:{dimension}:{digest}"
+
+
+async def check_rate_limit(keys: Sequence[str], rates: Sequence[Rate]) -> None:
+    """
+    检查限流，超限时抛出 429 并带上 Retry-After 头
+    限流后端不可用时改用进程内后端，不能直接放行，否则故障期间登录接口没有任何暴力破解防护
+
+    Args:
+        keys: 限流 key
+        rates: 每个 key 的限流规则
+    """
+    try:
+        retry_after = await rate_limit_backend.hit(keys, rates)
+    except Exception as e:
+        app_logger.error(f"限流检查失败，改用进程内限流: {e}")
+        retry_after = await fallback_backend.hit(keys, rates)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
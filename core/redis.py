@@ -1,21 +1,250 @@
-import redis.asyncio as redis
+import asyncio
+import time
 from contextlib import asynccontextmanager
+from typing import Annotated, Awaitable, Callable, Dict
+
+import redis.asyncio as redis
+from fastapi import Depends
+from redis.asyncio.client import Pipeline
 
+from . import metrics
 from .config import config
 from .logger import app_logger
+from .middleware import request_stats
+
+'''
+Redis 监控：取连接耗时、连接池占用、按命令统计的耗时，
+每次往返同时累加到当前请求的 RequestStats（pipeline 整体算一次往返）
+
+熔断：连接/超时错误连续达到 REDIS_BREAKER_FAILURE_THRESHOLD 次后熔断器打开，
+之后的命令不再连接 Redis，直接抛出 RedisUnavailable，调用方按原有的异常处理立即回源数据库；
+REDIS_BREAKER_RESET_TIMEOUT 秒后半开，放行一条试探命令，成功即关闭；
+熔断期间后台每 REDIS_HEALTH_CHECK_INTERVAL 秒 PING 一次，恢复后立即关闭
+'''
+
+REDIS_POOL_CHECKOUT_SECONDS = metrics.Histogram(
+    "redis_pool_checkout_seconds", "Time spent getting a connection from the Redis pool"
+)
+REDIS_COMMAND_SECONDS = metrics.Histogram(
+    "redis_command_duration_seconds", "Redis round trip duration by command", ("command",)
+)
+REDIS_COMMAND_ERRORS = metrics.Counter(
+    "redis_command_errors_total", "Redis commands that raised an error", ("command",)
+)
+
+
+def _record_command(command: str, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    REDIS_COMMAND_SECONDS.labels(command).observe(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.redis_calls += 1
+        stats.redis_time += elapsed
+
+
+class InstrumentedConnectionPool(redis.ConnectionPool):
+    """记录取连接耗时的连接池"""
+
+    async def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            REDIS_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
+
+class InstrumentedPipeline(Pipeline):
+    """整个 pipeline 作为一次往返计时"""
+
+    async def execute(self, raise_on_error: bool = True):
+        command = "MULTI" if self.is_transaction else "PIPELINE"
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        except Exception:
+            REDIS_COMMAND_ERRORS.labels(command).inc()
+            raise
+        finally:
+            _record_command(command, start)
+
+
+class InstrumentedRedis(redis.Redis):
+    """按命令名记录每次往返耗时的客户端"""
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception:
+            REDIS_COMMAND_ERRORS.labels(command).inc()
+            raise
+        finally:
+            _record_command(command, start)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class RedisUnavailable(redis.ConnectionError):
+    """熔断器打开期间直接抛出，不会尝试连接 Redis"""
+
+
+class CircuitBreaker:
+    """关闭 -> 打开 -> 半开 三态熔断器，只在事件循环线程里使用"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATES = (CLOSED, OPEN, HALF_OPEN)
+
+    # 计为失败的异常：连不上、超时；命令本身的错误（ResponseError 等）说明 Redis 可用
+    FAILURE_EXCEPTIONS = (redis.ConnectionError, redis.TimeoutError, OSError, asyncio.TimeoutError)
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多少秒进入半开，放行一次试探
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """是否放行本次调用，半开状态同时只放行一个试探调用"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def trip(self, reason) -> None:
+        """打开熔断器（或在打开状态下重新计时）"""
+        if self.state != self.OPEN:
+            app_logger.error(f"Redis 不可用，熔断 {self.reset_timeout} 秒: {reason}")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def reset(self) -> None:
+        """关闭熔断器"""
+        if self.state != self.CLOSED:
+            app_logger.info("Redis 已恢复，熔断器关闭")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self, reason) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip(reason)
+
+    def record_success(self) -> None:
+        # 打开之前发出、之后才返回的命令不关闭熔断器，恢复由试探调用或后台探测确认
+        if self.state != self.OPEN:
+            self.reset()
+
+    async def call(self, func: Callable[[], Awaitable]):
+        if not self.allow():
+            REDIS_BREAKER_REJECTED.inc()
+            raise RedisUnavailable("Redis circuit breaker is open")
+        try:
+            result = await func()
+        except self.FAILURE_EXCEPTIONS as e:
+            self.record_failure(e)
+            raise
+        except redis.RedisError:
+            self.record_success()
+            raise
+        except BaseException:
+            # 被取消等情况无法判断 Redis 是否可用，只释放试探名额
+            self._trial_in_flight = False
+            raise
+        self.record_success()
+        return result
+
+
+REDIS_BREAKER_REJECTED = metrics.Counter(
+    "redis_circuit_breaker_rejected_total", "Redis commands rejected while the circuit breaker was open"
+)
+
+redis_breaker = CircuitBreaker(config.REDIS_BREAKER_FAILURE_THRESHOLD, config.REDIS_BREAKER_RESET_TIMEOUT)
+
+metrics.CallbackMetric(
+    "redis_circuit_breaker_state", "Redis circuit breaker state (1 for the current state)", "gauge", ("state",),
+    lambda: {(state,): int(state == redis_breaker.state) for state in CircuitBreaker.STATES},
+)
+
+
+_pool_class = InstrumentedConnectionPool if config.METRICS_ENABLED else redis.ConnectionPool
+_pipeline_base = InstrumentedPipeline if config.METRICS_ENABLED else Pipeline
+_client_base = InstrumentedRedis if config.METRICS_ENABLED else redis.Redis
+
+
+class GuardedPipeline(_pipeline_base):
+    """整个 pipeline 经过熔断器"""
+
+    async def execute(self, raise_on_error: bool = True):
+        return await redis_breaker.call(lambda: super(GuardedPipeline, self).execute(raise_on_error))
+
+
+class GuardedRedis(_client_base):
+    """每条命令经过熔断器的客户端，被拒绝的命令不计入监控的往返次数"""
+
+    async def execute_command(self, *args, **options):
+        execute = super().execute_command
+        return await redis_breaker.call(lambda: execute(*args, **options))
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+_client_class = GuardedRedis
 
 # 创建Redis连接池
-redis_pool = redis.ConnectionPool(
+redis_pool = _pool_class(
     host=config.REDIS_HOST,
     port=config.REDIS_PORT,
     db=config.REDIS_DB,
     password=config.REDIS_PASSWORD,
     decode_responses=True,  # 自动解码响应为字符串
     max_connections=config.REDIS_MAX_CONNECTIONS,  # 连接池最大连接数
+    socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT,  # 建立连接超时，Redis 宕机时快速失败
+    socket_timeout=config.REDIS_COMMAND_TIMEOUT,  # 单条命令读写超时
 )
 
 # 创建Redis客户端实例
-redis_client = redis.Redis(connection_pool=redis_pool)
+redis_client = _client_class(connection_pool=redis_pool)
+
+# 不解码响应的客户端，供 msgpack 等二进制序列化的缓存使用；连接池按需建立连接，不用时不占连接
+redis_binary_pool = _pool_class(
+    host=config.REDIS_HOST,
+    port=config.REDIS_PORT,
+    db=config.REDIS_DB,
+    password=config.REDIS_PASSWORD,
+    max_connections=config.REDIS_MAX_CONNECTIONS,
+    socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT,
+    socket_timeout=config.REDIS_COMMAND_TIMEOUT,
+)
+redis_binary_client = _client_class(connection_pool=redis_binary_pool)
+
+metrics.CallbackMetric(
+    "redis_pool_connections", "Redis pool connections by state", "gauge", ("state",),
+    lambda: {
+        ("in_use",): len(redis_pool._in_use_connections),
+        ("idle",): len(redis_pool._available_connections),
+    },
+)
 
 
 @asynccontextmanager
@@ -38,11 +267,25 @@ async def get_redis():
         pass
 
 
+def get_redis_client() -> redis.Redis:
+    """
+    FastAPI 依赖：返回共享的 Redis 客户端
+    测试时可以替换为 fakeredis 等替身:
+    app.dependency_overrides[get_redis_client] = lambda: fakeredis.FakeAsyncRedis(decode_responses=True)
+    """
+    return redis_client
+
+
+RedisClient = Annotated[redis.Redis, Depends(get_redis_client)]
+
+
 async def close_redis():
     """关闭Redis连接池"""
     try:
         await redis_client.close()
         await redis_pool.disconnect()
+        await redis_binary_client.close()
+        await redis_binary_pool.disconnect()
         app_logger.info("Redis连接池已关闭")
     except Exception as e:
         app_logger.error(f"关闭Redis连接失败: {e}")
@@ -57,4 +300,121 @@ async def init_redis():
         return True
     except Exception as e:
         app_logger.error(f"Redis连接失败: {e}")
-        return False
\ No newline at end of file
+        # 启动时就连不上，直接熔断，避免最初的请求逐个等待连接超时
+        redis_breaker.trip(e)
+        return False
+
+
+_health_check_task: asyncio.Task | None = None
+
+
+async def _run_health_check() -> None:
+    while True:
+        await asyncio.sleep(config.REDIS_HEALTH_CHECK_INTERVAL)
+        if redis_breaker.state == CircuitBreaker.CLOSED:
+            continue
+        try:
+            # 绕过熔断器直接 PING
+            await redis.Redis.execute_command(redis_client, "PING")
+        except Exception as e:
+            redis_breaker.trip(e)
+        else:
+            redis_breaker.reset()
+
+
+def start_redis_health_check() -> None:
+    """启动后台探测任务（熔断期间才真正 PING），在 lifespan 中调用"""
+    global _health_check_task
+    if _health_check_task is None:
+        _health_check_task = asyncio.create_task(_run_health_check())
+
+
+async def stop_redis_health_check() -> None:
+    global _health_check_task
+    if _health_check_task is not None:
+        _health_check_task.cancel()
+        try:
+            await _health_check_task
+        except asyncio.CancelledError:
+            pass
+        _health_check_task = None
+
+
+# ------------- 发布订阅
+# 多个 worker 之间广播本地缓存失效等消息，所有频道共用一个订阅连接
+PubSubHandler = Callable[[str], Awaitable[None] | None]
+
+_pubsub_handlers: Dict[str, PubSubHandler] = {}
+_pubsub_task: asyncio.Task | None = None
+
+# 订阅连接断开后的重连间隔（秒）
+_PUBSUB_RETRY_INTERVAL = 1.0
+# 等待消息的单次超时（秒）；阻塞读取会受 socket_timeout 限制，空闲时被当作连接超时
+_PUBSUB_POLL_TIMEOUT = 1.0
+
+
+def subscribe(channel: str, handler: PubSubHandler) -> None:
+    """
+    注册频道处理函数，需要在 start_pubsub_listener 之前调用
+
+    Args:
+        channel: 频道名
+        handler: 收到消息时调用，参数为消息内容，可以是普通函数或协程函数
+    """
+    _pubsub_handlers[channel] = handler
+
+
+async def publish(channel: str, message: str) -> None:
+    """发布消息，Redis 不可用时只记录日志"""
+    try:
+        await redis_client.publish(channel, message)
+    except Exception as e:
+        app_logger.error(f"Redis发布消息失败 {channel}: {e}")
+
+
+async def _listen() -> None:
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(*_pubsub_handlers)
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=_PUBSUB_POLL_TIMEOUT)
+                if message is None:
+                    continue
+                handler = _pubsub_handlers.get(message["channel"])
+                if handler is None:
+                    continue
+                try:
+                    result = handler(message["data"])
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    app_logger.error(f"处理订阅消息失败 {message['channel']}: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            app_logger.error(f"Redis订阅连接断开，{_PUBSUB_RETRY_INTERVAL}s 后重连: {e}")
+            await asyncio.sleep(_PUBSUB_RETRY_INTERVAL)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def start_pubsub_listener() -> None:
+    """启动订阅监听任务，在 lifespan 中调用"""
+    global _pubsub_task
+    if _pubsub_task is None and _pubsub_handlers:
+        _pubsub_task = asyncio.create_task(_listen())
+
+
+async def stop_pubsub_listener() -> None:
+    global _pubsub_task
+    if _pubsub_task is not None:
+        _pubsub_task.cancel()
+        try:
+            await _pubsub_task
+        except asyncio.CancelledError:
+            pass
+        _pubsub_task = None
@@ -0,0 +1,56 @@
+import json
+from typing import Any, Mapping
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .config import config
+
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖，未安装时使用标准库 json
+    orjson = None
+
+'''
+快速 JSON 响应（FAST_JSON_RESPONSE=True 时启用）
+
+- FastJSONResponse 作为应用的默认响应类：普通 dict/list 用 orjson 序列化，
+  Pydantic 模型直接用 pydantic-core 一次输出为 JSON
+- model_response：接口已经构造好了与 response_model 同类型的模型实例（如 APIRes[PageRes[ListArticleVO]]），
+  直接返回响应，跳过 FastAPI 按 response_model 再做一遍校验、转成 dict、再用标准库 json 编码的过程；
+  response_model 仍然保留，用于生成 OpenAPI 文档
+- 未启用时 model_response 原样返回模型，走 FastAPI 默认流程
+'''
+
+
+def dumps(value: Any) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON，安装了 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Pydantic 模型用 pydantic-core 序列化，其他内容用 orjson（未安装时退回标准库）"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200, headers: Mapping[str, str] | None = None):
+    """
+    把已经校验过的响应模型直接序列化一次返回
+
+    Args:
+        model: 与接口 response_model 类型一致的模型实例
+        status_code: HTTP状态码
+        headers: 额外的响应头
+
+    Returns:
+        FastJSONResponse: 启用快速响应时返回；未启用时原样返回 model
+    """
+    if not config.FAST_JSON_RESPONSE:
+        return model
+    return FastJSONResponse(model, status_code=status_code, headers=headers)
@@ -0,0 +1,59 @@
+import functools
+import inspect
+import time
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from .middleware import request_stats
+
+'''
+带阶段计时的路由类：APIRouter(route_class=TimedRoute)
+
+接口函数返回之后到生成 Response 之间（response_model 校验、JSON 序列化）计为 serialize 阶段，
+写入当前请求的 RequestStats，由中间件输出到 Server-Timing
+'''
+
+
+def _mark_endpoint_end(endpoint: Callable) -> Callable:
+    # functools.wraps 保留 __wrapped__，FastAPI 依然按原函数的签名解析参数
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _record_endpoint_end()
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _record_endpoint_end()
+    return sync_wrapper
+
+
+def _record_endpoint_end() -> None:
+    stats = request_stats.get()
+    if stats is not None:
+        stats.endpoint_end = time.perf_counter()
+
+
+class TimedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _mark_endpoint_end(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            stats = request_stats.get()
+            if stats is not None and stats.endpoint_end:
+                stats.serialize_time += time.perf_counter() - stats.endpoint_end
+            return response
+
+        return timed_handler
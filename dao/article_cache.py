@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, List
+
+from core.cache import SingleFlight, TwoTierCache
+from core.config import config
+from core.logger import app_logger
+from core.redis import redis_client
+
+'''
+文章列表、详情的 Redis 读穿缓存
+
+- 版本号失效：所有列表页的 key 都带上当前代数 article:list:v{gen}:...，
+  写操作只需 INCR 代数，旧代数的 key 不再被读到，靠 TTL 自然过期，不需要 KEYS/SCAN 扫描删除
+- 防击穿：缓存值里带逻辑过期时间，过期后只有抢到锁的协程去数据库重建，
+  其余请求直接返回旧值；完全没有缓存时，没抢到锁的请求短暂等待别人写入
+- 详情按文章 id 缓存序列化好的响应体和 ETag，使用进程内 + Redis 两级缓存（core/cache），
+  不存在的文章也短暂缓存；修改文章时按标签失效，所有 worker 同步
+- 缓存里的浏览量只是加载时的快照，读取时替换为 Redis 中的展示浏览量（dao/article_views），写回数据库不失效缓存
+- Redis 不可用时直接回源数据库，缓存只是加速，不影响正确性
+'''
+
+LIST_GENERATION_KEY = "article:list:gen"
+LIST_PAGE_KEY = "article:list:v{gen}:{page_key}"
+LOCK_KEY_SUFFIX = ":lock"
+
+# 等待其他实例重建缓存时的轮询间隔（秒）
+_WAIT_INTERVAL = 0.05
+
+# 只删除自己持有的锁，防止锁超时后误删别人的锁
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 进程内单飞：同一个 key 同时只有一个协程回源，其余协程等它的结果
+_flights = SingleFlight()
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+async def get_list_generation() -> int:
+    generation = await redis_client.get(LIST_GENERATION_KEY)
+    return int(generation) if generation else 0
+
+
+async def bump_list_generation() -> None:
+    """文章发生增删改后调用，使所有列表页缓存一次性失效"""
+    try:
+        await redis_client.incr(LIST_GENERATION_KEY)
+    except Exception as e:
+        app_logger.error(f"文章列表缓存失效失败: {e}")
+
+
+async def get_list_page(page_key: str, loader: Loader) -> Any:
+    """
+    读取一页文章列表缓存，未命中或已过期时调用 loader 回源
+
+    Args:
+        page_key: 页的标识（分页方式 + 游标/页码 + 每页大小）
+        loader: 回源函数，返回可 JSON 序列化的数据；在独立的任务中执行，需要自己开数据库会话
+
+    Returns:
+        Any: 缓存中的数据或 loader 的返回值
+    """
+    try:
+        generation = await get_list_generation()
+        key = LIST_PAGE_KEY.format(gen=generation, page_key=page_key)
+        cached = await redis_client.get(key)
+    except Exception as e:
+        app_logger.error(f"读取文章列表缓存失败，回源数据库: {e}")
+        return await loader()
+
+    if cached is not None:
+        entry = json.loads(cached)
+        if entry["expire_at"] > time.time():
+            return entry["data"]
+        # 逻辑过期：抢到锁的去重建，没抢到的直接返回旧值
+        return await _flights.do(key, lambda: _rebuild(key, loader, stale=entry["data"]))
+
+    return await _flights.do(key, lambda: _rebuild(key, loader))
+
+
+async def _rebuild(key: str, loader: Loader, stale: Any = None) -> Any:
+    lock_key = key + LOCK_KEY_SUFFIX
+    token = uuid.uuid4().hex
+    try:
+        acquired = await redis_client.set(lock_key, token, nx=True, px=config.ARTICLE_CACHE_LOCK_TIMEOUT_MS)
+    except Exception as e:
+        app_logger.error(f"获取文章列表缓存锁失败，回源数据库: {e}")
+        return await loader()
+
+    if not acquired:
+        if stale is not None:
+            return stale
+        return await _wait_for_rebuild(key, loader)
+
+    try:
+        data = await loader()
+        await _store(key, data)
+        return data
+    finally:
+        try:
+            await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            app_logger.error(f"释放文章列表缓存锁失败: {e}")
+
+
+async def _wait_for_rebuild(key: str, loader: Loader) -> Any:
+    """其他实例正在重建，等到锁超时为止，仍然没有结果就自己回源"""
+    deadline = time.monotonic() + config.ARTICLE_CACHE_LOCK_TIMEOUT_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_WAIT_INTERVAL)
+        try:
+            cached = await redis_client.get(key)
+        except Exception as e:
+            app_logger.error(f"读取文章列表缓存失败，回源数据库: {e}")
+            break
+        if cached is not None:
+            return json.loads(cached)["data"]
+    return await loader()
+
+
+async def _store(key: str, data: Any) -> None:
+    entry = {"expire_at": time.time() + config.ARTICLE_LIST_CACHE_TTL, "data": data}
+    try:
+        await redis_client.set(
+            key,
+            json.dumps(entry, ensure_ascii=False),
+            ex=config.ARTICLE_LIST_CACHE_TTL + config.ARTICLE_LIST_CACHE_STALE_TTL,
+        )
+    except Exception as e:
+        app_logger.error(f"写入文章列表缓存失败: {e}")
+
+
+detail_cache = TwoTierCache("article_detail", ttl=config.ARTICLE_DETAIL_CACHE_TTL)
+DETAIL_TAG = "article:{article_id}"
+
+
+async def delete_detail(article_id: int) -> None:
+    await delete_details([article_id])
+
+
+async def delete_details(article_ids: List[int]) -> None:
+    if not article_ids:
+        return
+    await detail_cache.invalidate(*(DETAIL_TAG.format(article_id=i) for i in article_ids))
@@ -1,42 +1,261 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, Dict, List
 
-from sqlalchemy import select, update
+from sqlalchemy import Select, select, update, insert, func, or_, and_, case
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import use_db, after_commit
+from core.db_routing import use_primary
+from dao import article_cache
 from models.article import Article
 from schemas.article_schemas import ArticleVO, ArticleUpdate
 
+# 列表摘要长度（字符数）
+SUMMARY_LENGTH = 20
 
-async def get_all_articles() -> List[ArticleVO]:
-    async with (get_db() as db):
+
+'''
+列表专用的轻量行对象：只包含列表需要的列，content 只取前 SUMMARY_LENGTH + 1 个字符
+（多取一个字符用来判断是否需要加省略号），不进入 session 的 identity map
+'''
+@dataclass(frozen=True, slots=True)
+class ArticleListRow:
+    id: int
+    title: str
+    author_id: int
+    content_prefix: str
+    create_time: datetime
+    update_time: datetime | None
+    view_count: int
+
+
+# 列表查询的投影列，摘要在数据库端截取，不把整篇 Text 拉到应用里
+_LIST_COLUMNS = (
+    Article.id,
+    Article.title,
+    Article.author_id,
+    func.substr(Article.content, 1, SUMMARY_LENGTH + 1).label("content_prefix"),
+    Article.create_time,
+    Article.update_time,
+    Article.view_count,
+)
+
+
+def _to_list_rows(result) -> List[ArticleListRow]:
+    return [ArticleListRow(*row) for row in result.all()]
+
+
+async def get_all_articles(db: AsyncSession | None = None) -> List[ArticleVO]:
+    async with use_db(db) as db:
         result = await db.execute(select(Article).where(Article.deleted == False))
         return result.scalars().all()
 
 
-async def get_article_by_id(article_id) -> ArticleVO:
-    async with (get_db() as db):
+'''
+游标分页（keyset）：按 (create_time, id) 倒序，
+用上一页最后一条的排序键作为起点，翻到多深都只扫描 page_size 行
+多查一条用于判断是否还有下一页
+传 author_id 时只查该作者的文章，走 idx_author_deleted_create_time_id，否则走 idx_deleted_create_time_id
+'''
+async def get_articles_by_cursor(page_size: int,
+                                 cursor: tuple[datetime, int] | None = None,
+                                 author_id: int | None = None,
+                                 db: AsyncSession | None = None) -> List[ArticleListRow]:
+    async with use_db(db) as db:
+        result = await db.execute(cursor_list_statement(page_size, cursor, author_id))
+        return _to_list_rows(result)
+
+
+# 游标分页的查询语句，测试中对它做 EXPLAIN 检查索引使用情况
+def cursor_list_statement(page_size: int,
+                          cursor: tuple[datetime, int] | None = None,
+                          author_id: int | None = None) -> Select:
+    stmt = select(*_LIST_COLUMNS).where(Article.deleted == False)
+    if author_id is not None:
+        stmt = stmt.where(Article.author_id == author_id)
+    if cursor is not None:
+        last_time, last_id = cursor
+        # 展开成 OR 形式而不是行值比较 (a, b) < (x, y)，MySQL 对前者才能稳定走索引范围扫描
+        stmt = stmt.where(or_(
+            Article.create_time < last_time,
+            and_(Article.create_time == last_time, Article.id < last_id),
+        ))
+    return stmt.order_by(Article.create_time.desc(), Article.id.desc()).limit(page_size + 1)
+
+
+'''
+偏移分页：需要 count 总数，页码越深越慢，只适合数据量小的后台页面
+'''
+async def get_articles_by_page(page: int, page_size: int,
+                               db: AsyncSession | None = None) -> tuple[List[ArticleListRow], int]:
+    async with use_db(db) as db:
+        total = await db.scalar(
+            select(func.count()).select_from(Article).where(Article.deleted == False)
+        )
+        result = await db.execute(
+            select(*_LIST_COLUMNS)
+            .where(Article.deleted == False)
+            .order_by(Article.create_time.desc(), Article.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        return _to_list_rows(result), total or 0
+
+
+'''
+MySQL 全文检索：MATCH ... AGAINST 自然语言模式，按相关度排序
+依赖 models/article.py 中的 FULLTEXT 索引 ft_article_title_content
+'''
+async def search_articles_fulltext(q: str, page: int, page_size: int,
+                                   db: AsyncSession | None = None) -> tuple[List[ArticleListRow], int]:
+    async with use_db(db) as db:
+        score = match(Article.title, Article.content, against=q)
+        condition = and_(Article.deleted == False, score > 0)
+        total = await db.scalar(select(func.count()).select_from(Article).where(condition))
+        result = await db.execute(
+            select(*_LIST_COLUMNS)
+            .where(condition)
+            .order_by(score.desc(), Article.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        return _to_list_rows(result), total or 0
+
+
+'''
+取出建立内存索引需要的完整文章（含正文），不传 article_ids 时取全部未删除文章
+'''
+async def get_articles_for_index(article_ids: List[int] | None = None) -> List[Article]:
+    async with use_db() as db:
+        stmt = select(Article).where(Article.deleted == False)
+        if article_ids is not None:
+            stmt = stmt.where(Article.id.in_(article_ids))
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+
+'''
+流式读取全部未删除文章，用于导出
+AsyncSession.stream 使用服务端游标，yield_per 控制每次从驱动拉取的行数，内存占用与表大小无关
+'''
+async def stream_articles(batch_size: int = 1000) -> AsyncIterator:
+    async with use_db() as db:
+        result = await db.stream(
+            select(
+                Article.id,
+                Article.title,
+                Article.content,
+                Article.author_id,
+                Article.create_time,
+                Article.update_time,
+                Article.view_count,
+            )
+            .where(Article.deleted == False)
+            .order_by(Article.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield row
+
+
+async def get_article_by_id(article_id, db: AsyncSession | None = None) -> ArticleVO:
+    async with use_db(db) as db:
         result = await db.execute(select(Article).where(Article.id == article_id, Article.deleted == False))
         return result.scalars().first()
 
 
-async def edit_article(article_id: int, article : ArticleUpdate) -> bool:
-    async with (get_db() as db):
+'''
+批量插入文章：一个事务内执行一条多行 INSERT ... VALUES，不逐行 refresh
+'''
+async def bulk_insert_articles(rows: List[dict]) -> int:
+    if not rows:
+        return 0
+    async with use_db() as db:
+        await db.execute(insert(Article), rows)
+        after_commit(db, article_cache.bump_list_generation)
+    return len(rows)
+
+
+'''
+把 Redis 中累积的浏览量增量批量写回：一条 UPDATE ... SET view_count = view_count + CASE id ... END
+显式把 update_time 设为原值，避免触发 ON UPDATE CURRENT_TIMESTAMP 改动文章的修改时间
+'''
+async def apply_view_deltas(deltas: Dict[int, int]) -> None:
+    if not deltas:
+        return
+    async with use_db() as db:
+        await db.execute(
+            update(Article)
+            .where(Article.id.in_(list(deltas)))
+            .values(
+                view_count=Article.view_count + case(deltas, value=Article.id, else_=0),
+                update_time=Article.update_time,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+'''
+读取文章当前的浏览量，用于初始化 Redis 中的展示浏览量
+必须读主库：从库的复制延迟会让读到的值落后于已经写回的增量
+'''
+async def get_view_counts(article_ids: List[int]) -> Dict[int, int]:
+    if not article_ids:
+        return {}
+    async with use_db() as db:
+        use_primary(db)
+        result = await db.execute(
+            select(Article.id, Article.view_count)
+            .where(Article.id.in_(article_ids), Article.deleted == False)
+        )
+        return {article_id: view_count for article_id, view_count in result.all()}
+
+
+'''
+修改文章：一条 UPDATE 同时完成作者校验和乐观锁校验
+WHERE id=? AND author_id=? AND deleted=0 AND version=?，命中一行即修改成功，版本号 +1
+返回 False 时由调用方用 get_article_edit_state 区分是不存在、无权限还是版本冲突
+缓存在事务提交之后才失效，避免其他请求在提交前把旧数据重新写回缓存
+'''
+async def edit_article(article_id: int, author_id: int, article : ArticleUpdate,
+                       db: AsyncSession | None = None) -> bool:
+    async with use_db(db) as db:
         # 构建更新数据字典
         update_values = {
             "title": article.title,
             "content": article.content,
-            "update_time": datetime.now()
+            "update_time": datetime.now(),
+            "version": Article.version + 1,
         }
 
-        # 执行更新
-        await db.execute(
+        # 执行更新，事务由调用方的会话统一提交
+        result = await db.execute(
             update(Article)
-            .where(Article.id == article_id, Article.deleted == False)
+            .where(
+                Article.id == article_id,
+                Article.author_id == author_id,
+                Article.deleted == False,
+                Article.version == article.version,
+            )
             .values(update_values)
+            .execution_options(synchronize_session=False)
         )
+        updated = result.rowcount == 1
+        if updated:
+            after_commit(db, article_cache.bump_list_generation)
+            after_commit(db, lambda: article_cache.delete_detail(article_id))
+    return updated
 
-        # 提交事务
-        await db.commit()
 
-        return True
+'''
+修改失败时查询文章的作者和版本号，只在失败路径上执行
+'''
+async def get_article_edit_state(article_id: int, db: AsyncSession | None = None):
+    async with use_db(db) as db:
+        result = await db.execute(
+            select(Article.author_id, Article.version)
+            .where(Article.id == article_id, Article.deleted == False)
+        )
+        return result.first()
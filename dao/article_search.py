@@ -0,0 +1,190 @@
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import config
+from core.logger import app_logger
+from dao import article_dao
+from dao.article_dao import ArticleListRow, SUMMARY_LENGTH
+
+'''
+文章全文检索，索引实现可插拔：
+
+- MySQLFulltextBackend: 生产环境使用，依赖 article 表上的 FULLTEXT(ngram) 索引
+- InMemoryBackend: 进程内倒排索引，用于测试和 SQLite，启动时全量建立，
+  文章修改后按 id 增量更新（仅对当前进程生效，不适合多 worker 部署）
+
+两者返回相同的 ArticleListRow，由 service 转换为 ListArticleVO
+'''
+
+# 标题命中的权重，高于正文
+_TITLE_WEIGHT = 2.0
+
+# 连续的中日韩字符 / 连续的字母数字
+_TOKEN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+|[0-9a-z]+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：中日韩文本按相邻两个字切分（与 MySQL ngram_token_size=2 一致），字母数字按单词切分
+
+    Args:
+        text: 待分词文本
+
+    Returns:
+        List[str]: 词项列表（含重复）
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class SearchBackend(ABC):
+    """检索后端基类"""
+
+    async def rebuild(self) -> None:
+        """全量建立索引，数据库自带索引的后端无需实现"""
+
+    async def refresh_articles(self, article_ids: List[int]) -> None:
+        """文章新增或修改后增量更新索引，数据库自带索引的后端无需实现"""
+
+    @abstractmethod
+    async def search(self, q: str, page: int, page_size: int,
+                     db: AsyncSession | None = None) -> tuple[List[ArticleListRow], int]:
+        """
+        按相关度检索文章
+
+        Args:
+            q: 查询词
+            page: 页码，从1开始
+            page_size: 每页大小
+            db: 数据库会话，查数据库的后端使用
+
+        Returns:
+            tuple[List[ArticleListRow], int]: (当前页结果, 命中总数)
+        """
+
+
+class MySQLFulltextBackend(SearchBackend):
+    """基于 MySQL FULLTEXT 索引的检索"""
+
+    async def search(self, q: str, page: int, page_size: int,
+                     db: AsyncSession | None = None) -> tuple[List[ArticleListRow], int]:
+        return await article_dao.search_articles_fulltext(q, page, page_size, db)
+
+
+class InMemoryBackend(SearchBackend):
+    """进程内倒排索引，TF-IDF 打分"""
+
+    def __init__(self):
+        # 词项 -> {文章id: 加权词频}
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        # 文章id -> 该文章包含的词项，用于增量更新时删除旧的倒排项
+        self._doc_terms: Dict[int, set] = {}
+        self._rows: Dict[int, ArticleListRow] = {}
+
+    async def rebuild(self) -> None:
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._rows.clear()
+        for article in await article_dao.get_articles_for_index():
+            self._add(article)
+        app_logger.info(f"文章内存索引建立完成，共 {len(self._rows)} 篇")
+
+    async def refresh_articles(self, article_ids: List[int]) -> None:
+        articles = await article_dao.get_articles_for_index(article_ids)
+        for article_id in article_ids:
+            self._remove(article_id)
+        # 已删除的文章查不出来，删除旧索引后不再加回
+        for article in articles:
+            self._add(article)
+
+    async def search(self, q: str, page: int, page_size: int,
+                     db: AsyncSession | None = None) -> tuple[List[ArticleListRow], int]:
+        scores: Dict[int, float] = defaultdict(float)
+        doc_count = len(self._rows) or 1
+        for term in set(tokenize(q)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + doc_count / len(postings))
+            for article_id, tf in postings.items():
+                scores[article_id] += tf * idf
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        start = (page - 1) * page_size
+        rows = [self._rows[article_id] for article_id, _ in ranked[start:start + page_size]]
+        return rows, len(ranked)
+
+    def _add(self, article) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for term in tokenize(article.title):
+            weights[term] += _TITLE_WEIGHT
+        for term in tokenize(article.content):
+            weights[term] += 1.0
+        for term, weight in weights.items():
+            self._postings[term][article.id] = weight
+        self._doc_terms[article.id] = set(weights)
+        self._rows[article.id] = ArticleListRow(
+            id=article.id,
+            title=article.title,
+            author_id=article.author_id,
+            content_prefix=article.content[:SUMMARY_LENGTH + 1],
+            create_time=article.create_time,
+            update_time=article.update_time,
+            view_count=article.view_count,
+        )
+
+    def _remove(self, article_id: int) -> None:
+        for term in self._doc_terms.pop(article_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(article_id, None)
+            if not postings:
+                del self._postings[term]
+        self._rows.pop(article_id, None)
+
+
+_BACKENDS = {
+    "mysql": MySQLFulltextBackend,
+    "memory": InMemoryBackend,
+}
+
+search_backend: SearchBackend = _BACKENDS[config.SEARCH_BACKEND]()
+
+
+async def init_search() -> None:
+    """应用启动时调用，内存索引在此全量建立"""
+    try:
+        await search_backend.rebuild()
+    except Exception as e:
+        app_logger.error(f"文章索引建立失败: {e}")
+
+
+async def on_articles_changed(article_ids: List[int]) -> None:
+    """文章新增、修改后调用，保持索引与数据库一致"""
+    try:
+        await search_backend.refresh_articles(article_ids)
+    except Exception as e:
+        app_logger.error(f"文章索引更新失败: {e}")
+
+
+async def on_articles_imported() -> None:
+    """批量导入后调用，批量插入拿不到新文章 id，内存索引直接全量重建"""
+    try:
+        await search_backend.rebuild()
+    except Exception as e:
+        app_logger.error(f"文章索引重建失败: {e}")
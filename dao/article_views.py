@@ -0,0 +1,189 @@
+import uuid
+from typing import Dict, List, Tuple
+
+from core.logger import app_logger
+from core.redis import redis_client
+
+'''
+文章浏览量的 Redis 缓冲区
+
+每次浏览只对 article:views:pending 哈希做一次 HINCRBY，不碰数据库；
+后台任务定期把整个哈希 RENAME 走（原子操作，之后的浏览写入新的哈希），
+读出增量后批量写回 MySQL，期间新的浏览不会丢失也不会被重复计算
+
+正在写回的哈希登记在 article:views:flushing 集合中，直到数据库提交后才删除
+
+展示用的浏览量保存在 article:views:total 哈希中（= 数据库中的值 + 尚未写回的增量），
+每次浏览与 pending 在同一个脚本里 +1，写回数据库不改变它，所以读到的浏览量不会因写回而倒退或重复计算；
+缓存的列表和详情里的 view_count 只是加载时的快照，读取时以 total 为准
+某篇文章还不在 total 中时，由服务层从数据库读出当前值后用 seed_total_views 初始化
+'''
+
+PENDING_KEY = "article:views:pending"
+FLUSHING_KEY = "article:views:flushing:{token}"
+FLUSHING_SET_KEY = "article:views:flushing"
+TOTAL_KEY = "article:views:total"
+# 每次写回结束（提交或回填）+1，用于判断初始化 total 期间是否发生过写回
+FLUSH_SEQ_KEY = "article:views:flush_seq"
+
+# 缓冲区 +1，已经初始化过的展示浏览量同时 +1；返回缓冲区中的增量
+_INCR_SCRIPT = """
+local pending = redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+end
+return pending
+"""
+
+# KEYS: total, flush_seq, flushing 集合, pending；ARGV[1]: 读数据库之前的 flush_seq，之后是 (文章id, 数据库浏览量)
+# 读数据库期间有写回开始或结束时，数据库中的值与缓冲区对不上，放弃初始化
+_SEED_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] or redis.call('SCARD', KEYS[3]) > 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    local pending = tonumber(redis.call('HGET', KEYS[4], ARGV[i]) or '0')
+    redis.call('HSETNX', KEYS[1], ARGV[i], tonumber(ARGV[i + 1]) + pending)
+end
+return 1
+"""
+
+# RENAME 与登记到集合在同一个脚本里完成，读取方不会看到两者之间的状态
+_DRAIN_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('SADD', KEYS[3], KEYS[2])
+return 1
+"""
+
+
+async def incr_view(article_id: int) -> int:
+    """
+    记录一次浏览
+
+    Returns:
+        int: 该文章尚未写回数据库的浏览增量，Redis 不可用时返回0
+    """
+    try:
+        return await redis_client.eval(_INCR_SCRIPT, 2, PENDING_KEY, TOTAL_KEY, str(article_id))
+    except Exception as e:
+        app_logger.error(f"记录文章浏览量失败: {e}")
+        return 0
+
+
+async def get_total_views(article_ids: List[int]) -> Dict[int, int]:
+    """批量读取展示用的浏览量，不在 total 中的文章不返回，Redis 不可用时返回空字典"""
+    if not article_ids:
+        return {}
+    try:
+        values = await redis_client.hmget(TOTAL_KEY, [str(i) for i in article_ids])
+    except Exception as e:
+        app_logger.error(f"读取文章浏览量失败: {e}")
+        return {}
+    return {article_id: int(v) for article_id, v in zip(article_ids, values) if v is not None}
+
+
+async def get_flush_seq() -> str | None:
+    """读取写回序号，在从数据库读取浏览量之前调用；Redis 不可用时返回 None"""
+    try:
+        return await redis_client.get(FLUSH_SEQ_KEY) or "0"
+    except Exception as e:
+        app_logger.error(f"读取浏览量写回序号失败: {e}")
+        return None
+
+
+async def seed_total_views(flush_seq: str | None, db_counts: Dict[int, int]) -> Dict[int, int] | None:
+    """
+    用数据库中的浏览量初始化展示浏览量，已经初始化过的文章保持不变
+
+    Args:
+        flush_seq: 读数据库之前 get_flush_seq 的返回值
+        db_counts: 文章id -> 数据库中的浏览量
+
+    Returns:
+        Dict[int, int]: 初始化后的展示浏览量；读数据库期间发生过写回或 Redis 不可用时返回 None
+    """
+    if flush_seq is None or not db_counts:
+        return None
+    args: List = [flush_seq]
+    for article_id, count in db_counts.items():
+        args += [str(article_id), count]
+    try:
+        if not await redis_client.eval(_SEED_SCRIPT, 4, TOTAL_KEY, FLUSH_SEQ_KEY, FLUSHING_SET_KEY,
+                                       PENDING_KEY, *args):
+            return None
+    except Exception as e:
+        app_logger.error(f"初始化文章浏览量失败: {e}")
+        return None
+    return await get_total_views(list(db_counts))
+
+
+async def get_pending_views(article_ids: List[int]) -> Dict[int, int]:
+    """批量读取尚未写回数据库的浏览增量（包括正在写回的），total 无法初始化时与数据库中的值合并"""
+    if not article_ids:
+        return {}
+    fields = [str(i) for i in article_ids]
+    try:
+        flushing_keys = await redis_client.smembers(FLUSHING_SET_KEY)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in (PENDING_KEY, *flushing_keys):
+                pipe.hmget(key, fields)
+            rows = await pipe.execute()
+    except Exception as e:
+        app_logger.error(f"读取文章浏览量失败: {e}")
+        return {}
+
+    pending: Dict[int, int] = {}
+    for values in rows:
+        for article_id, v in zip(article_ids, values):
+            if v:
+                pending[article_id] = pending.get(article_id, 0) + int(v)
+    return pending
+
+
+async def drain_pending_views() -> Tuple[str | None, Dict[int, int]]:
+    """
+    取走当前累积的全部浏览增量
+
+    Returns:
+        tuple: (正在写回的哈希键, 增量)，没有浏览时键为 None；
+               写回数据库后调用 finish_flush，失败时调用 restore_pending_views
+    """
+    flushing_key = FLUSHING_KEY.format(token=uuid.uuid4().hex)
+    try:
+        moved = await redis_client.eval(_DRAIN_SCRIPT, 3, PENDING_KEY, flushing_key, FLUSHING_SET_KEY)
+        if not moved:
+            return None, {}
+        values = await redis_client.hgetall(flushing_key)
+    except Exception as e:
+        app_logger.error(f"取出文章浏览量失败: {e}")
+        return None, {}
+    return flushing_key, {int(k): int(v) for k, v in values.items()}
+
+
+async def finish_flush(flushing_key: str) -> None:
+    """数据库提交后删除正在写回的哈希"""
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(flushing_key)
+            pipe.srem(FLUSHING_SET_KEY, flushing_key)
+            pipe.incr(FLUSH_SEQ_KEY)
+            await pipe.execute()
+    except Exception as e:
+        app_logger.error(f"清理已写回的文章浏览量失败: {e}")
+
+
+async def restore_pending_views(flushing_key: str, deltas: Dict[int, int]) -> None:
+    """写回数据库失败时把未写回的增量加回缓冲区，等下一轮再写；与删除正在写回的哈希在同一个事务里"""
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for article_id, delta in deltas.items():
+                pipe.hincrby(PENDING_KEY, str(article_id), delta)
+            pipe.delete(flushing_key)
+            pipe.srem(FLUSHING_SET_KEY, flushing_key)
+            pipe.incr(FLUSH_SEQ_KEY)
+            await pipe.execute()
+    except Exception as e:
+        app_logger.error(f"回填文章浏览量失败，丢失 {sum(deltas.values())} 次浏览: {e}")
@@ -1,87 +1,109 @@
-from sqlalchemy import select
+from typing import AsyncIterator
 
-from core.database import get_db
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import use_db
 from models.sys_user import SysUser
 from schemas.sys_user_schemas import UserCreate
-from utils.auth import verify_password, get_password_hash
+from utils import hashing
 
 
 class SysUserDao:
     """用户服务类，处理用户相关的业务逻辑"""
 
     @staticmethod
-    async def get_user_by_username(username: str) -> SysUser | None:
+    async def get_user_by_username(username: str, db: AsyncSession | None = None) -> SysUser | None:
         """
         根据用户名获取用户信息
 
         Args:
             username: 用户名
+            db: 数据库会话，不传则单独开一个会话
 
         Returns:
             SysUser: 用户对象，不存在则返回None
         """
-        async with (get_db() as db):
+        async with use_db(db) as db:
             result = await db.execute(select(SysUser).where(SysUser.username == username, SysUser.deleted == False))
             return result.scalars().first()
 
     @staticmethod
-    async def get_user_by_user_id(user_id: int) -> SysUser | None:
+    async def get_user_by_user_id(user_id: int, db: AsyncSession | None = None) -> SysUser | None:
         """
         根据用户ID获取用户信息
 
         Args:
             user_id: 用户ID
+            db: 数据库会话，不传则单独开一个会话
 
         Returns:
             SysUser: 用户对象，不存在则返回None
         """
-        async with get_db() as db:
+        async with use_db(db) as db:
             result = await db.execute(select(SysUser).where(SysUser.id == user_id, SysUser.deleted == False))
             return result.scalars().first()
 
     @staticmethod
-    async def authenticate_user(username: str, password: str) -> SysUser | bool:
+    async def update_password_hash(user_id: int, hashed_password: str, db: AsyncSession | None = None) -> None:
         """
-        认证用户，验证用户名和密码是否正确
+        更新用户的密码哈希值
+
+        Args:
+            user_id: 用户ID
+            hashed_password: 新的密码哈希值
+            db: 数据库会话，不传则单独开一个会话
+        """
+        async with use_db(db) as db:
+            await db.execute(
+                update(SysUser)
+                .where(SysUser.id == user_id)
+                .values(password=hashed_password)
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    async def username_exists(username: str, db: AsyncSession | None = None) -> bool:
+        """
+        判断用户名是否已被占用，与唯一索引一致，已删除用户的用户名同样视为占用
 
         Args:
             username: 用户名
-            password: 密码
+            db: 数据库会话，不传则单独开一个会话
 
         Returns:
-            SysUser: 认证成功返回用户对象，失败返回False
+            bool: 已占用返回True
         """
-        user = await SysUserDao.get_user_by_username(username)
-        if not user:
-            return False
-        if not verify_password(password, user.password):
-            return False
-        return user
+        async with use_db(db) as db:
+            result = await db.execute(select(SysUser.id).where(SysUser.username == username).limit(1))
+            return result.first() is not None
+
+    @staticmethod
+    async def stream_usernames(batch_size: int = 1000) -> AsyncIterator[str]:
+        """流式读取全部用户名，用于启动时建立用户名布隆过滤器"""
+        async with use_db() as db:
+            result = await db.stream(select(SysUser.username).execution_options(yield_per=batch_size))
+            async for username in result.scalars():
+                yield username
 
     @staticmethod
-    async def create_user(user: UserCreate) -> SysUser:
+    async def create_user(user: UserCreate, db: AsyncSession | None = None) -> int:
         """
-        创建新用户
+        创建新用户，只执行一条 INSERT，用户名重复由唯一索引保证，
+        抛出 sqlalchemy.exc.IntegrityError 由调用方处理
 
         Args:
             user: 用户创建数据
+            db: 数据库会话，不传则单独开一个会话
 
         Returns:
-            SysUser: 创建的用户对象
+            int: 新用户的ID
         """
-        async with get_db() as db:
-            # 获取用户数据并加密密码
-            user_data = user.model_dump()
-            plain_password = user_data.pop("password")
-            hashed_password = get_password_hash(plain_password)
-
-            # 创建用户对象
-            db_user = SysUser(
-                password=hashed_password,
-                **user_data
-            )
-
-            db.add(db_user)
-            await db.flush()
-            await db.refresh(db_user)
-            return db_user
+        # 先加密密码再取连接，哈希计算期间不占用数据库连接
+        user_data = user.model_dump()
+        plain_password = user_data.pop("password")
+        hashed_password = await hashing.hash_password(plain_password)
+
+        async with use_db(db) as db:
+            result = await db.execute(insert(SysUser).values(password=hashed_password, **user_data))
+            return result.inserted_primary_key[0]
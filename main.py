@@ -3,11 +3,20 @@ from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 
-from api.v1.endpoints import redis_example, sys_user, article
+from api.v1.endpoints import redis_example, sys_user, article, monitor
 from core.config import config
 from core.cors import setup_cors
-from core.database import create_tables, shutdown_db
-from core.redis import init_redis, close_redis
+from core.middleware import RequestTimingMiddleware
+from core.responses import FastJSONResponse
+from core.logger import shutdown_logging
+from core.database import create_tables, shutdown_db, start_db_health_check
+from core.redis import init_redis, close_redis, start_pubsub_listener, stop_pubsub_listener, \
+    start_redis_health_check, stop_redis_health_check
+from dao.article_search import init_search
+from services.article_view_service import start_view_flusher, stop_view_flusher
+from services.token_revocation import start_revocation_sync, stop_revocation_sync
+from services.username_registry import load_usernames
+from utils.hashing import init_hashing_executor, shutdown_hashing_executor
 
 
 # ------------- 创建生命周期
@@ -21,18 +30,54 @@ async def lifespan(app: FastAPI):
     # 在连接实例中获取数据库连接
     # 创建数据库连接池并创建全部的表
     await create_tables()
+
+    # 启动从库健康检查（未配置从库时不启动）
+    start_db_health_check()
     
-    # 初始化Redis连接
+    # 初始化Redis连接，连不上时熔断，由后台探测等待恢复
     await init_redis()
+    start_redis_health_check()
+
+    # 创建密码哈希进程池
+    init_hashing_executor()
+
+    # 建立文章检索索引（内存索引后端在此全量加载）
+    await init_search()
+
+    # 启动浏览量定期写回任务
+    start_view_flusher()
+
+    # 订阅本地缓存失效等广播消息
+    start_pubsub_listener()
+
+    # 加载已注销的 Token 并定期同步
+    await start_revocation_sync()
+
+    # 加载已占用的用户名，用于注册时的可用性检查
+    await load_usernames()
 
     yield   # 此时fastapi开始运行
 
+    # 停止写回任务并把剩余浏览量写回数据库（需要在关闭数据库和Redis之前）
+    await stop_view_flusher()
+
+    # 停止订阅监听和 Token 黑名单同步
+    await stop_pubsub_listener()
+    await stop_revocation_sync()
+
     # 关闭数据库链接
     await shutdown_db()
     
     # 关闭Redis连接
+    await stop_redis_health_check()
     await close_redis()
 
+    # 关闭密码哈希进程池
+    shutdown_hashing_executor()
+
+    # 写完队列中剩余的日志
+    shutdown_logging()
+
 # lifespan 是 FastAPI 应用的生命周期管理函数，用于在应用启动和关闭时执行一些操作。
 # 这里的 lifespan 函数会在应用启动时创建数据库连接池并创建全部的表，在应用关闭时关闭数据库连接池。
 # app = FastAPI(dependencies=[Depends(get_query_token)], lifespan=lifespan)
@@ -48,11 +93,17 @@ app = FastAPI(
 )
     无全局认证，需要逐个路由添加    
 '''
+app_kwargs = {}
+if config.FAST_JSON_RESPONSE:
+    # 默认响应类改用 orjson 序列化
+    app_kwargs["default_response_class"] = FastJSONResponse
+
 app = FastAPI(
     lifespan=lifespan,
     title=config.APP_NAME,
     description="FastAPI Blog API",
-    version="1.0.0"
+    version="1.0.0",
+    **app_kwargs,
 )
 
 # 配置CORS
@@ -61,6 +112,9 @@ setup_cors(app)：启用跨域支持，允许前端访问（类似于 Spring Web
 '''
 setup_cors(app)
 
+# 记录每个请求的耗时、SQL 条数、Redis 调用次数，输出 Server-Timing 响应头和采样访问日志
+app.add_middleware(RequestTimingMiddleware)
+
 '''
 app.include_router(...)：集成用户和 Redis 示例路由（类似于 Spring @Controller 扫描）。
 '''
@@ -68,6 +122,7 @@ app.include_router(sys_user.router)
 app.include_router(redis_example.router)
 
 app.include_router(article.router)
+app.include_router(monitor.router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=28000)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, BigInteger, String, Text, DateTime, text, ForeignKey, Boolean
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.database import Base
@@ -15,6 +15,20 @@ from core.database import Base
 '''
 class Article(Base):
     __tablename__ = 'article'
+    __table_args__ = (
+        # 全文索引，使用 ngram 分词以支持中文检索（ngram_token_size 默认为 2）
+        # 已有的表需要手动执行：
+        # ALTER TABLE article ADD FULLTEXT INDEX ft_article_title_content (title, content) WITH PARSER ngram;
+        Index('ft_article_title_content', 'title', 'content', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        # 游标分页的组合排序索引：等值条件在前、排序键 (create_time, id) 在后，
+        # ORDER BY create_time DESC, id DESC 直接反向扫描索引，不需要 filesort；
+        # 列表还要取 title、content 等列，不是覆盖索引，每行回表一次，但只回表 page_size + 1 行
+        # 已有的表需要手动执行：
+        # ALTER TABLE article ADD INDEX idx_author_deleted_create_time_id (author_id, deleted, create_time, id),
+        #     ADD INDEX idx_deleted_create_time_id (deleted, create_time, id);
+        Index('idx_author_deleted_create_time_id', 'author_id', 'deleted', 'create_time', 'id'),
+        Index('idx_deleted_create_time_id', 'deleted', 'create_time', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True, comment="文章id")
     title: Mapped[str] = mapped_column(String(255), nullable=False, comment="文章标题")
@@ -27,6 +41,16 @@ class Article(Base):
         nullable=True,  # 或 False，根据需求
         comment="作者id"
     )
+    # 浏览量：每次浏览先累加到 Redis，由后台任务定期批量写回
+    # 已有的表需要手动执行：
+    # ALTER TABLE article ADD COLUMN view_count BIGINT NOT NULL DEFAULT 0 COMMENT '浏览量';
+    view_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default=text('0'),
+                                            comment="浏览量")
+    # 乐观锁版本号：每次修改 +1，修改时必须带上读取到的版本号
+    # 已有的表需要手动执行：
+    # ALTER TABLE article ADD COLUMN version INT NOT NULL DEFAULT 0 COMMENT '乐观锁版本号';
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text('0'),
+                                         comment="乐观锁版本号")
     deleted: Mapped[bool] = mapped_column(Boolean, default=False, comment="逻辑删除 0-未删除 1-已删除")
     create_time: Mapped[datetime] = mapped_column(
         DateTime,
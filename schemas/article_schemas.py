@@ -15,12 +15,16 @@ class ArticleCreate(ArticleBase):
 class ArticleUpdate(ArticleBase):
     id: int
     author_id: int
+    version: int  # 读取文章时拿到的版本号，用于乐观锁
 
 
 class ArticleVO(ArticleBase): # 详情页使用（完整内容）
     id: int
     author_id: int
     create_time: datetime
+    update_time: datetime | None = None
+    view_count: int = 0
+    version: int = 0
 
     class Config:
         from_attributes = True  # 允许从 ORM 模型转换
@@ -33,5 +37,25 @@ class ListArticleVO(BaseModel):  # 新增：列表专用模型
     summary: str # 内容前20字
     create_time: datetime
     update_time: datetime | None = None
+    view_count: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkImportError(BaseModel):  # 批量导入中单条数据的错误
+    index: int  # 在整个请求中的序号，从0开始
+    error: str
+
+
+class BulkImportChunkResult(BaseModel):  # 批量导入中一个分块的结果
+    chunk: int
+    inserted: int = 0
+    errors: list[BulkImportError] = []
+    error: str | None = None  # 整块写库失败时的原因，该块全部回滚
+
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class BulkImportResult(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    chunks: list[BulkImportChunkResult] = []
@@ -1,5 +1,5 @@
 from typing import Generic, Optional, TypeVar
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # 泛型类型变量
 T = TypeVar('T')
@@ -23,14 +23,27 @@ class APIRes(BaseModel, Generic[T]):
 # 分页请求基类
 class PageParams(BaseModel):
     """
-    分页请求参数基类
+    分页请求参数基类（偏移分页）
     
     Attributes:
         page: 页码，从1开始
         page_size: 每页大小
     """
-    page: int = 1
-    page_size: int = 10
+    page: int = Field(1, ge=1)
+    page_size: int = Field(10, ge=1, le=100)
+
+
+# 游标分页请求参数
+class CursorParams(BaseModel):
+    """
+    游标分页请求参数（keyset 分页），翻页耗时与页码深度无关
+
+    Attributes:
+        cursor: 上一页返回的 next_cursor，首页不传
+        page_size: 每页大小
+    """
+    cursor: Optional[str] = None
+    page_size: int = Field(10, ge=1, le=100)
 
 
 # 分页元数据类
@@ -39,14 +52,17 @@ class PageMeta(BaseModel):
     分页元数据
     
     Attributes:
-        page: 当前页码
+        page: 当前页码，游标分页时为空
         page_size: 每页大小
-        total: 总记录数
-        pages: 总页数
+        total: 总记录数，游标分页时为空（不做 count 查询）
+        next_cursor: 下一页游标，没有更多数据时为空
+        has_more: 是否还有下一页
     """
-    page: int
+    page: Optional[int] = None
     page_size: int
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 # 分页响应基类
@@ -0,0 +1,16 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# 单次批量操作的最大键数，避免一条命令/一个 pipeline 过大阻塞 Redis
+MAX_BATCH_KEYS = 1000
+
+
+class RedisKeys(BaseModel):
+    keys: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_KEYS)
+
+
+class RedisMSet(BaseModel):
+    items: Dict[str, str] = Field(..., min_length=1, max_length=MAX_BATCH_KEYS)
+    ex: Optional[int] = Field(None, ge=1)  # 过期时间（秒），不传则不过期
+
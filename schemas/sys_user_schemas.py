@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 # Token 模型
@@ -30,3 +30,13 @@ class UserUpdate(UserBase):
 class UserVo(UserBase):
     class Config:
         from_attributes = True
+
+
+class UserSnapshot(UserVo):
+    """
+    当前登录用户的只读快照，缓存在进程内，脱离数据库会话，不可修改
+    """
+    id: int
+    status: bool = True
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
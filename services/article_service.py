@@ -1,52 +1,299 @@
-from typing import List
+import json
+from typing import Any, AsyncIterator, List
 
 from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from dao import article_dao
-from schemas.article_schemas import ListArticleVO, ArticleVO
+from core.config import config
+from core.database import use_db, after_commit
+from dao import article_dao, article_cache, article_search, article_views
+from dao.article_dao import SUMMARY_LENGTH
+from schemas.article_schemas import ListArticleVO, ArticleVO, ArticleCreate, BulkImportResult, \
+    BulkImportChunkResult, BulkImportError
+from schemas.base import APIRes, CursorParams, PageParams, PageRes, PageMeta
+from services import article_view_service
+from utils.pagination import encode_cursor, decode_cursor
 
 
-async def get_all_articles() -> List[ArticleVO]:
-    return await article_dao.get_all_articles()
+async def get_all_articles(db: AsyncSession | None = None) -> List[ArticleVO]:
+    return await article_dao.get_all_articles(db)
 
 
-def to_list_vo(articles) -> List[ListArticleVO]:
+def to_summary(content: str) -> str:
+    summary = content[:SUMMARY_LENGTH]
+    return summary + "..." if len(content) > SUMMARY_LENGTH else summary
+
+
+'''
+列表行（ArticleListRow）转换为 ListArticleVO，content_prefix 已在数据库端截取
+'''
+def to_list_vo(rows) -> List[ListArticleVO]:
     return [
         ListArticleVO(
-            id=a.id,
-            title=a.title,
-            author_id=a.author_id,
-            summary=a.content[:20] + ("..." if len(a.content) > 20 else ""),
-            create_time=a.create_time,
-            update_time=a.update_time,
+            id=r.id,
+            title=r.title,
+            author_id=r.author_id,
+            summary=to_summary(r.content_prefix),
+            create_time=r.create_time,
+            update_time=r.update_time,
+            view_count=r.view_count,
         )
-        for a in articles
+        for r in rows
     ]
 
 
-async def get_article_list() -> List[ListArticleVO]:
-    articles = await get_all_articles()
-    return to_list_vo(articles)
+'''
+游标分页获取文章列表，返回 next_cursor 供前端翻下一页，传 author_id 时只查该作者的文章
+列表页经过 Redis 缓存，文章修改后整体失效
+'''
+async def get_article_list(params: CursorParams, author_id: int | None = None) -> PageRes[ListArticleVO]:
+    cursor = None
+    if params.cursor:
+        try:
+            cursor = decode_cursor(params.cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无效的分页游标"
+            )
+
+    # 回源在单飞的独立任务中执行，使用自己的会话
+    async def load():
+        return (await _load_article_list(params.page_size, cursor, author_id)).model_dump(mode="json")
+
+    page_key = f"cursor:{params.cursor or ''}:{params.page_size}"
+    if author_id is not None:
+        page_key = f"author:{author_id}:{page_key}"
+    data = await article_cache.get_list_page(page_key, load)
+    return await merge_view_counts(PageRes[ListArticleVO].model_validate(data))
+
+
+async def _load_article_list(page_size: int, cursor, author_id: int | None = None,
+                             db: AsyncSession | None = None) -> PageRes[ListArticleVO]:
+    articles = await article_dao.get_articles_by_cursor(page_size, cursor, author_id, db)
+    has_more = len(articles) > page_size
+    articles = articles[:page_size]
+    next_cursor = None
+    if has_more:
+        last = articles[-1]
+        next_cursor = encode_cursor(last.create_time, last.id)
+
+    return PageRes[ListArticleVO](
+        items=to_list_vo(articles),
+        meta=PageMeta(page_size=page_size, next_cursor=next_cursor, has_more=has_more),
+    )
+
+
+'''
+偏移分页获取文章列表，带总数，只适合后台等数据量小的场景
+'''
+async def get_article_page(params: PageParams) -> PageRes[ListArticleVO]:
+    async def load():
+        articles, total = await article_dao.get_articles_by_page(params.page, params.page_size)
+        return PageRes[ListArticleVO](
+            items=to_list_vo(articles),
+            meta=PageMeta(
+                page=params.page,
+                page_size=params.page_size,
+                total=total,
+                has_more=params.page * params.page_size < total,
+            ),
+        ).model_dump(mode="json")
+
+    page_key = f"page:{params.page}:{params.page_size}"
+    data = await article_cache.get_list_page(page_key, load)
+    return await merge_view_counts(PageRes[ListArticleVO].model_validate(data))
+
+
+'''
+列表中的浏览量以 Redis 中的展示浏览量为准，缓存的列表里的 view_count 只是加载时的快照，
+浏览量写回数据库后不需要失效列表缓存
+'''
+async def merge_view_counts(page: PageRes[ListArticleVO]) -> PageRes[ListArticleVO]:
+    counts = await article_view_service.get_view_counts([item.id for item in page.items])
+    for item in page.items:
+        item.view_count = counts.get(item.id, item.view_count)
+    return page
+
+
+'''
+全文检索文章，按相关度排序、偏移分页
+'''
+async def search_articles(q: str, params: PageParams, db: AsyncSession | None = None) -> PageRes[ListArticleVO]:
+    rows, total = await article_search.search_backend.search(q, params.page, params.page_size, db)
+    return await merge_view_counts(PageRes[ListArticleVO](
+        items=to_list_vo(rows),
+        meta=PageMeta(
+            page=params.page,
+            page_size=params.page_size,
+            total=total,
+            has_more=params.page * params.page_size < total,
+        ),
+    ))
+
+
+def make_etag(article_id: int, version: int) -> str:
+    # 弱 ETag：文章 id + 乐观锁版本号，每次修改版本号都会 +1（修改时间精度只到秒，不能用来区分）；
+    # 响应体里的浏览量每次访问都可能不同，同一个 ETag 对应的字节并不一致，不能用强 ETag
+    return f'W/"{article_id}:{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match 使用弱比较，忽略 W/ 前缀
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+'''
+加载文章详情的 ETag 和序列化好的响应体，经过进程内 + Redis 两级缓存，文章不存在时返回 None（同样短暂缓存）
+'''
+@article_cache.detail_cache.cached(key="{article_id}", tags=(article_cache.DETAIL_TAG,))
+async def load_article_detail(article_id: int) -> tuple[str, str] | None:
+    article = await article_dao.get_article_by_id(article_id)
+    if not article:
+        return None
+    etag = make_etag(article.id, article.version)
+    body = APIRes[ArticleVO](data=ArticleVO.model_validate(article)).model_dump_json()
+    return etag, body
+
+
+'''
+获取文章详情，返回 (etag, 响应体)，每次访问（包括 304）记一次浏览
+客户端带的 If-None-Match 与当前 ETag 一致时响应体为 None，由接口返回 304
+命中缓存时既不查数据库，也不做 Pydantic 序列化；浏览量不参与 ETag 计算，
+缓存的响应体里的 view_count 只是加载时的快照，返回前替换为 Redis 中的展示浏览量
+'''
+async def get_article_detail(article_id: int, if_none_match: str | None = None) -> tuple[str, str | None]:
+    cached = await load_article_detail(article_id)
+    if cached is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文章不存在"
+        )
+    etag, body = cached
+
+    await article_views.incr_view(article_id)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    counts = await article_view_service.get_view_counts([article_id])
+    res = json.loads(body)
+    if res["data"]["view_count"] != counts.get(article_id, res["data"]["view_count"]):
+        res["data"]["view_count"] = counts[article_id]
+        body = json.dumps(res, ensure_ascii=False, separators=(",", ":"))
+    return etag, body
+
+
+'''
+批量导入文章：按 ARTICLE_IMPORT_CHUNK_SIZE 分块，每块先逐条校验，
+再把校验通过的数据在一个事务里多行插入；某块失败只回滚该块，不影响其他块
+items 中的元素可以是 dict（JSON 数组）或 bytes（NDJSON 的一行）
+'''
+async def bulk_create_articles(items: AsyncIterator[Any], author_id: int) -> BulkImportResult:
+    result = BulkImportResult()
+    chunk: List[tuple[int, Any]] = []
+    async for item in items:
+        chunk.append((result.total, item))
+        result.total += 1
+        if len(chunk) >= config.ARTICLE_IMPORT_CHUNK_SIZE:
+            result.chunks.append(await _import_chunk(len(result.chunks), chunk, author_id))
+            chunk = []
+    if chunk:
+        result.chunks.append(await _import_chunk(len(result.chunks), chunk, author_id))
+
+    result.inserted = sum(c.inserted for c in result.chunks)
+    result.failed = result.total - result.inserted
+    if result.inserted:
+        await article_search.on_articles_imported()
+    return result
+
+
+async def _import_chunk(chunk_no: int, chunk: List[tuple[int, Any]], author_id: int) -> BulkImportChunkResult:
+    chunk_result = BulkImportChunkResult(chunk=chunk_no)
+    rows = []
+    for index, item in chunk:
+        try:
+            if isinstance(item, (str, bytes)):
+                item = json.loads(item)
+            article = ArticleCreate.model_validate(item)
+        except ValidationError as e:
+            chunk_result.errors.append(BulkImportError(index=index, error=_format_validation_error(e)))
+            continue
+        except UnicodeDecodeError as e:
+            chunk_result.errors.append(BulkImportError(index=index, error=f"invalid utf-8: {e}"))
+            continue
+        except ValueError as e:
+            chunk_result.errors.append(BulkImportError(index=index, error=f"invalid json: {e}"))
+            continue
+        rows.append({"title": article.title, "content": article.content, "author_id": author_id})
+
+    try:
+        chunk_result.inserted = await article_dao.bulk_insert_articles(rows)
+    except Exception as e:
+        chunk_result.error = f"{type(e).__name__}: {e}"
+    return chunk_result
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    把请求体字节流按行切分，跳过空行
+    每行原样返回字节，由 _import_chunk 逐条解码，某一行不是合法的 UTF-8 只算这一条失败
+    只对新到的数据做切分，未结束的行累积在 bytearray 中，超长的行也是线性开销
+    """
+    buffer = bytearray()
+    async for data in stream:
+        *lines, rest = data.split(b"\n")
+        if lines:
+            lines[0] = bytes(buffer) + lines[0]
+            buffer = bytearray(rest)
+        else:
+            buffer += rest
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield bytes(buffer)
 
 
 '''
 修改文章，只能修改自己的文章
+缓存失效和检索索引更新都在事务提交之后执行
 '''
 
 
-async def edit_article(article_id, article, current_user) -> bool:
-    article_target = await article_dao.get_article_by_id(article_id)
-    if not article_target:
+async def edit_article(article_id, article, current_user, db: AsyncSession | None = None) -> bool:
+    # 正常情况下只有一条带作者和版本号条件的 UPDATE
+    async with use_db(db) as db:
+        if await article_dao.edit_article(article_id, current_user.id, article, db):
+            after_commit(db, lambda: article_search.on_articles_changed([article_id]))
+            return True
+
+        # 没有更新到数据，再查一次判断原因
+        article_state = await article_dao.get_article_edit_state(article_id, db)
+    if not article_state:
         # 报错 提示文章不存在
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="文章不存在"
         )
 
-    if article_target.author_id != current_user.id:
+    if article_state.author_id != current_user.id:
         # 报错提示只能修改自己的文章
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权修改他人的文章"
         )
-    return await article_dao.edit_article(article_id, article)
\ No newline at end of file
+
+    # 版本号不一致，说明文章在读取之后被别人改过
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="文章已被修改，请刷新后重试"
+    )
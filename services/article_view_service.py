@@ -0,0 +1,99 @@
+import asyncio
+from typing import Dict, List
+
+from core.config import config
+from core.logger import app_logger
+from dao import article_dao, article_views
+
+'''
+浏览量的读取，以及后台写回任务：写回任务在 main.py 的 lifespan 中启动，应用关闭时做最后一次写回
+'''
+
+# 每条 UPDATE 最多带多少篇文章，避免 CASE 表达式过长
+_FLUSH_CHUNK_SIZE = 1000
+
+_flusher_task: asyncio.Task | None = None
+
+
+async def get_view_counts(article_ids: List[int]) -> Dict[int, int]:
+    """
+    批量读取展示用的浏览量（数据库中的值 + 尚未写回的增量）
+
+    Args:
+        article_ids: 文章id
+
+    Returns:
+        Dict[int, int]: 文章id -> 浏览量，不存在或已删除的文章不返回
+    """
+    counts = await article_views.get_total_views(article_ids)
+    missing = [article_id for article_id in article_ids if article_id not in counts]
+    if not missing:
+        return counts
+
+    # 第一次读到的文章：从数据库取当前值初始化 Redis 中的展示浏览量，之后只读 Redis
+    flush_seq = await article_views.get_flush_seq()
+    db_counts = await article_dao.get_view_counts(missing)
+    seeded = await article_views.seed_total_views(flush_seq, db_counts)
+    if seeded is None:
+        # 读数据库期间恰好在写回，或 Redis 不可用：本次直接合并，下次读取时再初始化
+        pending = await article_views.get_pending_views(list(db_counts))
+        seeded = {article_id: count + pending.get(article_id, 0) for article_id, count in db_counts.items()}
+    counts.update(seeded)
+    return counts
+
+
+async def flush_views() -> int:
+    """
+    把 Redis 中累积的浏览增量写回数据库
+
+    Returns:
+        int: 本次写回的浏览次数
+    """
+    flushing_key, deltas = await article_views.drain_pending_views()
+    if flushing_key is None:
+        return 0
+
+    items = list(deltas.items())
+    for start in range(0, len(items), _FLUSH_CHUNK_SIZE):
+        chunk: Dict[int, int] = dict(items[start:start + _FLUSH_CHUNK_SIZE])
+        try:
+            await article_dao.apply_view_deltas(chunk)
+        except Exception as e:
+            app_logger.error(f"浏览量写回数据库失败，等待下次重试: {e}")
+            await article_views.restore_pending_views(flushing_key, dict(items[start:]))
+            return 0
+
+    await article_views.finish_flush(flushing_key)
+    return sum(deltas.values())
+
+
+async def _run_flusher() -> None:
+    while True:
+        await asyncio.sleep(config.VIEW_FLUSH_INTERVAL)
+        try:
+            await flush_views()
+        except Exception as e:
+            app_logger.error(f"浏览量写回任务出错: {e}")
+
+
+def start_view_flusher() -> None:
+    global _flusher_task
+    if _flusher_task is None:
+        _flusher_task = asyncio.create_task(_run_flusher())
+
+
+async def stop_view_flusher() -> None:
+    """停止后台任务，并把剩余的浏览量全部写回"""
+    global _flusher_task
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+    try:
+        flushed = await flush_views()
+        app_logger.info(f"浏览量已全部写回数据库，本次 {flushed} 次")
+    except Exception as e:
+        app_logger.error(f"关闭时写回浏览量失败: {e}")
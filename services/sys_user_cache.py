@@ -0,0 +1,48 @@
+from typing import Dict
+
+from core.cache import TwoTierCache
+from core.config import config
+from dao.sys_user_dao import SysUserDao
+from schemas.sys_user_schemas import UserSnapshot
+
+'''
+鉴权用户缓存：按用户id缓存 UserSnapshot，进程内 + Redis 两级
+进程内过期时间很短，其他 worker 已经加载过的用户直接从 Redis 取，不再查数据库
+修改 SysUser 的服务函数在事务提交后（after_commit）调用 invalidate_user，所有 worker 立即失效
+'''
+
+user_cache = TwoTierCache(
+    "user",
+    ttl=config.USER_CACHE_REDIS_TTL,
+    l1_maxsize=config.USER_CACHE_MAX_SIZE,
+    l1_ttl=config.USER_CACHE_TTL,
+    model=UserSnapshot,
+)
+
+
+@user_cache.cached(key="{user_id}", tags=("user:{user_id}",))
+async def get_user_snapshot(user_id: int) -> UserSnapshot | None:
+    """
+    根据用户ID获取用户快照，优先读缓存
+    未命中时在单飞的独立任务中用自己的会话查询，不使用请求的会话
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        UserSnapshot: 用户快照，用户不存在返回None
+    """
+    user = await SysUserDao.get_user_by_user_id(user_id)
+    if user is None:
+        return None
+    return UserSnapshot.model_validate(user)
+
+
+async def invalidate_user(user_id: int) -> None:
+    """用户状态或资料变更后调用，删除本进程和其他 worker 的缓存"""
+    await user_cache.invalidate(f"user:{user_id}")
+
+
+def get_user_cache_stats() -> Dict[str, int]:
+    """命中、未命中、淘汰次数等统计，供监控使用"""
+    return user_cache.stats()
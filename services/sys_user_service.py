@@ -1,27 +1,68 @@
-from typing import Annotated
-
-from fastapi import Depends, HTTPException, status
-
+from typing import Annotated, Mapping
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import config
+from core.database import DbSession, use_db, after_commit
+from core.db_routing import bind_user
+from core.middleware import timed_auth
+from core.rate_limit import Rate, check_rate_limit, make_key
 from dao.sys_user_dao import SysUserDao
 from models.sys_user import SysUser
-from schemas.sys_user_schemas import UserVo, UserCreate
-from utils.auth import decode_token, oauth2_scheme
+from schemas.sys_user_schemas import UserVo, UserCreate, UserSnapshot
+from services.sys_user_cache import get_user_snapshot, invalidate_user
+from services import token_revocation, username_registry
+from utils import hashing
+from utils.auth import decode_token_claims, oauth2_scheme
+
+'''
+解析并校验 Token，检查是否已注销，返回 claims
+'''
+async def get_current_token_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> Mapping:
+    """
+    校验JWT并确认未被注销
+
+    Args:
+        token: JWT令牌
+
+    Returns:
+        Mapping: Token 的 claims
+    """
+    with timed_auth():
+        claims = decode_token_claims(token)
+        revoked = await token_revocation.is_token_revoked(claims)
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
 
 '''
-真正的鉴权逻辑--解析 Token --> 查询数据库 --> 返回用户
+真正的鉴权逻辑--解析 Token --> 检查黑名单 --> 查询用户（优先读进程内缓存） --> 返回用户
 '''
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+async def get_current_user(claims: Annotated[Mapping, Depends(get_current_token_claims)],
+                           db: DbSession) -> UserSnapshot:
     """
     从JWT中获取当前用户
     
     Args:
-        token: JWT令牌
+        claims: 已校验的JWT claims
+        db: 请求级数据库会话，与接口共用
         
     Returns:
-        SysUser: 当前用户对象
+        UserSnapshot: 当前用户的只读快照
     """
-    user_id = decode_token(token)
-    user = await SysUserDao.get_user_by_user_id(user_id)
+    user_id = int(claims["sub"])
+    # 刚提交过写操作的用户整个请求读主库
+    bind_user(db, user_id)
+    with timed_auth():
+        user = await get_user_snapshot(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,22 +89,89 @@ async def get_current_active_user(current_user: Annotated[UserVo, Depends(get_cu
     return current_user
 
 
-async def create_user(user: UserCreate) -> SysUser:
+async def logout(claims: Mapping) -> None:
+    """
+    注销当前 Token，剩余有效期内不能再使用
+
+    Args:
+        claims: 当前 Token 的 claims
+    """
+    await token_revocation.revoke_token(claims)
+
+
+_LOGIN_RATE_PER_IP = Rate.parse(config.LOGIN_RATE_LIMIT_PER_IP)
+_LOGIN_RATE_PER_USERNAME = Rate.parse(config.LOGIN_RATE_LIMIT_PER_USERNAME)
+
+
+async def login_rate_limit(request: Request, form_data: OAuth2PasswordRequestForm = Depends()) -> None:
     """
-    创建新用户
+    登录接口限流依赖，同时按客户端IP和用户名计数，
+    在密码校验之前执行，被拒绝的请求不做任何哈希计算
+
+    Args:
+        request: 当前请求
+        form_data: 登录表单，与接口共用同一次解析结果
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    await check_rate_limit(
+        [make_key("login", "ip", client_ip), make_key("login", "username", form_data.username.lower())],
+        [_LOGIN_RATE_PER_IP, _LOGIN_RATE_PER_USERNAME],
+    )
+
+
+async def create_user(user: UserCreate, db: AsyncSession | None = None) -> int:
+    """
+    创建新用户，用户名重复时返回400
 
     Args:
         user: 用户创建数据
+        db: 数据库会话
+
+    Returns:
+        int: 新用户的ID
+    """
+    try:
+        user_id = await SysUserDao.create_user(user, db)
+    except IntegrityError as e:
+        # 只有用户名唯一索引冲突是用户输入的问题，其他约束错误原样抛出
+        if not _is_username_conflict(e):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        )
+    await username_registry.on_username_registered(user.username)
+    return user_id
+
+
+def _is_username_conflict(e: IntegrityError) -> bool:
+    # MySQL: (1062, "Duplicate entry 'xx' for key 'sys_user.username'")
+    # SQLite: UNIQUE constraint failed: sys_user.username
+    message = str(e.orig)
+    if "Duplicate entry" in message:
+        return "username" in message.rsplit(" for key ", 1)[-1]
+    return "UNIQUE constraint failed: sys_user.username" in message
+
+
+async def is_username_available(username: str, db: AsyncSession | None = None) -> bool:
+    """
+    判断用户名是否可以注册
+
+    Args:
+        username: 用户名
+        db: 数据库会话
 
     Returns:
-        SysUser: 创建的用户对象
+        bool: 可用返回True
     """
-    return await SysUserDao.create_user(user)
+    return await username_registry.is_username_available(username, db)
 
 
 async def authenticate_user(username: str, password: str) -> SysUser | bool:
     """
     认证用户，验证用户名和密码是否正确
+    哈希参数变化后的旧密码哈希会在登录成功时自动重新计算并保存
+    查询用户和保存新哈希各用一个短会话，密码校验期间不占用数据库连接
 
     Args:
         username: 用户名
@@ -72,17 +180,40 @@ async def authenticate_user(username: str, password: str) -> SysUser | bool:
     Returns:
         SysUser: 认证成功返回用户对象，失败返回False
     """
-    return await SysUserDao.authenticate_user(username, password)
+    user = await SysUserDao.get_user_by_username(username)
+    if not user:
+        return False
+    valid, updated_hash = await hashing.verify_password(password, user.password)
+    if not valid:
+        return False
+    if updated_hash is not None:
+        await update_password_hash(user.id, updated_hash)
+    return user
+
+
+async def update_password_hash(user_id: int, hashed_password: str, db: AsyncSession | None = None) -> None:
+    """
+    更新用户的密码哈希值，提交后失效该用户的鉴权缓存
+
+    Args:
+        user_id: 用户ID
+        hashed_password: 新的密码哈希值
+        db: 数据库会话，不传则单独开一个会话
+    """
+    async with use_db(db) as db:
+        await SysUserDao.update_password_hash(user_id, hashed_password, db)
+        after_commit(db, lambda: invalidate_user(user_id))
 
 
-async def get_user_by_username(username: str) -> SysUser | None:
+async def get_user_by_username(username: str, db: AsyncSession | None = None) -> SysUser | None:
     """
     根据用户名获取用户信息
 
     Args:
         username: 用户名
+        db: 数据库会话
 
     Returns:
         SysUser: 用户对象，不存在则返回None
     """
-    return await SysUserDao.get_user_by_username(username)
+    return await SysUserDao.get_user_by_username(username, db)
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from typing import Mapping
+
+from fastapi import HTTPException, status
+
+from core.config import config
+from core.logger import app_logger
+from core.redis import redis_client, subscribe, publish
+from utils.bloom import BloomFilter
+
+'''
+Token 注销（黑名单）
+
+- Redis 中每个注销的 jti 一个 key，TTL 等于 Token 剩余有效期，过期自动清理
+- 另用一个 zset（jti -> exp）记录全部注销的 jti，供各 worker 全量同步
+- 每个 worker 本地维护一个布隆过滤器：绝大多数请求的 Token 没被注销，
+  布隆过滤器判断"一定不存在"后直接放行，不访问 Redis；
+  只有判断"可能存在"时才去 Redis 确认
+- 新的注销通过发布订阅实时加入各 worker 的布隆过滤器，定期全量同步兜底并清理已过期的 jti
+- 第一次全量同步成功之前布隆过滤器是空的，不能用来放行，每个 Token 都到 Redis 确认
+- 需要查 Redis 而 Redis 不可用时返回 503，不能声称 Token 已注销（客户端会重新登录，放大故障期间的负载）
+- 全量同步期间通过发布订阅收到的注销会同时记下来，同步完成后补进新的布隆过滤器，不会被替换掉
+'''
+
+REVOKED_KEY = "auth:revoked:{jti}"
+REVOKED_INDEX_KEY = "auth:revoked:index"
+REVOKED_CHANNEL = "auth:revoked"
+
+_bloom = BloomFilter(config.TOKEN_REVOCATION_BLOOM_CAPACITY)
+_sync_task: asyncio.Task | None = None
+# 是否已经成功全量同步过一次，之前布隆过滤器不可信
+_synced = False
+# 全量同步进行中时记录新加入的 jti，同步结束后补进新的布隆过滤器；不在同步时为 None
+_added_during_sync: set | None = None
+
+
+def _add_local(jti: str) -> None:
+    _bloom.add(jti)
+    if _added_during_sync is not None:
+        _added_during_sync.add(jti)
+
+
+async def revoke_token(claims: Mapping) -> None:
+    """
+    注销 Token
+
+    Args:
+        claims: 已校验过的 Token claims
+    """
+    jti = claims.get("jti")
+    exp = claims.get("exp")
+    if not jti or not exp:
+        return
+    ttl = int(exp - time.time()) + 1
+    if ttl <= 0:
+        return
+
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(REVOKED_KEY.format(jti=jti), "1", ex=ttl)
+            pipe.zadd(REVOKED_INDEX_KEY, {jti: exp})
+            await pipe.execute()
+    except Exception as e:
+        # 没有写入黑名单就不能告诉客户端已注销
+        app_logger.error(f"写入Token黑名单失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation is temporarily unavailable",
+        )
+    _add_local(jti)
+    await publish(REVOKED_CHANNEL, jti)
+
+
+async def is_token_revoked(claims: Mapping) -> bool:
+    """
+    判断 Token 是否已注销，未注销的常见情况只查本地布隆过滤器；
+    首次全量同步成功之前每次都查 Redis
+
+    Args:
+        claims: 已校验过的 Token claims
+
+    Returns:
+        bool: 已注销返回True
+
+    Raises:
+        HTTPException: 需要查 Redis 确认而 Redis 不可用时返回 503
+    """
+    jti = claims.get("jti")
+    if not jti or (_synced and jti not in _bloom):
+        return False
+    try:
+        return bool(await redis_client.exists(REVOKED_KEY.format(jti=jti)))
+    except Exception as e:
+        # 可能已注销（布隆过滤器命中或尚未同步）且无法确认：不能放行，也不能让客户端以为 Token 已注销
+        app_logger.error(f"查询Token黑名单失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation check is temporarily unavailable",
+        )
+
+
+async def sync_revocations() -> None:
+    """从 Redis 全量重建本地布隆过滤器，顺带清理 zset 中已过期的 jti"""
+    global _bloom, _synced, _added_during_sync
+    added = _added_during_sync = set()
+    try:
+        now = time.time()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(REVOKED_INDEX_KEY, "-inf", now)
+            pipe.zrange(REVOKED_INDEX_KEY, 0, -1)
+            _, jtis = await pipe.execute()
+
+        bloom = BloomFilter(max(config.TOKEN_REVOCATION_BLOOM_CAPACITY, len(jtis) * 2))
+        # 等待 Redis 期间收到的注销可能不在 zrange 的结果里，一并加入
+        for jti in (*jtis, *added):
+            bloom.add(jti)
+        _bloom = bloom
+        _synced = True
+    finally:
+        if _added_during_sync is added:
+            _added_during_sync = None
+
+
+async def _run_sync() -> None:
+    while True:
+        await asyncio.sleep(config.TOKEN_REVOCATION_SYNC_INTERVAL)
+        try:
+            await sync_revocations()
+        except Exception as e:
+            app_logger.error(f"同步Token黑名单失败: {e}")
+
+
+async def start_revocation_sync() -> None:
+    """启动时先同步一次再开始定期同步；同步失败时由 is_token_revoked 逐个查 Redis，直到某次同步成功"""
+    global _sync_task
+    try:
+        await sync_revocations()
+    except Exception as e:
+        app_logger.error(f"同步Token黑名单失败: {e}")
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_run_sync())
+
+
+async def stop_revocation_sync() -> None:
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+
+def _on_revoked(jti: str) -> None:
+    _add_local(jti)
+
+
+subscribe(REVOKED_CHANNEL, _on_revoked)
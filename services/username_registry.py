@@ -0,0 +1,69 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import config
+from core.logger import app_logger
+from core.redis import subscribe, publish
+from dao.sys_user_dao import SysUserDao
+from utils.bloom import BloomFilter
+
+'''
+用户名可用性检查
+
+- 每个 worker 维护一个已占用用户名的布隆过滤器，启动时从数据库全量加载
+- 布隆过滤器判断"一定不存在"时直接返回可用，注册表单逐字输入时基本不访问数据库；
+  判断"可能存在"时再查数据库确认，排除误判
+- 新注册的用户名通过发布订阅实时加入各 worker 的布隆过滤器
+- 用户名比较不区分大小写，与 MySQL 默认排序规则一致
+- 过滤器加载失败时每次都查数据库，保证结果正确
+'''
+
+USERNAME_REGISTERED_CHANNEL = "user:registered"
+
+_bloom: BloomFilter | None = None
+
+
+def _normalize(username: str) -> str:
+    return username.lower()
+
+
+async def load_usernames() -> None:
+    """应用启动时调用，从数据库全量建立用户名布隆过滤器"""
+    global _bloom
+    try:
+        bloom = BloomFilter(config.USERNAME_BLOOM_CAPACITY)
+        async for username in SysUserDao.stream_usernames():
+            bloom.add(_normalize(username))
+        _bloom = bloom
+        app_logger.info(f"用户名布隆过滤器加载完成，共 {bloom.count} 个")
+    except Exception as e:
+        app_logger.error(f"用户名布隆过滤器加载失败: {e}")
+
+
+async def is_username_available(username: str, db: AsyncSession | None = None) -> bool:
+    """
+    判断用户名是否可以注册
+
+    Args:
+        username: 用户名
+        db: 数据库会话，布隆过滤器判断可能已占用时使用
+
+    Returns:
+        bool: 可用返回True
+    """
+    if _bloom is not None and _normalize(username) not in _bloom:
+        return True
+    return not await SysUserDao.username_exists(username, db)
+
+
+async def on_username_registered(username: str) -> None:
+    """注册成功后调用，本进程立即生效，其他 worker 通过广播更新"""
+    _on_registered(username)
+    await publish(USERNAME_REGISTERED_CHANNEL, username)
+
+
+def _on_registered(username: str) -> None:
+    if _bloom is not None:
+        _bloom.add(_normalize(username))
+
+
+subscribe(USERNAME_REGISTERED_CHANNEL, _on_registered)
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+'''
+测试公共夹具：数据库使用临时目录下的 SQLite 文件，Redis 使用 fakeredis
+DATABASE_URL 必须在导入 core.config 之前设置
+'''
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="blog-test-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_PATH}"
+os.environ.setdefault("DEBUG", "False")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakeredis  # noqa: E402
+from sqlalchemy import BigInteger, DefaultClause, text  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+from core.database import Base, engine  # noqa: E402
+import models.article  # noqa: E402,F401
+import models.sys_user  # noqa: E402,F401
+
+
+# SQLite 只有 INTEGER PRIMARY KEY 才会自增，建表时把 BIGINT 换成 INTEGER
+@compiles(BigInteger, "sqlite")
+def _bigint_as_integer(type_, compiler, **kw):
+    return "INTEGER"
+
+
+# SQLite 不支持 ON UPDATE CURRENT_TIMESTAMP，建表时只保留 CURRENT_TIMESTAMP，更新时间由 ORM 的 onupdate 维护
+for _table in Base.metadata.tables.values():
+    for _column in _table.columns:
+        _default = _column.server_default
+        if isinstance(_default, DefaultClause) and "ON UPDATE" in str(_default.arg):
+            _column.server_default = DefaultClause(text("CURRENT_TIMESTAMP"))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "mysql: 需要真实 MySQL（MYSQL_TEST_URL）的用例")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_engine():
+    """每个测试重新建表，结束后删除"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """把各模块引用的 redis_client 替换为同一个 fakeredis 实例"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    for name, module in list(sys.modules.items()):
+        if name.split(".")[0] not in ("core", "dao", "services", "api", "utils"):
+            continue
+        if getattr(module, "redis_client", None) is not None:
+            monkeypatch.setattr(module, "redis_client", client)
+    return client
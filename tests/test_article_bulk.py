@@ -0,0 +1,94 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+
+from api.v1.endpoints import article
+from core.config import config
+from core.database import get_db
+from dao import article_dao
+from models.article import Article
+from services import article_service
+from services.sys_user_service import get_current_active_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(db_engine, fake_redis):
+    app = FastAPI()
+    app.include_router(article.router)
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=1, status=True)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def _titles() -> list:
+    async with get_db() as db:
+        return list((await db.scalars(select(Article.title).order_by(Article.id))).all())
+
+
+async def test_json_array_reports_invalid_items(client):
+    items = [
+        {"title": "a", "content": "c"},
+        {"title": "b"},
+        "not an object",
+        {"title": "d", "content": "c"},
+    ]
+    res = (await client.post("/api/v1/article/bulk", json=items)).json()["data"]
+    assert (res["total"], res["inserted"], res["failed"]) == (4, 2, 2)
+    assert [e["index"] for e in res["chunks"][0]["errors"]] == [1, 2]
+    assert await _titles() == ["a", "d"]
+
+
+async def test_ndjson_invalid_utf8_only_fails_that_line(client):
+    body = b"\n".join([
+        json.dumps({"title": "a", "content": "c"}).encode(),
+        b'{"title": "\xff\xfe", "content": "c"}',
+        b"{broken",
+        b"",
+        json.dumps({"title": "中文", "content": "c"}, ensure_ascii=False).encode(),
+    ])
+    res = await client.post("/api/v1/article/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    assert res.status_code == 200
+    data = res.json()["data"]
+    assert (data["total"], data["inserted"], data["failed"]) == (4, 2, 2)
+    errors = {e["index"]: e["error"] for e in data["chunks"][0]["errors"]}
+    assert errors[1].startswith("invalid utf-8")
+    assert errors[2].startswith("invalid json")
+    assert await _titles() == ["a", "中文"]
+
+
+async def test_failed_chunk_does_not_roll_back_other_chunks(client, monkeypatch):
+    monkeypatch.setattr(config, "ARTICLE_IMPORT_CHUNK_SIZE", 2)
+    insert = article_dao.bulk_insert_articles
+    calls = 0
+
+    async def fail_second_chunk(rows):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            # 多行 INSERT 中的一行违反 NOT NULL，整块回滚
+            rows = rows + [{"title": "bad", "content": None, "author_id": 1}]
+        return await insert(rows)
+
+    monkeypatch.setattr(article_dao, "bulk_insert_articles", fail_second_chunk)
+    items = [{"title": f"t{i}", "content": "c"} for i in range(6)]
+    data = (await client.post("/api/v1/article/bulk", json=items)).json()["data"]
+
+    assert (data["inserted"], data["failed"]) == (4, 2)
+    assert data["chunks"][1]["error"] and data["chunks"][1]["inserted"] == 0
+    assert data["chunks"][0]["error"] is None and data["chunks"][2]["error"] is None
+    assert await _titles() == ["t0", "t1", "t4", "t5"]
+
+
+async def test_iter_ndjson_joins_lines_split_across_reads():
+    async def stream():
+        for data in (b'{"a":', b'1}\n{"b"', b":2}\n\n", b'{"c":3}'):
+            yield data
+
+    lines = [line async for line in article_service.iter_ndjson(stream())]
+    assert lines == [b'{"a":1}', b'{"b":2}', b'{"c":3}']
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.database import get_db
+from dao import article_cache
+from models.article import Article
+from schemas.article_schemas import ArticleUpdate
+from services import article_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def clear_detail_cache():
+    article_cache.detail_cache.l1.clear()
+    yield
+    article_cache.detail_cache.l1.clear()
+
+
+async def _create_article(author_id: int = 1) -> int:
+    async with get_db() as db:
+        article = Article(title="t", content="c", author_id=author_id)
+        db.add(article)
+        await db.flush()
+        return article.id
+
+
+async def test_etag_is_weak_id_and_version(db_engine, fake_redis):
+    article_id = await _create_article()
+    etag, body = await article_service.get_article_detail(article_id)
+    assert etag == f'W/"{article_id}:0"'
+    assert body is not None
+
+    etag, body = await article_service.get_article_detail(article_id, if_none_match=etag)
+    assert body is None
+    # 弱比较：带不带 W/ 前缀都算匹配
+    etag, body = await article_service.get_article_detail(article_id, if_none_match=f'"{article_id}:0"')
+    assert body is None
+
+
+async def test_edit_changes_etag(db_engine, fake_redis):
+    article_id = await _create_article()
+    old_etag, _ = await article_service.get_article_detail(article_id)
+
+    update = ArticleUpdate(id=article_id, author_id=1, version=0, title="t2", content="c2")
+    assert await article_service.edit_article(article_id, update, SimpleNamespace(id=1))
+
+    etag, body = await article_service.get_article_detail(article_id, if_none_match=old_etag)
+    assert etag == f'W/"{article_id}:1"'
+    assert body is not None and "t2" in body
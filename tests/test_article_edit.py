@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy import select, update
+
+from fastapi import FastAPI
+
+from api.v1.endpoints import article
+from core.database import get_db
+from dao import article_cache
+from models.article import Article
+from services import article_service
+from services.sys_user_service import get_current_active_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def clear_detail_cache():
+    article_cache.detail_cache.l1.clear()
+    yield
+    article_cache.detail_cache.l1.clear()
+
+
+@pytest.fixture
+def current_user():
+    return SimpleNamespace(id=1, status=True)
+
+
+@pytest.fixture
+async def client(db_engine, fake_redis, current_user):
+    app = FastAPI()
+    app.include_router(article.router)
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def _create_article(author_id: int = 1) -> int:
+    async with get_db() as db:
+        row = Article(title="t", content="c", author_id=author_id)
+        db.add(row)
+        await db.flush()
+        return row.id
+
+
+async def _row(article_id: int):
+    async with get_db() as db:
+        return (await db.execute(
+            select(Article.title, Article.content, Article.version).where(Article.id == article_id)
+        )).first()
+
+
+def _edit_body(article_id: int, version: int, title: str = "new") -> dict:
+    return {"id": article_id, "author_id": 1, "version": version, "title": title, "content": "new content"}
+
+
+async def test_edit_missing_article_returns_404(client):
+    res = await client.post("/api/v1/article/edit/999", json=_edit_body(999, 0))
+    assert res.status_code == 404
+
+
+async def test_edit_deleted_article_returns_404(client):
+    article_id = await _create_article()
+    async with get_db() as db:
+        await db.execute(update(Article).where(Article.id == article_id).values(deleted=True))
+    res = await client.post(f"/api/v1/article/edit/{article_id}", json=_edit_body(article_id, 0))
+    assert res.status_code == 404
+
+
+async def test_edit_other_authors_article_returns_403(client, current_user):
+    article_id = await _create_article(author_id=2)
+    res = await client.post(f"/api/v1/article/edit/{article_id}", json=_edit_body(article_id, 0))
+    assert res.status_code == 403
+    assert await _row(article_id) == ("t", "c", 0)
+
+
+async def test_stale_version_returns_409_and_keeps_row_and_caches(client, fake_redis):
+    article_id = await _create_article()
+    assert (await client.post(f"/api/v1/article/edit/{article_id}",
+                              json=_edit_body(article_id, 0, title="first"))).status_code == 200
+
+    # 填充详情和列表缓存
+    etag, body = await article_service.get_article_detail(article_id)
+    assert (await client.get("/api/v1/article/")).status_code == 200
+    generation = await article_cache.get_list_generation()
+    cached_keys = set(await fake_redis.keys("*"))
+
+    res = await client.post(f"/api/v1/article/edit/{article_id}", json=_edit_body(article_id, 0, title="stale"))
+    assert res.status_code == 409
+
+    assert await _row(article_id) == ("first", "new content", 1)
+    assert await article_cache.get_list_generation() == generation
+    assert cached_keys <= set(await fake_redis.keys("*"))
+    assert len(article_cache.detail_cache.l1) == 1
+    new_etag, new_body = await article_service.get_article_detail(article_id)
+    assert new_etag == etag and "first" in new_body and "stale" not in new_body
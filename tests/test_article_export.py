@@ -0,0 +1,32 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy import insert
+
+from core.database import get_db
+from models.article import Article
+from services import article_export
+
+pytestmark = pytest.mark.anyio
+
+
+async def _export(fmt: str, compress: bool) -> bytes:
+    return b"".join([chunk async for chunk in article_export.export_articles(fmt, compress)])
+
+
+async def test_gzip_export_round_trips(db_engine, monkeypatch):
+    # 每块 64KB 攒满后压缩一次，造足够多的数据覆盖中间块和结尾块
+    async with get_db() as db:
+        await db.execute(insert(Article), [
+            {"title": f"t{i}", "content": f"正文 {i} " * 50, "author_id": 1} for i in range(500)
+        ])
+
+    plain = await _export("ndjson", compress=False)
+    compressed = await _export("ndjson", compress=True)
+    assert len(plain) > 2 * 64 * 1024
+    assert gzip.decompress(compressed) == plain
+
+    lines = plain.splitlines()
+    assert len(lines) == 500
+    assert json.loads(lines[0])["title"] == "t0"
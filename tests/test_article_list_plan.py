@@ -0,0 +1,69 @@
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.database import Base
+from dao.article_dao import cursor_list_statement
+from models.article import Article
+
+pytestmark = pytest.mark.anyio
+
+'''
+游标分页必须走 (deleted, create_time, id) / (author_id, deleted, create_time, id) 复合索引，
+并且按索引顺序返回，不能出现额外的排序（SQLite 的 TEMP B-TREE、MySQL 的 filesort）
+MySQL 用例需要设置 MYSQL_TEST_URL 指向一个可以随意建表的测试库
+'''
+
+CASES = [
+    (None, None, "idx_deleted_create_time_id"),
+    (None, 1, "idx_author_deleted_create_time_id"),
+    ((datetime(2025, 1, 1), 100), None, "idx_deleted_create_time_id"),
+    ((datetime(2025, 1, 1), 100), 1, "idx_author_deleted_create_time_id"),
+]
+
+
+async def _explain(conn, prefix: str, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup) if compiled.positional \
+        else compiled.params
+    result = await conn.exec_driver_sql(prefix + str(compiled), params)
+    return result.mappings().all()
+
+
+@pytest.mark.parametrize("cursor, author_id, index", CASES)
+async def test_cursor_list_uses_composite_index_sqlite(db_engine, cursor, author_id, index):
+    async with db_engine.connect() as conn:
+        plan = await _explain(conn, "EXPLAIN QUERY PLAN ", cursor_list_statement(20, cursor, author_id))
+    details = [row["detail"] for row in plan]
+
+    assert any(f"USING INDEX {index}" in d or f"USING COVERING INDEX {index}" in d for d in details), details
+    assert not any("TEMP B-TREE" in d for d in details), details
+
+
+@pytest.mark.mysql
+@pytest.mark.parametrize("cursor, author_id, index", CASES)
+async def test_cursor_list_uses_composite_index_mysql(cursor, author_id, index):
+    url = os.getenv("MYSQL_TEST_URL")
+    if not url:
+        pytest.skip("MYSQL_TEST_URL 未设置")
+    engine = create_async_engine(url)
+    try:
+        async with engine.connect() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # 写入一些数据让优化器有统计信息可用，结束时回滚
+            await conn.commit()
+            trans = await conn.begin()
+            await conn.execute(insert(Article), [
+                {"title": f"t{i}", "content": "c", "author_id": None, "create_time": datetime(2025, 1, 1 + i % 28)}
+                for i in range(500)
+            ])
+            plan = await _explain(conn, "EXPLAIN ", cursor_list_statement(20, cursor, author_id))
+            await trans.rollback()
+    finally:
+        await engine.dispose()
+
+    assert plan[0]["key"] == index, plan
+    assert "filesort" not in (plan[0]["Extra"] or ""), plan
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.v1.endpoints import article
+from core.database import get_db
+from dao import article_search
+from dao.article_search import SearchBackend
+from models.article import Article
+from schemas.article_schemas import ArticleUpdate
+from schemas.base import PageParams
+from services import article_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def index(db_engine, fake_redis):
+    """测试库（SQLite）使用进程内倒排索引，每个测试从空表重建，不带上其他测试的文章"""
+    assert isinstance(article_search.search_backend, article_search.InMemoryBackend)
+    await article_search.search_backend.rebuild()
+    return article_search.search_backend
+
+
+async def _create_articles(*items) -> list:
+    async with get_db() as db:
+        articles = [Article(title=title, content=content, author_id=1) for title, content in items]
+        db.add_all(articles)
+        await db.flush()
+        return [a.id for a in articles]
+
+
+async def _search_ids(q: str, page: int = 1, page_size: int = 10) -> tuple[list, int]:
+    res = await article_service.search_articles(q, PageParams(page=page, page_size=page_size))
+    return [item.id for item in res.items], res.meta.total
+
+
+def test_backend_must_implement_search():
+    with pytest.raises(TypeError):
+        SearchBackend()
+
+
+async def test_title_match_ranks_above_content_match(index):
+    content_hit, title_hit, _ = await _create_articles(
+        ("日常随笔", "今天学习了数据库索引"),
+        ("数据库索引原理", "B+ 树"),
+        ("旅行", "去了海边"),
+    )
+    await index.rebuild()
+    assert await _search_ids("数据库") == ([title_hit, content_hit], 2)
+    assert await _search_ids("不存在的词") == ([], 0)
+
+
+async def test_pagination_covers_all_hits_once(index):
+    ids = await _create_articles(*[(f"python {i}", "python " * (i + 1)) for i in range(5)])
+    await index.rebuild()
+
+    pages = [await _search_ids("python", page=p, page_size=2) for p in (1, 2, 3)]
+    assert [len(hits) for hits, _ in pages] == [2, 2, 1]
+    assert all(total == 5 for _, total in pages)
+    assert sorted(i for hits, _ in pages for i in hits) == sorted(ids)
+    # 词频高的排在前面
+    assert pages[0][0][0] == ids[-1]
+
+
+async def test_index_follows_edit(index):
+    (article_id,) = await _create_articles(("旧标题", "旧内容"))
+    await index.rebuild()
+
+    update = ArticleUpdate(id=article_id, author_id=1, version=0, title="新标题", content="redis 缓存")
+    assert await article_service.edit_article(article_id, update, SimpleNamespace(id=1))
+    assert await _search_ids("redis") == ([article_id], 1)
+    assert await _search_ids("旧内容") == ([], 0)
+
+
+async def test_index_follows_bulk_import(index):
+    async def items():
+        yield {"title": "导入的文章", "content": "fastapi 流式导入"}
+
+    result = await article_service.bulk_create_articles(items(), author_id=1)
+    assert result.inserted == 1
+    assert (await _search_ids("fastapi"))[1] == 1
+
+
+async def test_search_endpoint(index):
+    (article_id,) = await _create_articles(("检索接口", "全文检索"))
+    await index.rebuild()
+
+    app = FastAPI()
+    app.include_router(article.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        res = await client.get("/api/v1/article/search", params={"q": "检索", "page_size": 5})
+        assert res.status_code == 200
+        data = res.json()["data"]
+        assert [item["id"] for item in data["items"]] == [article_id]
+        assert data["meta"]["total"] == 1
+        assert (await client.get("/api/v1/article/search", params={"q": ""})).status_code == 422
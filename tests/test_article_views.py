@@ -0,0 +1,127 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from core.database import get_db
+from dao import article_cache, article_dao, article_views
+from models.article import Article
+from schemas.base import CursorParams
+from services import article_service, article_view_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def clear_detail_cache():
+    article_cache.detail_cache.l1.clear()
+    yield
+    article_cache.detail_cache.l1.clear()
+
+
+async def _create_article() -> int:
+    async with get_db() as db:
+        article = Article(title="t", content="c", author_id=1)
+        db.add(article)
+        await db.flush()
+        return article.id
+
+
+async def _db_view_count(article_id: int) -> int:
+    async with get_db() as db:
+        return await db.scalar(select(Article.view_count).where(Article.id == article_id))
+
+
+async def test_flush_writes_deltas_to_db(db_engine, fake_redis):
+    article_id = await _create_article()
+    for _ in range(3):
+        await article_views.incr_view(article_id)
+
+    assert await article_view_service.flush_views() == 3
+    assert await _db_view_count(article_id) == 3
+    assert await article_views.get_pending_views([article_id]) == {}
+    assert not await fake_redis.exists(article_views.FLUSHING_SET_KEY)
+
+
+async def test_pending_views_include_flushing_hash_until_commit(db_engine, fake_redis):
+    article_id = await _create_article()
+    for _ in range(2):
+        await article_views.incr_view(article_id)
+
+    flushing_key, deltas = await article_views.drain_pending_views()
+    assert deltas == {article_id: 2}
+    await article_views.incr_view(article_id)
+    # 已取走但还没写回数据库的增量仍然计入，浏览量不会倒退
+    assert await article_views.get_pending_views([article_id]) == {article_id: 3}
+
+    await article_dao.apply_view_deltas(deltas)
+    await article_views.finish_flush(flushing_key)
+    assert await _db_view_count(article_id) == 2
+    assert await article_views.get_pending_views([article_id]) == {article_id: 1}
+
+
+async def test_failed_flush_restores_deltas(db_engine, fake_redis, monkeypatch):
+    article_id = await _create_article()
+    await article_views.incr_view(article_id)
+
+    async def fail(deltas):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(article_dao, "apply_view_deltas", fail)
+    assert await article_view_service.flush_views() == 0
+    assert await article_views.get_pending_views([article_id]) == {article_id: 1}
+    assert not await fake_redis.exists(article_views.FLUSHING_SET_KEY)
+
+
+async def _detail_views(article_id: int) -> int:
+    _, body = await article_service.get_article_detail(article_id)
+    return json.loads(body)["data"]["view_count"]
+
+
+async def _list_views(article_id: int) -> int:
+    page = await article_service.get_article_list(CursorParams())
+    return next(item.view_count for item in page.items if item.id == article_id)
+
+
+async def test_cached_counts_do_not_go_backwards_after_flush(db_engine, fake_redis):
+    article_id = await _create_article()
+    assert await _detail_views(article_id) == 1
+    assert await _detail_views(article_id) == 2
+    assert await _list_views(article_id) == 2
+
+    # 写回后 Redis 缓冲区清零，缓存的列表和详情仍然是写回前的快照
+    assert await article_view_service.flush_views() == 2
+    assert await _db_view_count(article_id) == 2
+    assert await _list_views(article_id) == 2
+    assert await _detail_views(article_id) == 3
+    assert await _list_views(article_id) == 3
+
+
+async def test_counts_are_not_doubled_between_commit_and_finish(db_engine, fake_redis):
+    article_id = await _create_article()
+    await _detail_views(article_id)
+    await _detail_views(article_id)
+
+    flushing_key, deltas = await article_views.drain_pending_views()
+    await article_dao.apply_view_deltas(deltas)
+    # 已经提交但还没清理正在写回的哈希
+    assert await _list_views(article_id) == 2
+    await article_views.finish_flush(flushing_key)
+    assert await _list_views(article_id) == 2
+
+
+async def test_seed_is_skipped_while_flush_in_progress(db_engine, fake_redis):
+    article_id = await _create_article()
+    await article_views.incr_view(article_id)
+    flush_seq = await article_views.get_flush_seq()
+
+    flushing_key, deltas = await article_views.drain_pending_views()
+    await article_dao.apply_view_deltas(deltas)
+    # 数据库已经包含增量而正在写回的哈希还在，此时初始化会重复计算
+    assert await article_views.seed_total_views(flush_seq, {article_id: 1}) is None
+    await article_views.finish_flush(flushing_key)
+    # 写回结束后序号变化，用写回前读到的数据库值初始化同样会被拒绝
+    assert await article_views.seed_total_views(flush_seq, {article_id: 0}) is None
+
+    assert await article_view_service.get_view_counts([article_id]) == {article_id: 1}
+    assert await fake_redis.hget(article_views.TOTAL_KEY, str(article_id)) == "1"
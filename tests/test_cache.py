@@ -0,0 +1,98 @@
+import asyncio
+import itertools
+import sys
+
+import pytest
+
+from core.cache import JsonSerializer, Serializer, TwoTierCache, get_serializer
+
+pytestmark = pytest.mark.anyio
+
+_names = itertools.count()
+
+
+def _make_cache(**kwargs) -> TwoTierCache:
+    return TwoTierCache(f"test-{next(_names)}", ttl=60, l1_ttl=60, **kwargs)
+
+
+class _Loader:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+async def test_l1_hit_then_invalidate_reloads(fake_redis):
+    cache = _make_cache()
+    loader = _Loader()
+    assert await cache.get("k", loader, tags=("t",)) == 1
+    assert await cache.get("k", loader, tags=("t",)) == 1
+
+    await cache.invalidate("t")
+    assert await cache.get("k", loader, tags=("t",)) == 2
+
+
+async def test_invalidate_removes_l1_entries_even_after_record_expires(fake_redis):
+    cache = _make_cache()
+    loader = _Loader()
+    await cache.get("k", loader, tags=("t",))
+
+    await cache.invalidate("t")
+    # 失效记录被清理后，L1 中也不能再有旧条目
+    cache._invalidated.clear()
+    assert len(cache.l1) == 0
+    assert await cache.get("k", loader, tags=("t",)) == 2
+
+
+async def test_load_started_before_invalidation_is_not_cached(fake_redis):
+    cache = _make_cache()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_loader():
+        started.set()
+        await release.wait()
+        return "old"
+
+    task = asyncio.create_task(cache.get("k", slow_loader, tags=("t",)))
+    await started.wait()
+    await cache.invalidate("t")
+    release.set()
+    assert await task == "old"
+
+    assert len(cache.l1) == 0
+    loader = _Loader()
+    assert await cache.get("k", loader, tags=("t",)) == 1
+
+
+async def test_redis_tag_version_invalidates_other_workers(fake_redis):
+    cache = _make_cache()
+    loader = _Loader()
+    await cache.get("k", loader, tags=("t",))
+
+    # 模拟另一个 worker：本进程的 L1 已被清空，Redis 中的旧值因版本号变化而失效
+    await cache.invalidate("t")
+    cache.l1.clear()
+    assert await cache.get("k", loader, tags=("t",)) == 2
+    cache.l1.clear()
+    assert await cache.get("k", loader, tags=("t",)) == 2
+
+
+def test_get_serializer_fails_fast_when_package_missing(monkeypatch):
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    with pytest.raises(RuntimeError, match="msgpack"):
+        get_serializer("msgpack")
+    with pytest.raises(ValueError):
+        get_serializer("pickle")
+    assert isinstance(get_serializer("json"), JsonSerializer)
+
+
+def test_incomplete_serializer_cannot_be_created():
+    class DumpsOnly(Serializer):
+        def dumps(self, value):
+            return ""
+
+    with pytest.raises(TypeError):
+        DumpsOnly()
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+from sqlalchemy import literal_column, select, table, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.db_routing import ReplicaSet, RoutingSession, use_primary
+
+pytestmark = pytest.mark.anyio
+
+_WHOAMI = select(literal_column("name")).select_from(table("whoami"))
+
+
+async def _make_engine(path: str, name: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE whoami (name VARCHAR(20))"))
+        await conn.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": name})
+    return engine
+
+
+@pytest.fixture
+async def routing(tmp_path):
+    """一个主库两个从库，每个库的 whoami 表里记着自己的名字"""
+    primary = await _make_engine(os.path.join(tmp_path, "primary.db"), "primary")
+    replicas = [await _make_engine(os.path.join(tmp_path, f"r{i}.db"), f"replica-{i}") for i in range(2)]
+    replica_set = ReplicaSet(replicas, strategy="round_robin")
+
+    class Session(RoutingSession):
+        pass
+
+    Session.primary = primary
+    Session.replica_set = replica_set
+    factory = async_sessionmaker(primary, class_=AsyncSession, sync_session_class=Session, expire_on_commit=False)
+    yield factory, replica_set
+    await primary.dispose()
+    await replica_set.dispose()
+
+
+async def _whoami(db: AsyncSession) -> str:
+    return await db.scalar(_WHOAMI)
+
+
+async def test_reads_go_to_one_pinned_replica(routing):
+    factory, _ = routing
+    async with factory() as db:
+        first = await _whoami(db)
+        # round_robin 下每次 choose 都会换从库，固定后同一个会话始终是同一个
+        assert first.startswith("replica-")
+        assert {await _whoami(db) for _ in range(5)} == {first}
+
+    async with factory() as db:
+        assert (await _whoami(db)).startswith("replica-")
+
+
+async def test_write_pins_session_to_primary(routing):
+    factory, _ = routing
+    async with factory() as db:
+        assert (await _whoami(db)).startswith("replica-")
+        await db.execute(update(table("whoami", literal_column("name"))).values(name="primary"))
+        assert await _whoami(db) == "primary"
+        await db.commit()
+        assert await _whoami(db) == "primary"
+
+
+async def test_use_primary_and_locking_reads(routing):
+    factory, _ = routing
+    async with factory() as db:
+        assert await db.scalar(_WHOAMI.with_for_update()) == "primary"
+    async with factory() as db:
+        use_primary(db)
+        assert await _whoami(db) == "primary"
+
+
+async def test_disconnected_replica_is_ejected(routing, tmp_path):
+    factory, replica_set = routing
+    broken = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp_path, 'missing', 'r.db')}")
+    broken_set = ReplicaSet([broken], strategy="round_robin")
+    replica_set.replicas.insert(0, broken_set.replicas[0])
+    replica_set.strategy = "least_connections"
+    bad = replica_set.replicas[0]
+
+    # least_connections 在都空闲时选第一个，即不可用的从库
+    async with factory() as db:
+        with pytest.raises(Exception):
+            await _whoami(db)
+    assert not bad.healthy
+
+    async with factory() as db:
+        assert (await _whoami(db)).startswith("replica-")
+    await broken.dispose()
+
+
+async def test_pinned_replica_is_replaced_after_ejection(routing):
+    factory, replica_set = routing
+    async with factory() as db:
+        first = await _whoami(db)
+        pinned = next(r for r in replica_set.replicas if r.name == first)
+        pinned.eject("test")
+        second = await _whoami(db)
+        assert second.startswith("replica-") and second != first
@@ -0,0 +1,20 @@
+import pytest
+
+from core import metrics
+
+
+def test_metric_subclass_must_implement_collect():
+    class NoCollect(metrics._Metric):
+        def _new_child(self):
+            return metrics._Value()
+
+    with pytest.raises(TypeError):
+        NoCollect("test_incomplete", "incomplete metric")
+
+
+def test_callback_metric_has_no_children():
+    metric = metrics.CallbackMetric("test_callback_children", "callback metric", "gauge", ("pool",),
+                                    lambda: {("primary",): 3})
+    assert list(metric.collect()) == ['test_callback_children{pool="primary"} 3']
+    with pytest.raises(TypeError):
+        metric.labels("primary")
@@ -0,0 +1,49 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.v1.endpoints import monitor
+from core.config import config
+
+pytestmark = pytest.mark.anyio
+
+PATHS = ["/metrics", "/debug/latency"]
+
+
+def _client(host: str) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(monitor.router)
+    transport = httpx.ASGITransport(app=app, client=(host, 12345))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.fixture(autouse=True)
+def monitor_defaults(monkeypatch):
+    monkeypatch.setattr(config, "MONITOR_TOKEN", "")
+    monkeypatch.setattr(config, "MONITOR_ALLOW_LOOPBACK", False)
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("host", ["127.0.0.1", "10.0.0.8"])
+async def test_denied_by_default(path, host):
+    # 同机反向代理转发的外部请求也来自 127.0.0.1，默认不能放行
+    async with _client(host) as client:
+        assert (await client.get(path)).status_code == 404
+
+
+@pytest.mark.parametrize("path", PATHS)
+async def test_loopback_allowed_when_opted_in(path, monkeypatch):
+    monkeypatch.setattr(config, "MONITOR_ALLOW_LOOPBACK", True)
+    async with _client("127.0.0.1") as client:
+        assert (await client.get(path)).status_code == 200
+    async with _client("10.0.0.8") as client:
+        assert (await client.get(path)).status_code == 404
+
+
+@pytest.mark.parametrize("path", PATHS)
+async def test_token_required_when_configured(path, monkeypatch):
+    monkeypatch.setattr(config, "MONITOR_TOKEN", "s3cret")
+    async with _client("127.0.0.1") as client:
+        assert (await client.get(path)).status_code == 404
+        assert (await client.get(path, headers={"Authorization": "Bearer wrong"})).status_code == 404
+        assert (await client.get(path, headers={"Authorization": "Bearer s3cret"})).status_code == 200
@@ -0,0 +1,107 @@
+import pytest
+from fastapi import HTTPException
+
+from core import rate_limit
+from core.rate_limit import InMemoryRateLimitBackend, Rate, RateLimitBackend, RedisRateLimitBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeClock:
+    """替换 core.rate_limit 中的 time 模块，time() 和 monotonic() 返回同一个可控的时间"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _FakeClock()
+    monkeypatch.setattr(rate_limit, "time", fake)
+    return fake
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, fake_redis):
+    if request.param == "memory":
+        return InMemoryRateLimitBackend()
+    return RedisRateLimitBackend()
+
+
+async def test_sliding_window_boundary(backend, clock):
+    rate = Rate(3, 10)
+    start = clock.now
+    for offset in (0, 1, 2):
+        clock.now = start + offset
+        assert await backend.hit(["k"], [rate]) == 0
+
+    clock.now = start + 3
+    assert await backend.hit(["k"], [rate]) == pytest.approx(7)
+    # 最早一次请求正好滑出窗口之前仍然拒绝
+    clock.now = start + 9.999
+    assert await backend.hit(["k"], [rate]) == pytest.approx(0.001)
+    # 滑出窗口的那一刻放行，窗口里只剩 1、2 和本次
+    clock.now = start + 10
+    assert await backend.hit(["k"], [rate]) == 0
+    assert await backend.hit(["k"], [rate]) == pytest.approx(1)
+
+
+async def test_denied_request_is_not_counted(backend, clock):
+    rate = Rate(1, 10)
+    start = clock.now
+    assert await backend.hit(["k"], [rate]) == 0
+    clock.now = start + 5
+    assert await backend.hit(["k"], [rate]) > 0
+    clock.now = start + 10
+    assert await backend.hit(["k"], [rate]) == 0
+
+
+async def test_any_key_over_limit_denies_all(backend, clock):
+    ip, username = Rate(10, 60), Rate(1, 60)
+    assert await backend.hit(["ip", "user"], [ip, username]) == 0
+    assert await backend.hit(["ip", "user"], [ip, username]) > 0
+    # 被拒绝时两个 key 都不记录，IP 维度还剩 9 次
+    for _ in range(9):
+        assert await backend.hit(["ip", "other"], [ip, Rate(100, 60)]) == 0
+    assert await backend.hit(["ip", "other"], [ip, Rate(100, 60)]) > 0
+
+
+async def test_memory_backend_bounds_keys(clock):
+    backend = InMemoryRateLimitBackend(max_keys=100)
+    for i in range(1000):
+        await backend.hit([f"k{i}"], [Rate(5, 60)])
+    assert len(backend._hits) == 100
+
+
+async def test_check_rate_limit_raises_429_with_retry_after(monkeypatch, clock):
+    monkeypatch.setattr(rate_limit, "rate_limit_backend", InMemoryRateLimitBackend())
+    await rate_limit.check_rate_limit(["k"], [Rate(1, 60)])
+    clock.now += 0.5
+    with pytest.raises(HTTPException) as exc_info:
+        await rate_limit.check_rate_limit(["k"], [Rate(1, 60)])
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "60"
+
+
+async def test_backend_down_falls_back_to_memory(monkeypatch, clock):
+    class _DownBackend(RateLimitBackend):
+        async def hit(self, keys, rates):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limit, "rate_limit_backend", _DownBackend())
+    monkeypatch.setattr(rate_limit, "fallback_backend", InMemoryRateLimitBackend())
+    await rate_limit.check_rate_limit(["k"], [Rate(1, 60)])
+    with pytest.raises(HTTPException) as exc_info:
+        await rate_limit.check_rate_limit(["k"], [Rate(1, 60)])
+    assert exc_info.value.status_code == 429
+
+
+def test_backend_must_implement_hit():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
@@ -0,0 +1,156 @@
+import asyncio
+import socket
+import time
+
+import pytest
+import redis.asyncio as redis
+
+from core import redis as core_redis
+from core.redis import CircuitBreaker, GuardedRedis, RedisUnavailable
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeClock:
+    """替换 core.redis 中的 time 模块，monotonic() 可控，perf_counter() 仍用真实时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _FakeClock()
+    monkeypatch.setattr(core_redis, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    fresh = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    monkeypatch.setattr(core_redis, "redis_breaker", fresh)
+    return fresh
+
+
+class _Calls:
+    def __init__(self):
+        self.count = 0
+
+    def failing(self, exc=redis.ConnectionError):
+        async def func():
+            self.count += 1
+            raise exc("boom")
+        return func
+
+    def ok(self):
+        async def func():
+            self.count += 1
+            return "PONG"
+        return func
+
+
+def _unreachable_client() -> GuardedRedis:
+    # 先占一个端口再关闭，保证连接被拒绝
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return GuardedRedis(host="127.0.0.1", port=port, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+
+async def test_closed_open_half_open_closed(breaker, clock):
+    calls = _Calls()
+    for _ in range(3):
+        with pytest.raises(redis.ConnectionError):
+            await breaker.call(calls.failing())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # 打开期间直接拒绝，不执行调用
+    with pytest.raises(RedisUnavailable):
+        await breaker.call(calls.ok())
+    assert calls.count == 3
+
+    # 超时后半开，试探成功即关闭
+    clock.now += 10
+    assert await breaker.call(calls.ok()) == "PONG"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+async def test_half_open_failure_reopens(breaker, clock):
+    calls = _Calls()
+    breaker.trip("test")
+    clock.now += 10
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(calls.failing(asyncio.TimeoutError))
+    assert breaker.state == CircuitBreaker.OPEN
+    # 重新计时，没到时间不会再试探
+    clock.now += 5
+    with pytest.raises(RedisUnavailable):
+        await breaker.call(calls.ok())
+    assert calls.count == 1
+
+
+async def test_half_open_allows_single_trial(breaker, clock):
+    breaker.trip("test")
+    clock.now += 10
+    release = asyncio.Event()
+
+    async def slow_ok():
+        await release.wait()
+        return "PONG"
+
+    trial = asyncio.create_task(breaker.call(slow_ok))
+    await asyncio.sleep(0)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(RedisUnavailable):
+        await breaker.call(_Calls().ok())
+    release.set()
+    assert await trial == "PONG"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_command_errors_do_not_trip(breaker):
+    calls = _Calls()
+    for _ in range(5):
+        with pytest.raises(redis.ResponseError):
+            await breaker.call(calls.failing(redis.ResponseError))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_guarded_client_short_circuits_when_unreachable(breaker):
+    client = _unreachable_client()
+    try:
+        for _ in range(3):
+            with pytest.raises(redis.ConnectionError) as exc_info:
+                await client.get("k")
+            assert not isinstance(exc_info.value, RedisUnavailable)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        start = time.perf_counter()
+        with pytest.raises(RedisUnavailable):
+            await client.get("k")
+        with pytest.raises(RedisUnavailable):
+            async with client.pipeline() as pipe:
+                pipe.get("k")
+                await pipe.execute()
+        assert time.perf_counter() - start < 0.1
+    finally:
+        await client.aclose()
+
+
+async def test_init_redis_trips_breaker_when_unreachable(breaker, monkeypatch):
+    client = _unreachable_client()
+    monkeypatch.setattr(core_redis, "redis_client", client)
+    try:
+        assert await core_redis.init_redis() is False
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(RedisUnavailable):
+            await client.ping()
+    finally:
+        await client.aclose()
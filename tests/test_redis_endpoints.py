@@ -0,0 +1,66 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.v1.endpoints import redis_example
+from core.redis import get_redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(fake_redis):
+    app = FastAPI()
+    app.include_router(redis_example.router)
+    app.dependency_overrides[get_redis_client] = lambda: fake_redis
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def test_scan_cursor_continuation_visits_every_key(client, fake_redis):
+    expected = {f"user:{i}" for i in range(250)}
+    await fake_redis.mset({key: "1" for key in expected})
+    await fake_redis.mset({f"other:{i}": "1" for i in range(50)})
+
+    seen, cursor, pages = set(), 0, 0
+    while True:
+        res = (await client.get("/redis/scan", params={"cursor": cursor, "count": 20, "match": "user:*"})).json()
+        seen.update(res["keys"])
+        cursor = res["cursor"]
+        pages += 1
+        if cursor == 0:
+            break
+    assert seen == expected
+    assert pages > 1
+
+
+async def test_scan_rejects_invalid_count(client):
+    assert (await client.get("/redis/scan", params={"count": 0})).status_code == 422
+    assert (await client.get("/redis/scan", params={"count": 1001})).status_code == 422
+
+
+async def test_mset_with_ex_sets_ttl(client, fake_redis):
+    res = await client.post("/redis/mset", json={"items": {"a": "1", "b": "2"}, "ex": 30})
+    assert res.json() == {"message": "Successfully set 2 keys"}
+    assert await fake_redis.mget(["a", "b"]) == ["1", "2"]
+    for key in ("a", "b"):
+        assert 0 < await fake_redis.ttl(key) <= 30
+
+
+async def test_mset_without_ex_does_not_expire(client, fake_redis):
+    await client.post("/redis/mset", json={"items": {"a": "1"}})
+    assert await fake_redis.ttl("a") == -1
+
+
+async def test_mget_and_mdelete(client, fake_redis):
+    await fake_redis.set("a", "1")
+    res = await client.post("/redis/mget", json={"keys": ["a", "missing"]})
+    assert res.json() == {"items": {"a": "1", "missing": None}}
+
+    res = await client.post("/redis/mdelete", json={"keys": ["a", "missing"]})
+    assert res.json() == {"deleted": 1}
+
+
+async def test_batch_size_limits(client):
+    assert (await client.post("/redis/mget", json={"keys": []})).status_code == 422
+    assert (await client.post("/redis/mset", json={"items": {"a": "1"}, "ex": 0})).status_code == 422
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from core.cache import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_load():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.create_task(flights.do("k", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*waiters) == [1] * 5
+    assert calls == 1
+    assert len(flights) == 0
+
+
+async def test_cancelling_first_caller_does_not_cancel_other_waiters():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def load():
+        started.set()
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(flights.do("k", load))
+    await started.wait()
+    second = asyncio.create_task(flights.do("k", load))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    release.set()
+    assert await second == "value"
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fail():
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(flights.do("k", fail)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def ok():
+        return 1
+
+    assert await flights.do("k", ok) == 1
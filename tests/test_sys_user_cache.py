@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import update
+
+from core.database import get_db
+from models.sys_user import SysUser
+from services import sys_user_service
+from services.sys_user_cache import get_user_snapshot, user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.l1.clear()
+    yield
+    user_cache.l1.clear()
+
+
+async def _create_user() -> int:
+    async with get_db() as db:
+        user = SysUser(username="alice", password="x", nickname="old", status=True, deleted=False)
+        db.add(user)
+        await db.flush()
+        return user.id
+
+
+async def test_password_rehash_invalidates_user_cache_after_commit(db_engine, fake_redis):
+    user_id = await _create_user()
+    assert (await get_user_snapshot(user_id)).nickname == "old"
+
+    async with get_db() as db:
+        await db.execute(update(SysUser).where(SysUser.id == user_id).values(nickname="new"))
+    # 绕过服务层的修改不会失效缓存
+    assert (await get_user_snapshot(user_id)).nickname == "old"
+
+    await sys_user_service.update_password_hash(user_id, "y")
+    assert (await get_user_snapshot(user_id)).nickname == "new"
+
+
+async def test_rolled_back_update_keeps_cache(db_engine, fake_redis):
+    user_id = await _create_user()
+    await get_user_snapshot(user_id)
+
+    with pytest.raises(RuntimeError):
+        async with get_db() as db:
+            await sys_user_service.update_password_hash(user_id, "y", db)
+            await db.execute(update(SysUser).where(SysUser.id == user_id).values(nickname="new"))
+            raise RuntimeError("rollback")
+    assert (await get_user_snapshot(user_id)).nickname == "old"
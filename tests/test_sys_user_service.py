@@ -0,0 +1,47 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from dao.sys_user_dao import SysUserDao
+from schemas.sys_user_schemas import UserCreate
+from services import sys_user_service
+from utils import hashing
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    async def hash_password(password: str) -> str:
+        return "hashed:" + password
+
+    monkeypatch.setattr(hashing, "hash_password", hash_password)
+
+
+async def test_duplicate_username_returns_400(db_engine, fake_redis):
+    await sys_user_service.create_user(UserCreate(username="alice", password="p"))
+    with pytest.raises(HTTPException) as exc_info:
+        await sys_user_service.create_user(UserCreate(username="alice", password="p"))
+    assert exc_info.value.status_code == 400
+
+
+async def test_other_integrity_errors_are_reraised(db_engine, fake_redis, monkeypatch):
+    async def create_user(user, db=None):
+        raise IntegrityError("INSERT INTO sys_user ...", {}, Exception("NOT NULL constraint failed: sys_user.password"))
+
+    monkeypatch.setattr(SysUserDao, "create_user", create_user)
+    with pytest.raises(IntegrityError):
+        await sys_user_service.create_user(UserCreate(username="bob", password="p"))
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("(1062, \"Duplicate entry 'alice' for key 'sys_user.username'\")", True),
+    ("(1062, \"Duplicate entry 'alice' for key 'username'\")", True),
+    ("(1062, \"Duplicate entry 'username' for key 'sys_user.PRIMARY'\")", False),
+    ("(1452, 'Cannot add or update a child row: a foreign key constraint fails')", False),
+    ("UNIQUE constraint failed: sys_user.username", True),
+    ("NOT NULL constraint failed: sys_user.password", False),
+])
+def test_is_username_conflict(message, expected):
+    error = IntegrityError("INSERT", {}, Exception(message))
+    assert sys_user_service._is_username_conflict(error) is expected
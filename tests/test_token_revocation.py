@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from services import token_revocation
+from utils.bloom import BloomFilter
+
+pytestmark = pytest.mark.anyio
+
+
+class _BrokenRedis:
+    def __getattr__(self, name):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(token_revocation, "_bloom", BloomFilter(1000))
+    monkeypatch.setattr(token_revocation, "_synced", False)
+
+
+def _claims(jti: str) -> dict:
+    return {"jti": jti, "exp": time.time() + 600}
+
+
+async def test_before_first_sync_asks_redis(fake_redis, fresh_state):
+    await fake_redis.set(token_revocation.REVOKED_KEY.format(jti="a"), "1")
+    assert await token_revocation.is_token_revoked(_claims("a"))
+    assert not await token_revocation.is_token_revoked(_claims("b"))
+
+
+async def test_before_first_sync_redis_error_returns_503(fresh_state, monkeypatch):
+    monkeypatch.setattr(token_revocation, "redis_client", _BrokenRedis())
+    with pytest.raises(HTTPException) as exc_info:
+        await token_revocation.is_token_revoked(_claims("a"))
+    assert exc_info.value.status_code == 503
+
+
+async def test_revocation_received_during_sync_is_kept(fake_redis, fresh_state, monkeypatch):
+    class _PubSubDuringSync:
+        """zrange 执行期间另一个 worker 注销了 Token，通过发布订阅送达"""
+
+        def __init__(self, pipe):
+            self._pipe = pipe
+
+        async def __aenter__(self):
+            await self._pipe.__aenter__()
+            return self
+
+        async def __aexit__(self, *exc):
+            return await self._pipe.__aexit__(*exc)
+
+        def __getattr__(self, name):
+            return getattr(self._pipe, name)
+
+        async def execute(self):
+            result = await self._pipe.execute()
+            token_revocation._on_revoked("late")
+            return result
+
+    class _Client:
+        def pipeline(self, **kwargs):
+            return _PubSubDuringSync(fake_redis.pipeline(**kwargs))
+
+    monkeypatch.setattr(token_revocation, "redis_client", _Client())
+    await token_revocation.sync_revocations()
+    assert "late" in token_revocation._bloom
+    assert token_revocation._added_during_sync is None
+
+
+async def test_after_sync_bloom_miss_skips_redis(fake_redis, fresh_state, monkeypatch):
+    await token_revocation.sync_revocations()
+    monkeypatch.setattr(token_revocation, "redis_client", _BrokenRedis())
+    assert not await token_revocation.is_token_revoked(_claims("a"))
+
+
+async def test_revoke_then_check(fake_redis, fresh_state):
+    await token_revocation.sync_revocations()
+    await token_revocation.revoke_token(_claims("a"))
+    assert await token_revocation.is_token_revoked(_claims("a"))
+
+
+async def test_revoke_redis_error_returns_503(fresh_state, monkeypatch):
+    monkeypatch.setattr(token_revocation, "redis_client", _BrokenRedis())
+    with pytest.raises(HTTPException) as exc_info:
+        await token_revocation.revoke_token(_claims("a"))
+    assert exc_info.value.status_code == 503
@@ -1,4 +1,9 @@
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Dict, Mapping
 
 import jwt
 from fastapi import HTTPException, status
@@ -7,6 +12,7 @@ from jwt.exceptions import InvalidTokenError
 from pwdlib import PasswordHash
 
 from core.config import config
+from core.local_cache import TTLCache
 
 
 password_hash = PasswordHash.recommended()
@@ -26,6 +32,11 @@ def get_password_hash(password):
     return password_hash.hash(password)
 
 
+# 校验密码，哈希参数过期（如 Argon2 参数调整）时同时返回新的哈希值，否则第二项为 None
+def verify_and_update_password(plain_password, hashed_password):
+    return password_hash.verify_and_update(plain_password, hashed_password)
+
+
 # 根据当前时间生成 JWT
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -33,23 +44,58 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti 是 Token 的唯一id，注销时按 jti 加入黑名单
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
     return encoded_jwt
 
 
-# 解码JWT获取用户名
-def decode_token(token: str):
-    credentials_exception = HTTPException(
+'''
+已验证 Token 的缓存：同一个 Token 在有效期内会被反复使用，
+缓存解码后的 claims，过期时间就是 Token 自身的 exp，避免每个请求都重新做签名校验
+无效 Token 短暂缓存为失败，key 使用 Token 的 sha256，不在内存中保存原始 Token
+'''
+_token_cache = TTLCache(maxsize=config.TOKEN_CACHE_MAX_SIZE, ttl=config.TOKEN_CACHE_NEGATIVE_TTL)
+_INVALID_TOKEN = object()
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+# 解码并校验JWT，返回只读的 claims
+def decode_token_claims(token: str) -> Mapping:
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = _token_cache.get(key)
+    if claims is _INVALID_TOKEN:
+        raise _credentials_exception()
+    if claims is not None:
+        return claims
+
     try:
         payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        return int(user_id)
+        if payload.get("sub") is None:
+            raise InvalidTokenError("missing sub claim")
     except InvalidTokenError:
-        raise credentials_exception
+        _token_cache.set(key, _INVALID_TOKEN)
+        raise _credentials_exception()
+
+    claims = MappingProxyType(payload)
+    exp = payload.get("exp")
+    if exp is not None:
+        _token_cache.set(key, claims, ttl=exp - time.time())
+    return claims
+
+
+# 解码JWT获取用户id
+def decode_token(token: str):
+    return int(decode_token_claims(token)["sub"])
+
+
+# Token 缓存的命中、未命中、淘汰次数等统计，供监控使用
+def get_token_cache_stats() -> Dict[str, int]:
+    return _token_cache.stats()
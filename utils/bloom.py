@@ -0,0 +1,38 @@
+import hashlib
+import math
+
+'''
+布隆过滤器：判断元素"一定不存在"或"可能存在"，内存占用固定
+用于在本地快速排除绝大多数不需要访问 Redis / 数据库的情况
+'''
+
+
+class BloomFilter:
+    """基于 bytearray 的布隆过滤器，使用 blake2b 双重哈希生成 k 个位置"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: 预计元素个数
+            error_rate: 元素个数不超过 capacity 时的误判率
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
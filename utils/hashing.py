@@ -0,0 +1,90 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+
+from core.config import config
+from core.logger import app_logger
+from utils import auth
+
+'''
+密码哈希执行器：Argon2 计算一次需要几十毫秒 CPU，直接在协程里调用会阻塞整个事件循环
+这里把哈希和校验提交到进程池执行（创建失败时退回线程池），
+并限制排队数量，排满时立即返回 503，不让登录洪峰拖垮其他请求
+'''
+
+_executor: Executor | None = None
+# 已提交（执行中 + 排队中）的任务数
+_inflight = 0
+
+
+def init_hashing_executor() -> None:
+    """创建执行器，在 lifespan 中调用；脚本中直接调用哈希函数时会自动创建"""
+    global _executor
+    if _executor is not None:
+        return
+    workers = max(1, config.PASSWORD_HASH_WORKERS)
+    if config.PASSWORD_HASH_EXECUTOR == "process":
+        try:
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            app_logger.info(f"密码哈希进程池已创建，进程数 {workers}")
+            return
+        except (OSError, NotImplementedError, ImportError) as e:
+            app_logger.error(f"创建密码哈希进程池失败，改用线程池: {e}")
+    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    app_logger.info(f"密码哈希线程池已创建，线程数 {workers}")
+
+
+def shutdown_hashing_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def _fallback_to_threads() -> None:
+    global _executor
+    app_logger.error("密码哈希进程池不可用，改用线程池")
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = ThreadPoolExecutor(max_workers=max(1, config.PASSWORD_HASH_WORKERS),
+                                   thread_name_prefix="password-hash")
+
+
+async def _run(func, *args):
+    global _inflight
+    if _inflight >= config.PASSWORD_HASH_WORKERS + config.PASSWORD_HASH_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry later",
+            headers={"Retry-After": "1"},
+        )
+    if _executor is None:
+        init_hashing_executor()
+
+    _inflight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_executor, func, *args)
+        except BrokenProcessPool:
+            _fallback_to_threads()
+            return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _inflight -= 1
+
+
+async def hash_password(password: str) -> str:
+    """计算密码哈希"""
+    return await _run(auth.get_password_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    校验密码
+
+    Returns:
+        tuple[bool, str | None]: (是否正确, 需要更新的新哈希值)，哈希参数未变化时第二项为None
+    """
+    return await _run(auth.verify_and_update_password, password, hashed_password)
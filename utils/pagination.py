@@ -0,0 +1,25 @@
+import base64
+import json
+from datetime import datetime
+
+
+'''
+游标分页工具：把排序键 (create_time, id) 编码成不透明的字符串返回给前端，
+前端翻页时原样传回，后端解码后作为 WHERE 条件继续往后查
+'''
+
+# 生成游标
+def encode_cursor(create_time: datetime, article_id: int) -> str:
+    raw = json.dumps([create_time.isoformat(), article_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# 解析游标，格式不合法时抛出 ValueError
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii"))
+        create_time, article_id = json.loads(raw)
+        return datetime.fromisoformat(create_time), int(article_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e